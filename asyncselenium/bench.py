@@ -0,0 +1,354 @@
+"""
+Performance benchmarks of the async client against the fake WebDriver server.
+
+Measures command throughput for one and many concurrent sessions, session
+create/quit rate, AsyncWebDriverWait detection latency and large payload
+handling. Results are printed as JSON and can be compared to an earlier run:
+
+    python -m asyncselenium.bench --output before.json
+    python -m asyncselenium.bench --compare before.json --threshold 0.1
+
+``--compare`` exits with status 1 if a throughput metric dropped or a latency
+metric grew by more than the threshold.
+
+The ``presets`` scenario drives a real Chrome and only runs when asked for,
+it loads a local page with images under each option preset:
+
+    python -m asyncselenium.bench presets --chromedriver /usr/bin/chromedriver
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from aiohttp import web
+from selenium.webdriver.common.by import By
+
+from asyncselenium import __version__
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.chrome.async_webdriver import AsyncChromeDriver
+from asyncselenium.webdriver.chrome.presets import PRESETS
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.support import async_expected_conditions as ec
+from asyncselenium.webdriver.support.async_wait import AsyncWebDriverWait
+from asyncselenium.webdriver.support.command_metrics import LatencyHistogram
+
+SCENARIOS = ('commands', 'churn', 'wait', 'payload')
+# scenarios needing a browser, run only when named
+BROWSER_SCENARIOS = ('presets',)
+CAPABILITIES = {'browserName': 'fake'}
+PAGE_URL = 'http://bench.test/'
+PAGE = '''<html><head><title>bench</title></head><body>
+<div id="main"><p class="item">one</p><p class="item">two</p><a href="/next">next</a></div>
+</body></html>'''
+
+
+def _latency(histogram, scale=1000.0, unit='ms'):
+    return {'p50_%s' % unit: _round(histogram.quantile(0.5), scale),
+            'p95_%s' % unit: _round(histogram.quantile(0.95), scale),
+            'p99_%s' % unit: _round(histogram.quantile(0.99), scale),
+            'max_%s' % unit: _round(histogram.max, scale)}
+
+
+def _round(value, scale=1.0):
+    return None if value is None else round(value * scale, 3)
+
+
+async def _driver(server):
+    return await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+
+
+async def bench_commands(server, sessions, duration):
+    """Runs a read heavy command mix on ``sessions`` drivers for ``duration`` seconds."""
+    drivers = await asyncio.gather(*[_driver(server) for _ in range(sessions)])
+    histogram = LatencyHistogram()
+    loop = asyncio.get_running_loop()
+
+    async def worker(driver):
+        await driver.get(PAGE_URL)
+        element = await driver.find_element(By.ID, 'main')
+        operations = (lambda: driver.title,
+                      lambda: driver.find_element(By.CSS_SELECTOR, 'p.item'),
+                      lambda: element.text,
+                      lambda: driver.current_url)
+        count = 0
+        while loop.time() < stop:
+            started = time.perf_counter()
+            await operations[count % len(operations)]()
+            histogram.record(time.perf_counter() - started)
+            count += 1
+        return count
+
+    try:
+        started = time.perf_counter()
+        stop = loop.time() + duration
+        counts = await asyncio.gather(*[worker(driver) for driver in drivers])
+        elapsed = time.perf_counter() - started
+    finally:
+        await asyncio.gather(*[driver.quit() for driver in drivers])
+    result = {'sessions': sessions, 'commands': sum(counts), 'seconds': _round(elapsed),
+              'commands_per_sec': _round(sum(counts) / elapsed)}
+    result.update(_latency(histogram))
+    return result
+
+
+async def bench_churn(server, concurrency, duration):
+    """Creates and quits sessions with ``concurrency`` workers for ``duration`` seconds."""
+    create, quit = LatencyHistogram(), LatencyHistogram()
+    loop = asyncio.get_running_loop()
+    stop = loop.time() + duration
+
+    async def worker():
+        count = 0
+        while loop.time() < stop:
+            started = time.perf_counter()
+            driver = await _driver(server)
+            created = time.perf_counter()
+            await driver.quit()
+            create.record(created - started)
+            quit.record(time.perf_counter() - created)
+            count += 1
+        return count
+
+    started = time.perf_counter()
+    counts = await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    result = {'concurrency': concurrency, 'sessions': sum(counts),
+              'sessions_per_sec': _round(sum(counts) / elapsed)}
+    result.update({'create_' + k: v for k, v in _latency(create).items()})
+    result.update({'quit_' + k: v for k, v in _latency(quit).items()})
+    return result
+
+
+async def bench_wait(server, poll_frequency, iterations, max_delay=0.1, seed=0):
+    """
+    Measures how long AsyncWebDriverWait takes to notice an element that
+    appears at a random time after the wait started.
+    """
+    detection = LatencyHistogram()
+    rng = random.Random(seed)
+    driver = await _driver(server)
+    loop = asyncio.get_running_loop()
+    try:
+        for _ in range(iterations):
+            await driver.get(PAGE_URL)
+            session = server.sessions[driver.session_id]
+            appeared = []
+
+            def appear():
+                session.append_html('<span id="late">late</span>')
+                appeared.append(time.perf_counter())
+
+            loop.call_later(rng.uniform(0, max_delay), appear)
+            wait = AsyncWebDriverWait(driver, max_delay + poll_frequency * 4 + 1, poll_frequency)
+            await wait.until(ec.presence_of_element_located((By.ID, 'late')))
+            detection.record(time.perf_counter() - appeared[0])
+    finally:
+        await driver.quit()
+    result = {'poll_frequency': poll_frequency, 'iterations': iterations}
+    result.update(_latency(detection))
+    return result
+
+
+async def bench_payload(server, page_kb, iterations):
+    """Times page_source of a ``page_kb`` KB page and full screenshots."""
+    server.add_page(PAGE_URL + 'large', '<html><head><title>large</title></head><body>%s</body></html>' % (
+        '<p class="row">%s</p>' % ('x' * 1000) * page_kb))
+    driver = await _driver(server)
+    source, screenshot = LatencyHistogram(), LatencyHistogram()
+    try:
+        await driver.get(PAGE_URL + 'large')
+        for _ in range(iterations):
+            started = time.perf_counter()
+            page = await driver.page_source
+            source.record(time.perf_counter() - started)
+            started = time.perf_counter()
+            png = await driver.get_screenshot_as_png()
+            screenshot.record(time.perf_counter() - started)
+    finally:
+        await driver.quit()
+    result = {'page_source_bytes': len(page), 'screenshot_bytes': len(png),
+              'page_source_mb_per_sec': _round(len(page) / source.mean / 1e6),
+              'screenshot_mb_per_sec': _round(len(png) / screenshot.mean / 1e6)}
+    result.update({'page_source_' + k: v for k, v in _latency(source).items()})
+    result.update({'screenshot_' + k: v for k, v in _latency(screenshot).items()})
+    return result
+
+
+async def _preset_site(images, image_kb, image_delay):
+    """Starts a local site whose page waits on ``images`` slow images, returns (runner, url)."""
+    image = os.urandom(image_kb * 1024)
+    page = '<html><head><title>presets</title></head><body><div id="main">%s</div></body></html>' % ''.join(
+        '<img src="/img/%d.png">' % i for i in range(images))
+
+    async def index(request):
+        return web.Response(text=page, content_type='text/html')
+
+    async def img(request):
+        await asyncio.sleep(image_delay)
+        return web.Response(body=image, content_type='image/png', headers={'Cache-Control': 'no-store'})
+
+    app = web.Application()
+    app.router.add_get('/', index)
+    app.router.add_get('/img/{name}', img)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, 'http://127.0.0.1:%d/' % port
+
+
+async def bench_presets(chromedriver, iterations, images=20, image_kb=64, image_delay=0.05):
+    """
+    Starts Chrome bare and with every preset, times session start and page
+    loads of a local page with images and reads the JavaScript heap size.
+    """
+    runner, url = await _preset_site(images, image_kb, image_delay)
+    results = {}
+    try:
+        for preset in [None] + sorted(PRESETS):
+            loads = LatencyHistogram()
+            started = time.perf_counter()
+            driver = await AsyncChromeDriver(chromedriver, preset=preset)
+            start = time.perf_counter() - started
+            try:
+                begun = time.perf_counter()
+                for i in range(iterations):
+                    started = time.perf_counter()
+                    await driver.get('%s?%d' % (url, i))
+                    loads.record(time.perf_counter() - started)
+                elapsed = time.perf_counter() - begun
+                metrics = await driver._performance_metrics()
+            finally:
+                await driver.quit()
+            result = {'start_ms': _round(start, 1000), 'pages_per_sec': _round(iterations / elapsed),
+                      'js_heap_mb': _round(metrics.get('JSHeapTotalSize', 0) / 1e6)}
+            result.update(_latency(loads))
+            results['presets[%s]' % (preset or 'none')] = result
+    finally:
+        await runner.cleanup()
+    return results
+
+
+async def run(args):
+    results = {}
+    server = FakeWebDriverServer(latency=args.latency, jitter=args.jitter, seed=args.seed,
+                                 screenshot_size=(1920, 1080), screenshot_noise=True)
+    server.add_page(PAGE_URL, PAGE)
+    async with server:
+        if 'commands' in args.scenarios:
+            for sessions in args.sessions:
+                results['commands[sessions=%d]' % sessions] = await bench_commands(
+                    server, sessions, args.duration)
+        if 'churn' in args.scenarios:
+            for concurrency in sorted({1, max(args.sessions)}):
+                results['churn[concurrency=%d]' % concurrency] = await bench_churn(
+                    server, concurrency, args.duration)
+        if 'wait' in args.scenarios:
+            for poll in args.poll_frequencies:
+                results['wait[poll=%g]' % poll] = await bench_wait(
+                    server, poll, args.iterations, seed=args.seed)
+        if 'payload' in args.scenarios:
+            results['payload[page_kb=%d]' % args.page_kb] = await bench_payload(
+                server, args.page_kb, args.iterations)
+    if 'presets' in args.scenarios:
+        results.update(await bench_presets(args.chromedriver, args.iterations))
+    return {'meta': {'version': __version__,
+                     'python': platform.python_version(),
+                     'platform': platform.platform(),
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                     'latency': args.latency,
+                     'jitter': args.jitter,
+                     'duration': args.duration},
+            'results': results}
+
+
+def compare(current, baseline, threshold):
+    """
+    Compares two result documents.
+
+    :Returns:
+     - a list of (benchmark, metric, baseline, current, relative change, regressed)
+    """
+    rows = []
+    for name, metrics in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before:
+            continue
+        for metric, value in metrics.items():
+            old = before.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old
+            if metric.endswith('_per_sec'):
+                regressed = change < -threshold
+            elif metric.endswith('_ms'):
+                regressed = change > threshold
+            else:
+                continue
+            rows.append((name, metric, old, value, round(change, 3), regressed))
+    return rows
+
+
+def _floats(text):
+    return [float(value) for value in text.split(',')]
+
+
+def _ints(text):
+    return [int(value) for value in text.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m asyncselenium.bench', description=__doc__.split('\n\n')[0])
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help='benchmarks to run: %s, all but %s by default' % (
+                            ', '.join(SCENARIOS + BROWSER_SCENARIOS), ', '.join(BROWSER_SCENARIOS)))
+    parser.add_argument('--sessions', type=_ints, default=[1, 16], help='concurrent sessions, comma separated')
+    parser.add_argument('--duration', type=float, default=2.0, help='seconds per throughput run')
+    parser.add_argument('--iterations', type=int, default=20, help='iterations of wait and payload runs')
+    parser.add_argument('--poll-frequencies', type=_floats, default=[0.5, 0.05],
+                        help='AsyncWebDriverWait poll frequencies, comma separated')
+    parser.add_argument('--page-kb', type=int, default=1024, help='size of the page_source page')
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated server latency per command')
+    parser.add_argument('--jitter', type=float, default=0.0, help='simulated random extra latency')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chromedriver', help='chromedriver executable of the presets benchmark')
+    parser.add_argument('--output', help='write the JSON results to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change counted as a regression')
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS + BROWSER_SCENARIOS)
+    if unknown:
+        parser.error('unknown scenario: %s' % ', '.join(sorted(unknown)))
+    if 'presets' in args.scenarios and not args.chromedriver:
+        parser.error('the presets benchmark needs --chromedriver')
+    args.scenarios = args.scenarios or list(SCENARIOS)
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.threshold)
+        regressions = [row for row in rows if row[5]]
+        for name, metric, old, new, change, regressed in rows:
+            print('%-32s %-28s %12s -> %-12s %+7.1f%%%s' % (
+                name, metric, old, new, change * 100, '  REGRESSION' if regressed else ''),
+                file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,358 @@
+"""
+A tiny in-memory DOM used by the fake WebDriver server.
+
+It understands enough HTML to build a tree and enough CSS selectors and
+XPath to answer the locators used in tests: tags, ids, classes, attribute
+selectors, descendant/child combinators, and simple XPath steps with
+attribute, text, contains() and index predicates.
+"""
+
+import re
+
+from html.parser import HTMLParser
+
+VOID_ELEMENTS = frozenset(('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                           'link', 'meta', 'param', 'source', 'track', 'wbr'))
+BOOLEAN_ATTRIBUTES = frozenset(('checked', 'selected', 'disabled', 'readonly', 'required',
+                                'multiple', 'hidden', 'autofocus', 'async', 'defer'))
+
+
+class InvalidSelector(ValueError):
+    pass
+
+
+class Node(object):
+    __slots__ = ('tag', 'attrs', 'children', 'parent', 'element_id')
+
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.children = []
+        self.parent = parent
+        self.element_id = None
+
+    def __repr__(self):
+        return '<Node %s %r>' % (self.tag, self.attrs)
+
+    def elements(self):
+        return [child for child in self.children if isinstance(child, Node)]
+
+    def descendants(self):
+        stack = list(reversed(self.elements()))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.elements()))
+
+    def ancestors(self):
+        node = self.parent
+        while node is not None:
+            yield node
+            node = node.parent
+
+    @property
+    def text(self):
+        parts = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node)
+            elif node.tag not in ('script', 'style', 'head', 'title') or node is self:
+                stack.extend(reversed(node.children))
+        return ' '.join(''.join(parts).split())
+
+    @property
+    def classes(self):
+        return self.attrs.get('class', '').split()
+
+    @property
+    def displayed(self):
+        for node in [self] + list(self.ancestors()):
+            if node.tag in ('head', 'script', 'style', 'title') or 'hidden' in node.attrs:
+                return False
+            if node.attrs.get('type') == 'hidden':
+                return False
+            if re.search(r'display\s*:\s*none', node.attrs.get('style', '')):
+                return False
+        return True
+
+    def get_attribute(self, name):
+        """Same result as the getAttribute atom used by W3C drivers."""
+        name = name.lower()
+        if name in BOOLEAN_ATTRIBUTES:
+            return 'true' if name in self.attrs else None
+        if name == 'value' and self.tag == 'textarea':
+            return self.attrs.get('value', self.text)
+        return self.attrs.get(name)
+
+    def get_property(self, name):
+        if name in ('textContent', 'innerText'):
+            return self.text
+        if name == 'tagName':
+            return self.tag.upper()
+        if name == 'className':
+            return self.attrs.get('class', '')
+        if name == 'value':
+            return self.attrs.get('value', self.text if self.tag == 'textarea' else '')
+        if name.lower() in BOOLEAN_ATTRIBUTES:
+            return name.lower() in self.attrs
+        return self.attrs.get(name)
+
+
+class Document(object):
+    """A parsed page."""
+
+    def __init__(self, html):
+        self.source = html
+        self.root = Node('#document')
+        _TreeBuilder(self.root).feed(html)
+
+    @property
+    def title(self):
+        for node in self.root.descendants():
+            if node.tag == 'title':
+                return ' '.join(''.join(c for c in node.children if isinstance(c, str)).split())
+        return ''
+
+    @property
+    def body(self):
+        for node in self.root.descendants():
+            if node.tag == 'body':
+                return node
+        return self.root
+
+    def find_all(self, using, value, context=None):
+        context = context or self.root
+        if using == 'css selector':
+            return select(context, value)
+        if using == 'xpath':
+            return xpath(context, value)
+        if using == 'tag name':
+            return [n for n in context.descendants() if n.tag == value.lower()]
+        if using == 'id':
+            return [n for n in context.descendants() if n.attrs.get('id') == value]
+        if using == 'name':
+            return [n for n in context.descendants() if n.attrs.get('name') == value]
+        if using == 'class name':
+            return [n for n in context.descendants() if value in n.classes]
+        if using == 'link text':
+            return [n for n in context.descendants() if n.tag == 'a' and n.text == value.strip()]
+        if using == 'partial link text':
+            return [n for n in context.descendants() if n.tag == 'a' and value in n.text]
+        raise InvalidSelector('unsupported locator strategy %r' % using)
+
+
+class _TreeBuilder(HTMLParser):
+
+    def __init__(self, root):
+        HTMLParser.__init__(self, convert_charrefs=True)
+        self.current = root
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, {k: ('' if v is None else v) for k, v in attrs}, self.current)
+        self.current.children.append(node)
+        if tag not in VOID_ELEMENTS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        node = Node(tag, {k: ('' if v is None else v) for k, v in attrs}, self.current)
+        self.current.children.append(node)
+
+    def handle_endtag(self, tag):
+        node = self.current
+        while node is not None and node.tag != tag:
+            node = node.parent
+        if node is not None and node.parent is not None:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+
+# CSS selectors
+
+_COMPOUND = re.compile(r'''
+    (?P<tag>\*|[a-zA-Z][\w-]*)?
+    (?P<rest>(?:\#[\w-]+|\.[\w-]+|\[[^\]]+\])*)
+''', re.X)
+_PART = re.compile(r'#([\w-]+)|\.([\w-]+)|\[\s*([\w-]+)\s*(?:([~^$*|]?=)\s*(?:"([^"]*)"|\'([^\']*)\'|([^\]\s]*)))?\s*\]')
+
+
+def _parse_compound(text):
+    match = _COMPOUND.fullmatch(text)
+    if not match or not text:
+        raise InvalidSelector('unsupported css selector %r' % text)
+    tests = []
+    tag = match.group('tag')
+    if tag and tag != '*':
+        tests.append(lambda n, tag=tag.lower(): n.tag == tag)
+    for part in _PART.finditer(match.group('rest')):
+        id_, cls, attr, op, v1, v2, v3 = part.groups()
+        if id_:
+            tests.append(lambda n, v=id_: n.attrs.get('id') == v)
+        elif cls:
+            tests.append(lambda n, v=cls: v in n.classes)
+        else:
+            value = v1 if v1 is not None else v2 if v2 is not None else v3
+            tests.append(_attribute_test(attr.lower(), op, value))
+    return tests
+
+
+def _attribute_test(name, op, value):
+    def test(node):
+        actual = node.attrs.get(name)
+        if actual is None:
+            return False
+        if op is None:
+            return True
+        if op == '=':
+            return actual == value
+        if op == '~=':
+            return value in actual.split()
+        if op == '^=':
+            return actual.startswith(value)
+        if op == '$=':
+            return actual.endswith(value)
+        if op == '*=':
+            return value in actual
+        return actual == value or actual.startswith(value + '-')
+    return test
+
+
+def _matches(node, tests):
+    return all(test(node) for test in tests)
+
+
+def select(context, selector):
+    result = []
+    seen = set()
+    for group in selector.split(','):
+        tokens = re.findall(r'>|(?:[^\s>"\'\[]|\[[^\]]*\])+', group.strip())
+        if not tokens:
+            raise InvalidSelector('empty css selector')
+        steps = []
+        combinator = ' '
+        for token in tokens:
+            if token == '>':
+                combinator = '>'
+                continue
+            steps.append((combinator, _parse_compound(token)))
+            combinator = ' '
+        nodes = [context]
+        for combinator, tests in steps:
+            found = []
+            for node in nodes:
+                candidates = node.elements() if combinator == '>' else node.descendants()
+                found.extend(c for c in candidates if _matches(c, tests))
+            nodes = _unique(found)
+        for node in nodes:
+            if id(node) not in seen:
+                seen.add(id(node))
+                result.append(node)
+    if len(selector.split(',')) > 1:
+        order = {id(n): i for i, n in enumerate(context.descendants())}
+        result.sort(key=lambda n: order.get(id(n), -1))
+    return result
+
+
+def _unique(nodes):
+    seen = set()
+    result = []
+    for node in nodes:
+        if id(node) not in seen:
+            seen.add(id(node))
+            result.append(node)
+    return result
+
+
+# XPath
+
+_STEP = re.compile(r'(?P<axis>[a-z-]+::)?(?P<test>\*|[\w-]+|\.\.|\.|text\(\))(?P<predicates>(?:\[[^\]]*\])*)')
+_PREDICATE = re.compile(r'\[([^\]]*)\]')
+
+
+def _predicate_test(text):
+    text = text.strip()
+    if text.isdigit():
+        return int(text)
+    match = re.fullmatch(r'@([\w-]+)', text)
+    if match:
+        return lambda n: match.group(1) in n.attrs
+    match = re.fullmatch(r'''@([\w-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')''', text)
+    if match:
+        value = match.group(2) if match.group(2) is not None else match.group(3)
+        return lambda n: n.attrs.get(match.group(1)) == value
+    match = re.fullmatch(r'''(?:text\(\)|\.)\s*=\s*(?:"([^"]*)"|'([^']*)')''', text)
+    if match:
+        value = match.group(1) if match.group(1) is not None else match.group(2)
+        return lambda n: n.text == value
+    match = re.fullmatch(r'''contains\(\s*(@[\w-]+|text\(\)|\.)\s*,\s*(?:"([^"]*)"|'([^']*)')\s*\)''', text)
+    if match:
+        source = match.group(1)
+        value = match.group(2) if match.group(2) is not None else match.group(3)
+        if source.startswith('@'):
+            return lambda n: value in n.attrs.get(source[1:], '')
+        return lambda n: value in n.text
+    raise InvalidSelector('unsupported xpath predicate [%s]' % text)
+
+
+def xpath(context, expression):
+    expression = expression.strip()
+    if expression.startswith('/'):
+        while context.parent is not None:
+            context = context.parent
+    elif expression.startswith('.'):
+        expression = expression[1:] if expression.startswith('./') or expression.startswith('.//') else expression
+    nodes = [context]
+    position = 0
+    while position < len(expression):
+        if expression.startswith('//', position):
+            descendant, position = True, position + 2
+        elif expression.startswith('/', position):
+            descendant, position = False, position + 1
+        else:
+            descendant = False
+        match = _STEP.match(expression, position)
+        if not match or match.end() == position:
+            raise InvalidSelector('unsupported xpath %r' % expression)
+        position = match.end()
+        axis = (match.group('axis') or 'child::')[:-2]
+        test = match.group('test')
+        predicates = [_predicate_test(p) for p in _PREDICATE.findall(match.group('predicates'))]
+        if test == 'text()':
+            raise InvalidSelector('xpath must select elements: %r' % expression)
+        found = []
+        for node in nodes:
+            if test == '.':
+                candidates = [node]
+            elif test == '..':
+                candidates = [node.parent] if node.parent is not None else []
+            elif descendant:
+                candidates = list(node.descendants())
+            elif axis == 'child':
+                candidates = node.elements()
+            elif axis == 'descendant':
+                candidates = list(node.descendants())
+            elif axis == 'descendant-or-self':
+                candidates = [node] + list(node.descendants())
+            elif axis == 'ancestor':
+                candidates = list(node.ancestors())
+            elif axis == 'ancestor-or-self':
+                candidates = [node] + list(node.ancestors())
+            elif axis == 'parent':
+                candidates = [node.parent] if node.parent is not None else []
+            elif axis == 'self':
+                candidates = [node]
+            else:
+                raise InvalidSelector('unsupported xpath axis %r' % axis)
+            if test not in ('*', '.', '..'):
+                candidates = [c for c in candidates if c.tag == test.lower()]
+            for predicate in predicates:
+                if isinstance(predicate, int):
+                    candidates = candidates[predicate - 1:predicate]
+                else:
+                    candidates = [c for c in candidates if predicate(c)]
+            found.extend(candidates)
+        nodes = _unique(n for n in found if n.tag != '#document')
+    return nodes
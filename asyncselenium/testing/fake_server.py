@@ -0,0 +1,649 @@
+"""
+An in-process stand-in for a WebDriver server.
+
+It speaks enough of the W3C WebDriver protocol for the async drivers to run
+without a browser: sessions, navigation over a set of in-memory pages, element
+lookup and reads, a handful of scripts, cookies, windows and screenshots.
+Every command can be delayed by a fixed latency plus random jitter, so it can
+be used to measure the overhead and tail latency of the client.
+
+:Usage:
+    async with FakeWebDriverServer(latency=0.002, jitter=0.001) as server:
+        server.add_page('https://example.com/', '<title>Example</title><a id="go">go</a>')
+        driver = await AsyncWebdriver(command_executor=server.url,
+                                      desired_capabilities={'browserName': 'fake'})
+        await driver.get('https://example.com/')
+        print(await driver.title)
+        await driver.quit()
+"""
+
+import asyncio
+import base64
+import json
+import os
+import random
+import struct
+import uuid
+import zlib
+
+from urllib import parse
+
+from aiohttp import web
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webelement import getAttribute_js, isDisplayed_js
+
+from asyncselenium.testing.fake_dom import Document, InvalidSelector, Node
+
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+BLANK_PAGE = '<html><head><title></title></head><body></body></html>'
+
+GET_ATTRIBUTE_SCRIPT = "return (%s).apply(null, arguments);" % getAttribute_js
+IS_DISPLAYED_SCRIPT = "return (%s).apply(null, arguments);" % isDisplayed_js
+
+ERROR_STATUS = {
+    'invalid argument': 400,
+    'invalid selector': 400,
+    'invalid session id': 404,
+    'no such element': 404,
+    'no such window': 404,
+    'no such frame': 404,
+    'no such cookie': 404,
+    'no such alert': 404,
+    'stale element reference': 404,
+    'unknown command': 404,
+    'javascript error': 500,
+    'session not created': 500,
+    'unknown error': 500,
+}
+
+
+class FakeDriverError(Exception):
+
+    def __init__(self, error, message=''):
+        Exception.__init__(self, message)
+        self.error = error
+        self.message = message
+
+
+def png_image(width, height, rgb=(255, 255, 255), noise=False):
+    """
+    Encodes a solid colour RGB PNG, or random pixels when ``noise`` is set
+    which gives screenshots the size of a busy real page.
+    """
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data +
+                struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+    if noise:
+        pixels = b''.join(b'\x00' + os.urandom(width * 3) for _ in range(height))
+    else:
+        pixels = (b'\x00' + bytes(rgb) * width) * height
+    return (b'\x89PNG\r\n\x1a\n' +
+            chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(pixels, 1 if noise else 6)) +
+            chunk(b'IEND', b''))
+
+
+class Window(object):
+
+    def __init__(self, handle, name=''):
+        self.handle = handle
+        self.name = name
+        self.history = []
+        self.index = -1
+        self.document = Document(BLANK_PAGE)
+
+    @property
+    def url(self):
+        return self.history[self.index] if self.index >= 0 else 'about:blank'
+
+
+class Session(object):
+
+    def __init__(self, server, session_id, capabilities):
+        self.server = server
+        self.session_id = session_id
+        self.capabilities = capabilities
+        self.windows = {}
+        self.cookies = {}
+        self.local_storage = {}
+        self.session_storage = {}
+        self.logs = []
+        self.elements = {}
+        self.timeouts = {'implicit': 0, 'pageLoad': 300000, 'script': 30000}
+        self.window = self.open_window()
+
+    def open_window(self, name=''):
+        handle = 'CDwindow-%s' % uuid.uuid4().hex[:16].upper()
+        window = self.windows[handle] = Window(handle, name)
+        return window
+
+    def navigate(self, url, push=True):
+        window = self.window
+        if push:
+            del window.history[window.index + 1:]
+            window.history.append(url)
+            window.index = len(window.history) - 1
+        window.document = Document(self.server.page_for(url))
+        self.elements = {k: v for k, v in self.elements.items() if v[0] is not window}
+
+    def append_html(self, html, window=None):
+        """Appends markup to the body of a window's page, like a script adding content."""
+        window = window or self.window
+        body = window.document.body
+        for child in Document(html).body.children:
+            if isinstance(child, Node):
+                child.parent = body
+            body.children.append(child)
+
+    def reference(self, node):
+        if node.element_id is None:
+            node.element_id = uuid.uuid4().hex
+        self.elements[node.element_id] = (self.window, node)
+        return {ELEMENT_KEY: node.element_id}
+
+    def node(self, element_id):
+        try:
+            window, node = self.elements[element_id]
+        except KeyError:
+            raise FakeDriverError('stale element reference', 'unknown element %s' % element_id)
+        if window is not self.window or window.document.root not in [node] + list(node.ancestors()):
+            raise FakeDriverError('stale element reference', 'element is not attached to the page')
+        return node
+
+    def unwrap(self, value):
+        if isinstance(value, dict):
+            if ELEMENT_KEY in value:
+                return self.node(value[ELEMENT_KEY])
+            return {k: self.unwrap(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.unwrap(v) for v in value]
+        return value
+
+    def wrap(self, value):
+        if isinstance(value, dict):
+            return {k: self.wrap(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self.wrap(v) for v in value]
+        if hasattr(value, 'element_id'):
+            return self.reference(value)
+        return value
+
+
+class FakeWebDriverServer(object):
+    """
+    Fake WebDriver endpoint served by aiohttp on the running event loop.
+
+    :Args:
+     - host, port - address to listen on, port 0 picks a free port
+     - latency - seconds every command is delayed by
+     - jitter - upper bound of an extra uniformly random delay in seconds
+     - command_latency - dict of selenium Command name to latency, overrides ``latency``
+     - pages - dict of url to html served on navigation
+     - page_factory - callable(url) returning html or None, asked for unknown urls
+     - screenshot_size - (width, height) of the screenshots returned
+     - screenshot_noise - return incompressible screenshots instead of a solid colour
+     - max_sessions - sessions the status endpoint reports as capacity, None for unlimited
+     - seed - seed of the jitter random generator
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+                 command_latency=None, pages=None, page_factory=None,
+                 screenshot_size=(800, 600), screenshot_noise=False, max_sessions=None, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.command_latency = dict(command_latency or {})
+        self.pages = dict(pages or {})
+        self.page_factory = page_factory
+        self.screenshot_size = screenshot_size
+        self.screenshot_noise = screenshot_noise
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self.scripts = []
+        self.command_counts = {}
+        self._random = random.Random(seed)
+        self._screenshots = {}
+        self._runner = None
+
+    @property
+    def url(self):
+        return 'http://%s:%d' % (self.host, self.port)
+
+    async def start(self):
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        for method, path, command, handler in _ROUTES:
+            app.router.add_route(method, path, self._dispatch(command, handler))
+        app.router.add_route('*', '/{tail:.*}', self._unknown)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    def add_page(self, url, html):
+        self.pages[url] = html
+
+    def add_script(self, match, handler):
+        """
+        Teaches the server a script.
+
+        :Args:
+         - match - substring of the script source that selects the handler
+         - handler - callable(session, args) returning the script result,
+           nodes in the result are sent back as element references
+        """
+        self.scripts.append((match, handler))
+
+    def page_for(self, url):
+        html = self.pages.get(url)
+        if html is None and self.page_factory is not None:
+            html = self.page_factory(url)
+        return BLANK_PAGE if html is None else html
+
+    def screenshot(self, rgb=(255, 255, 255), size=None):
+        size = size or self.screenshot_size
+        key = (size, rgb)
+        if key not in self._screenshots:
+            png = png_image(size[0], size[1], rgb, self.screenshot_noise)
+            self._screenshots[key] = base64.b64encode(png).decode('ascii')
+        return self._screenshots[key]
+
+    def _delay(self, command):
+        delay = self.command_latency.get(command, self.latency)
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+        return delay
+
+    def _dispatch(self, command, handler):
+        async def dispatch(request):
+            self.command_counts[command] = self.command_counts.get(command, 0) + 1
+            delay = self._delay(command)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                body = {}
+                if request.can_read_body:
+                    text = await request.text()
+                    body = json.loads(text) if text else {}
+                session = None
+                if 'session_id' in request.match_info:
+                    session = self.sessions.get(request.match_info['session_id'])
+                    if session is None:
+                        raise FakeDriverError('invalid session id', 'session deleted or never created')
+                    if session.window is None and command not in _WINDOWLESS_COMMANDS:
+                        raise FakeDriverError('no such window', 'current window was closed')
+                value = handler(self, session, request.match_info, body)
+            except FakeDriverError as e:
+                return _error(e.error, e.message)
+            except InvalidSelector as e:
+                return _error('invalid selector', str(e))
+            if isinstance(value, web.StreamResponse):
+                return value
+            return web.json_response({'value': value})
+        return dispatch
+
+    async def _unknown(self, request):
+        return _error('unknown command', '%s %s' % (request.method, request.path))
+
+
+def _error(error, message=''):
+    return web.json_response({'value': {'error': error, 'message': message, 'stacktrace': ''}},
+                             status=ERROR_STATUS.get(error, 500))
+
+
+# command handlers, called as handler(server, session, match_info, body)
+
+def _status(server, session, match, body):
+    free = None if server.max_sessions is None else server.max_sessions - len(server.sessions)
+    return {'ready': free is None or free > 0,
+            'message': 'fake webdriver ready',
+            'sessions': len(server.sessions),
+            'maxSessions': server.max_sessions}
+
+
+def _new_session(server, session, match, body):
+    if server.max_sessions is not None and len(server.sessions) >= server.max_sessions:
+        raise FakeDriverError('session not created', 'maximum number of sessions reached')
+    requested = body.get('capabilities', {}).get('alwaysMatch') or body.get('desiredCapabilities') or {}
+    capabilities = dict(requested)
+    capabilities.setdefault('browserName', 'fake')
+    capabilities.setdefault('browserVersion', '1.0')
+    session_id = uuid.uuid4().hex
+    server.sessions[session_id] = Session(server, session_id, capabilities)
+    return {'sessionId': session_id, 'capabilities': capabilities}
+
+
+def _delete_session(server, session, match, body):
+    server.sessions.pop(session.session_id, None)
+
+
+def _get(server, session, match, body):
+    url = body.get('url')
+    if not url:
+        raise FakeDriverError('invalid argument', 'missing url')
+    session.navigate(url)
+
+
+def _current_url(server, session, match, body):
+    return session.window.url
+
+
+def _title(server, session, match, body):
+    return session.window.document.title
+
+
+def _source(server, session, match, body):
+    return session.window.document.source
+
+
+def _back(server, session, match, body):
+    window = session.window
+    if window.index > 0:
+        window.index -= 1
+        session.navigate(window.url, push=False)
+
+
+def _forward(server, session, match, body):
+    window = session.window
+    if window.index < len(window.history) - 1:
+        window.index += 1
+        session.navigate(window.url, push=False)
+
+
+def _refresh(server, session, match, body):
+    if session.window.index >= 0:
+        session.navigate(session.window.url, push=False)
+
+
+def _find(session, body, context=None):
+    return session.window.document.find_all(body.get('using'), body.get('value', ''), context)
+
+
+def _find_element(server, session, match, body):
+    context = session.node(match['element_id']) if 'element_id' in match else None
+    nodes = _find(session, body, context)
+    if not nodes:
+        raise FakeDriverError('no such element', 'Unable to locate element: %s' % body.get('value'))
+    return session.reference(nodes[0])
+
+
+def _find_elements(server, session, match, body):
+    context = session.node(match['element_id']) if 'element_id' in match else None
+    return [session.reference(node) for node in _find(session, body, context)]
+
+
+def _element_text(server, session, match, body):
+    node = session.node(match['element_id'])
+    return node.text if node.displayed else ''
+
+
+def _element_tag_name(server, session, match, body):
+    return session.node(match['element_id']).tag
+
+
+def _element_attribute(server, session, match, body):
+    return session.node(match['element_id']).get_attribute(match['name'])
+
+
+def _element_property(server, session, match, body):
+    return session.node(match['element_id']).get_property(match['name'])
+
+
+def _element_rect(server, session, match, body):
+    node = session.node(match['element_id'])
+    order = 0
+    for order, other in enumerate(session.window.document.root.descendants()):
+        if other is node:
+            break
+    return {'x': 8, 'y': 8 + 20 * order, 'width': 200, 'height': 20}
+
+
+def _element_enabled(server, session, match, body):
+    return 'disabled' not in session.node(match['element_id']).attrs
+
+
+def _element_selected(server, session, match, body):
+    attrs = session.node(match['element_id']).attrs
+    return 'selected' in attrs or 'checked' in attrs
+
+
+def _element_displayed(server, session, match, body):
+    return session.node(match['element_id']).displayed
+
+
+def _element_click(server, session, match, body):
+    node = session.node(match['element_id'])
+    if node.tag == 'a' and node.attrs.get('href'):
+        session.navigate(parse.urljoin(session.window.url, node.attrs['href']))
+    elif node.tag == 'input' and node.attrs.get('type') in ('checkbox', 'radio'):
+        if 'checked' in node.attrs and node.attrs.get('type') == 'checkbox':
+            del node.attrs['checked']
+        else:
+            node.attrs['checked'] = ''
+
+
+def _element_clear(server, session, match, body):
+    session.node(match['element_id']).attrs['value'] = ''
+
+
+def _element_send_keys(server, session, match, body):
+    node = session.node(match['element_id'])
+    text = body.get('text')
+    if text is None:
+        text = ''.join(body.get('value', []))
+    node.attrs['value'] = node.get_property('value') + text
+
+
+def _element_screenshot(server, session, match, body):
+    session.node(match['element_id'])
+    return server.screenshot(size=(200, 20))
+
+
+def _screenshot(server, session, match, body):
+    return server.screenshot(_page_colour(session.window.url))
+
+
+def _page_colour(url):
+    digest = zlib.crc32(url.encode('utf-8'))
+    return (digest & 0xff, (digest >> 8) & 0xff, (digest >> 16) & 0xff)
+
+
+def _execute_script(server, session, match, body):
+    script = body.get('script', '')
+    args = session.unwrap(body.get('args', []))
+    for text, handler in server.scripts:
+        if text in script:
+            return session.wrap(handler(session, args))
+    return session.wrap(_builtin_script(session, script.strip(), args))
+
+
+def _builtin_script(session, script, args):
+    document = session.window.document
+    if script == GET_ATTRIBUTE_SCRIPT:
+        return args[0].get_attribute(args[1])
+    if script == IS_DISPLAYED_SCRIPT:
+        return args[0].displayed
+    if script in ('return document.title', 'return document.title;'):
+        return document.title
+    if script in ('return window.name', 'return window.name;'):
+        return session.window.name
+    if script.startswith('window.name'):
+        session.window.name = args[0] if args else script.split('=', 1)[1].strip(' ;\'"')
+        return None
+    if script in ('return document.readyState', 'return document.readyState;'):
+        return 'complete'
+    if script in ('return navigator.userAgent', 'return navigator.userAgent;'):
+        return 'Mozilla/5.0 (FakeWebDriver) asyncselenium'
+    if script in ('return location.href', 'return window.location.href', 'return document.URL'):
+        return session.window.url
+    if script == 'return arguments[0][arguments[1]]':
+        return args[0].get_property(args[1])
+    if script.startswith('arguments[0].scrollIntoView'):
+        return {'x': 8, 'y': 8, 'width': 200, 'height': 20, 'top': 8, 'left': 8}
+    if script.startswith('return arguments[0]'):
+        return args[0] if args else None
+    return None
+
+
+def _cookies(server, session, match, body):
+    return list(session.cookies.values())
+
+
+def _cookie(server, session, match, body):
+    cookie = session.cookies.get(match['name'])
+    if cookie is None:
+        raise FakeDriverError('no such cookie', 'no cookie named %s' % match['name'])
+    return cookie
+
+
+def _add_cookie(server, session, match, body):
+    cookie = dict(body.get('cookie') or {})
+    if 'name' not in cookie or 'value' not in cookie:
+        raise FakeDriverError('invalid argument', 'cookie needs a name and a value')
+    cookie.setdefault('path', '/')
+    cookie.setdefault('domain', parse.urlparse(session.window.url).hostname or '')
+    cookie.setdefault('secure', False)
+    cookie.setdefault('httpOnly', False)
+    session.cookies[cookie['name']] = cookie
+
+
+def _delete_cookie(server, session, match, body):
+    session.cookies.pop(match['name'], None)
+
+
+def _delete_cookies(server, session, match, body):
+    session.cookies.clear()
+
+
+def _window_handle(server, session, match, body):
+    if session.window is None:
+        raise FakeDriverError('no such window', 'current window was closed')
+    return session.window.handle
+
+
+def _window_handles(server, session, match, body):
+    return list(session.windows)
+
+
+def _switch_window(server, session, match, body):
+    handle = body.get('handle') or body.get('name')
+    window = session.windows.get(handle)
+    if window is None:
+        raise FakeDriverError('no such window', 'no window with handle %s' % handle)
+    session.window = window
+
+
+def _close_window(server, session, match, body):
+    if session.window is None:
+        raise FakeDriverError('no such window', 'current window was closed')
+    del session.windows[session.window.handle]
+    session.window = None
+    if not session.windows:
+        server.sessions.pop(session.session_id, None)
+    return list(session.windows)
+
+
+def _new_window(server, session, match, body):
+    window = session.open_window()
+    return {'handle': window.handle, 'type': body.get('type', 'tab')}
+
+
+def _window_rect(server, session, match, body):
+    return {'x': 0, 'y': 0, 'width': server.screenshot_size[0], 'height': server.screenshot_size[1]}
+
+
+def _timeouts(server, session, match, body):
+    session.timeouts.update({k: v for k, v in body.items() if k in session.timeouts})
+
+
+def _switch_frame(server, session, match, body):
+    return None
+
+
+def _no_alert(server, session, match, body):
+    raise FakeDriverError('no such alert', 'no such alert')
+
+
+def _get_log(server, session, match, body):
+    # reading a log clears its entries, those of other types are kept
+    log_type = body.get('type')
+    entries = [entry for entry in session.logs if entry.get('type', 'browser') == log_type]
+    session.logs = [entry for entry in session.logs if entry.get('type', 'browser') != log_type]
+    return entries
+
+
+def _log_types(server, session, match, body):
+    return ['browser', 'driver']
+
+
+# commands still allowed once the current window is closed
+_WINDOWLESS_COMMANDS = frozenset((Command.QUIT, Command.SWITCH_TO_WINDOW,
+                                  Command.W3C_GET_WINDOW_HANDLES, 'newWindow'))
+
+_S = '/session/{session_id}'
+_E = _S + '/element/{element_id}'
+
+_ROUTES = [
+    ('GET', '/status', Command.STATUS, _status),
+    ('POST', '/session', Command.NEW_SESSION, _new_session),
+    ('DELETE', _S, Command.QUIT, _delete_session),
+    ('POST', _S + '/url', Command.GET, _get),
+    ('GET', _S + '/url', Command.GET_CURRENT_URL, _current_url),
+    ('GET', _S + '/title', Command.GET_TITLE, _title),
+    ('GET', _S + '/source', Command.GET_PAGE_SOURCE, _source),
+    ('POST', _S + '/back', Command.GO_BACK, _back),
+    ('POST', _S + '/forward', Command.GO_FORWARD, _forward),
+    ('POST', _S + '/refresh', Command.REFRESH, _refresh),
+    ('POST', _S + '/element', Command.FIND_ELEMENT, _find_element),
+    ('POST', _S + '/elements', Command.FIND_ELEMENTS, _find_elements),
+    ('POST', _E + '/element', Command.FIND_CHILD_ELEMENT, _find_element),
+    ('POST', _E + '/elements', Command.FIND_CHILD_ELEMENTS, _find_elements),
+    ('GET', _E + '/text', Command.GET_ELEMENT_TEXT, _element_text),
+    ('GET', _E + '/name', Command.GET_ELEMENT_TAG_NAME, _element_tag_name),
+    ('GET', _E + '/attribute/{name}', Command.GET_ELEMENT_ATTRIBUTE, _element_attribute),
+    ('GET', _E + '/property/{name}', Command.GET_ELEMENT_PROPERTY, _element_property),
+    ('GET', _E + '/rect', Command.GET_ELEMENT_RECT, _element_rect),
+    ('GET', _E + '/enabled', Command.IS_ELEMENT_ENABLED, _element_enabled),
+    ('GET', _E + '/selected', Command.IS_ELEMENT_SELECTED, _element_selected),
+    ('GET', _E + '/displayed', Command.IS_ELEMENT_DISPLAYED, _element_displayed),
+    ('POST', _E + '/click', Command.CLICK_ELEMENT, _element_click),
+    ('POST', _E + '/clear', Command.CLEAR_ELEMENT, _element_clear),
+    ('POST', _E + '/value', Command.SEND_KEYS_TO_ELEMENT, _element_send_keys),
+    ('GET', _E + '/screenshot', Command.ELEMENT_SCREENSHOT, _element_screenshot),
+    ('GET', _S + '/screenshot', Command.SCREENSHOT, _screenshot),
+    ('POST', _S + '/execute/sync', Command.W3C_EXECUTE_SCRIPT, _execute_script),
+    ('POST', _S + '/execute/async', Command.W3C_EXECUTE_SCRIPT_ASYNC, _execute_script),
+    ('GET', _S + '/cookie', Command.GET_ALL_COOKIES, _cookies),
+    ('GET', _S + '/cookie/{name}', Command.GET_COOKIE, _cookie),
+    ('POST', _S + '/cookie', Command.ADD_COOKIE, _add_cookie),
+    ('DELETE', _S + '/cookie/{name}', Command.DELETE_COOKIE, _delete_cookie),
+    ('DELETE', _S + '/cookie', Command.DELETE_ALL_COOKIES, _delete_cookies),
+    ('GET', _S + '/window', Command.W3C_GET_CURRENT_WINDOW_HANDLE, _window_handle),
+    ('POST', _S + '/window', Command.SWITCH_TO_WINDOW, _switch_window),
+    ('DELETE', _S + '/window', Command.CLOSE, _close_window),
+    ('GET', _S + '/window/handles', Command.W3C_GET_WINDOW_HANDLES, _window_handles),
+    ('POST', _S + '/window/new', 'newWindow', _new_window),
+    ('GET', _S + '/window/rect', Command.GET_WINDOW_RECT, _window_rect),
+    ('POST', _S + '/window/rect', Command.SET_WINDOW_RECT, _window_rect),
+    ('POST', _S + '/timeouts', Command.SET_TIMEOUTS, _timeouts),
+    ('POST', _S + '/frame', Command.SWITCH_TO_FRAME, _switch_frame),
+    ('POST', _S + '/frame/parent', Command.SWITCH_TO_PARENT_FRAME, _switch_frame),
+    ('GET', _S + '/alert/text', Command.W3C_GET_ALERT_TEXT, _no_alert),
+    ('POST', _S + '/alert/accept', Command.W3C_ACCEPT_ALERT, _no_alert),
+    ('POST', _S + '/alert/dismiss', Command.W3C_DISMISS_ALERT, _no_alert),
+    ('POST', _S + '/log', Command.GET_LOG, _get_log),
+    ('GET', _S + '/log/types', Command.GET_AVAILABLE_LOG_TYPES, _log_types),
+]
@@ -0,0 +1,202 @@
+"""
+Chrome DevTools protocol client over the browser's websocket.
+
+Unlike execute_cdp_cmd, which goes through chromedriver and only reaches the
+current tab, the websocket carries commands to any target concurrently and
+delivers events.
+
+:Usage:
+    cdp = await driver.cdp()
+    target = await cdp.send('Target.createTarget', {'url': 'about:blank'})
+    page = await cdp.attach(target['targetId'])
+    page.on('Page.loadEventFired', lambda params: print('loaded'))
+    await page.send('Page.enable')
+    await page.send('Page.navigate', {'url': 'https://www.baidu.com'})
+"""
+
+import asyncio
+import inspect
+import itertools
+import json
+import logging
+
+import aiohttp
+
+from selenium.common.exceptions import WebDriverException
+
+LOGGER = logging.getLogger(__name__)
+
+
+class CDPError(WebDriverException):
+    """
+    Thrown when a DevTools command fails or its connection is closed.
+    """
+    pass
+
+
+class CDPConnection(object):
+    """
+    A websocket connection to the browser, commands of every attached
+    target share it in flat session mode.
+
+    :Args:
+     - url - webSocketDebuggerUrl of the browser or of a single target
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._listeners = {}
+        self._http = None
+        self._ws = None
+        self._reader = None
+
+    @property
+    def closed(self):
+        return self._ws is None or self._ws.closed
+
+    async def connect(self):
+        self._http = aiohttp.ClientSession()
+        try:
+            # screenshots and page sources exceed the default 4MB message limit
+            self._ws = await self._http.ws_connect(self.url, max_msg_size=0)
+        except BaseException:
+            await self._http.close()
+            raise
+        self._reader = asyncio.ensure_future(self._read())
+        return self
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+        if self._http is not None:
+            await self._http.close()
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def send(self, method, params=None, session_id=None, timeout=None):
+        """
+        Sends a command and waits for its result.
+
+        :Args:
+         - session_id - flat session of an attached target, the browser if None
+         - timeout - seconds to wait for the result, unbounded if None
+        """
+        if self.closed:
+            raise CDPError('DevTools connection %s is closed' % self.url)
+        message_id = next(self._ids)
+        message = {'id': message_id, 'method': method, 'params': params or {}}
+        if session_id is not None:
+            message['sessionId'] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = future
+        try:
+            await self._ws.send_str(json.dumps(message))
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(message_id, None)
+
+    def on(self, event, callback, session_id=None):
+        """
+        Registers ``callback(params)`` for an event, a coroutine function is
+        scheduled as a task. Events of all sessions are delivered if
+        ``session_id`` is None.
+        """
+        self._listeners.setdefault(event, []).append((callback, session_id))
+
+    def off(self, event, callback):
+        listeners = self._listeners.get(event, [])
+        # equality, not identity, each access to a bound method makes a new one
+        listeners[:] = [entry for entry in listeners if entry[0] != callback]
+
+    async def wait_for(self, event, predicate=None, session_id=None, timeout=None):
+        """Returns the params of the next ``event`` accepted by ``predicate``."""
+        future = asyncio.get_running_loop().create_future()
+
+        def accept(params):
+            if not future.done() and (predicate is None or predicate(params)):
+                future.set_result(params)
+        self.on(event, accept, session_id)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self.off(event, accept)
+
+    async def attach(self, target_id):
+        """Attaches to a target and returns its CDPSession."""
+        result = await self.send('Target.attachToTarget', {'targetId': target_id, 'flatten': True})
+        return CDPSession(self, result['sessionId'], target_id)
+
+    async def _read(self):
+        try:
+            async for message in self._ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                data = json.loads(message.data)
+                if 'id' in data:
+                    future = self._pending.get(data['id'])
+                    if future is None or future.done():
+                        continue
+                    if 'error' in data:
+                        error = data['error']
+                        future.set_exception(CDPError('%s (%s)' % (error.get('message'), error.get('code'))))
+                    else:
+                        future.set_result(data.get('result', {}))
+                else:
+                    self._dispatch(data.get('method'), data.get('params', {}), data.get('sessionId'))
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(CDPError('DevTools connection %s closed' % self.url))
+
+    def _dispatch(self, event, params, session_id):
+        for callback, wanted in list(self._listeners.get(event, ())):
+            if wanted is not None and wanted != session_id:
+                continue
+            try:
+                result = callback(params)
+                if inspect.isawaitable(result):
+                    asyncio.ensure_future(result)
+            except Exception:
+                LOGGER.exception('DevTools listener %r of %s failed', callback, event)
+
+
+class CDPSession(object):
+    """A target attached to a CDPConnection."""
+
+    def __init__(self, connection, session_id, target_id=None):
+        self.connection = connection
+        self.session_id = session_id
+        self.target_id = target_id
+
+    def __repr__(self):
+        return '<CDPSession %s target=%s>' % (self.session_id, self.target_id)
+
+    async def send(self, method, params=None, timeout=None):
+        return await self.connection.send(method, params, self.session_id, timeout)
+
+    def on(self, event, callback):
+        self.connection.on(event, callback, self.session_id)
+
+    def off(self, event, callback):
+        self.connection.off(event, callback)
+
+    async def wait_for(self, event, predicate=None, timeout=None):
+        return await self.connection.wait_for(event, predicate, self.session_id, timeout)
+
+    async def detach(self):
+        await self.connection.send('Target.detachFromTarget', {'sessionId': self.session_id})
+
+
+async def browser_websocket_url(debugger_address):
+    """Looks up the browser's webSocketDebuggerUrl from its ``host:port`` debugger address."""
+    async with aiohttp.ClientSession() as http:
+        async with http.get('http://%s/json/version' % debugger_address) as resp:
+            return (await resp.json(content_type=None))['webSocketDebuggerUrl']
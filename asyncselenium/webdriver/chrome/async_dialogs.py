@@ -0,0 +1,136 @@
+"""
+JavaScript dialogs followed over DevTools events instead of polling.
+
+:Usage:
+    watcher = await driver.watch_dialogs(policy='accept')
+    await (await driver.find_element_by_id('delete')).click()
+    dialog = watcher.history[-1]
+"""
+
+import asyncio
+import collections
+import inspect
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+Dialog = collections.namedtuple('Dialog', 'type message url default_prompt')
+Dialog.__doc__ = """A dialog reported by Page.javascriptDialogOpening."""
+
+ACCEPT = 'accept'
+DISMISS = 'dismiss'
+
+
+class DialogWatcher(object):
+    """
+    Tracks the dialogs of one page.
+
+    :Args:
+     - session - CDPSession of the page
+     - policy - None to leave dialogs open, 'accept', 'dismiss', or a
+       callable(dialog) returning True to accept, False to dismiss and None
+       to leave it open, it may be a coroutine function
+     - prompt_text - text entered in prompts accepted by the policy
+     - history_size - number of dialogs kept in ``history``
+     - handle - window handle of the page, conditions only trust the
+       watcher while it is the driver's current window
+    """
+
+    def __init__(self, session, policy=None, prompt_text=None, history_size=50, handle=None):
+        self.session = session
+        self.handle = handle
+        self.policy = policy
+        self.prompt_text = prompt_text
+        self.current = None
+        self.history = collections.deque(maxlen=history_size)
+        self._waiters = []
+        self._changes = []
+
+    async def start(self):
+        self.session.on('Page.javascriptDialogOpening', self._opened)
+        self.session.on('Page.javascriptDialogClosed', self._closed)
+        await self.session.send('Page.enable')
+        return self
+
+    def stop(self):
+        self.session.off('Page.javascriptDialogOpening', self._opened)
+        self.session.off('Page.javascriptDialogClosed', self._closed)
+        for waiter in self._waiters + self._changes:
+            waiter.cancel()
+        self._waiters = []
+        self._changes = []
+
+    def _changed(self):
+        changes, self._changes = self._changes, []
+        for change in changes:
+            if not change.done():
+                change.set_result(self.current)
+
+    def _opened(self, params):
+        dialog = Dialog(params.get('type'), params.get('message'), params.get('url'),
+                        params.get('defaultPrompt'))
+        self.current = dialog
+        self.history.append(dialog)
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(dialog)
+        self._changed()
+        if self.policy is not None:
+            asyncio.ensure_future(self._apply_policy(dialog))
+
+    def _closed(self, params):
+        self.current = None
+        self._changed()
+
+    async def _apply_policy(self, dialog):
+        if self.policy == ACCEPT:
+            decision = True
+        elif self.policy == DISMISS:
+            decision = False
+        else:
+            decision = self.policy(dialog)
+            if inspect.isawaitable(decision):
+                decision = await decision
+        if decision is None:
+            return
+        try:
+            await self._handle(bool(decision), self.prompt_text if decision else None)
+        except Exception:
+            LOGGER.exception('handling the %s dialog %r failed', dialog.type, dialog.message)
+
+    async def _handle(self, accept, prompt_text=None):
+        params = {'accept': accept}
+        if prompt_text is not None:
+            params['promptText'] = prompt_text
+        await self.session.send('Page.handleJavaScriptDialog', params)
+        self.current = None
+        self._changed()
+
+    async def accept(self, prompt_text=None):
+        await self._handle(True, prompt_text)
+
+    async def dismiss(self):
+        await self._handle(False)
+
+    async def wait(self, timeout=None):
+        """Returns the open dialog, waiting for the next one if there is none."""
+        if self.current is not None:
+            return self.current
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    async def changed(self, timeout=None):
+        """Waits for the next dialog to open or close, returns the open dialog or None."""
+        change = asyncio.get_running_loop().create_future()
+        self._changes.append(change)
+        try:
+            return await asyncio.wait_for(change, timeout)
+        finally:
+            if change in self._changes:
+                self._changes.remove(change)
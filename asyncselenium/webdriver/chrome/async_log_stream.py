@@ -0,0 +1,72 @@
+"""
+Browser log of a Chrome page pushed by DevTools events.
+"""
+
+import time
+
+from asyncselenium.webdriver.remote.log_stream import LogStream
+
+# console API call types and Log domain levels to get_log levels
+CONSOLE_LEVELS = {'debug': 'DEBUG', 'error': 'SEVERE', 'assert': 'SEVERE', 'warning': 'WARNING'}
+LOG_LEVELS = {'verbose': 'DEBUG', 'info': 'INFO', 'warning': 'WARNING', 'error': 'SEVERE'}
+
+
+def _remote_object_text(value):
+    if 'value' in value:
+        return str(value['value'])
+    return value.get('unserializableValue') or value.get('description') or value.get('type', '')
+
+
+def console_entry(params):
+    """Converts Runtime.consoleAPICalled params to a get_log entry."""
+    frames = (params.get('stackTrace') or {}).get('callFrames') or []
+    entry = {'level': CONSOLE_LEVELS.get(params.get('type'), 'INFO'),
+             'message': ' '.join(_remote_object_text(arg) for arg in params.get('args', ())),
+             'source': 'console-api',
+             'timestamp': int(params.get('timestamp', time.time() * 1000))}
+    if frames:
+        entry['url'] = frames[0].get('url')
+    return entry
+
+
+def log_entry(params):
+    """Converts Log.entryAdded params to a get_log entry."""
+    entry = params.get('entry', {})
+    result = {'level': LOG_LEVELS.get(entry.get('level'), 'INFO'),
+              'message': entry.get('text', ''),
+              'source': entry.get('source'),
+              'timestamp': int(entry.get('timestamp', time.time() * 1000))}
+    if entry.get('url'):
+        result['url'] = entry['url']
+    return result
+
+
+class CDPLogStream(LogStream):
+    """
+    Streams the browser log of the driver's current window from
+    Runtime.consoleAPICalled and Log.entryAdded, entries arrive as they
+    are logged and nothing is polled.
+    """
+
+    def __init__(self, driver, max_size=1000):
+        super().__init__(max_size)
+        self.driver = driver
+        self.session = None
+
+    async def _open(self):
+        self.session = await self.driver.current_target()
+        self.session.on('Runtime.consoleAPICalled', self._console)
+        self.session.on('Log.entryAdded', self._log)
+        await self.session.send('Runtime.enable')
+        await self.session.send('Log.enable')
+
+    async def _close(self):
+        self.session.off('Runtime.consoleAPICalled', self._console)
+        self.session.off('Log.entryAdded', self._log)
+        await self.session.detach()
+
+    def _console(self, params):
+        self.push(console_entry(params))
+
+    def _log(self, params):
+        self.push(log_entry(params))
@@ -0,0 +1,69 @@
+"""
+Navigations ended early over DevTools, see remote.navigation.
+"""
+
+import asyncio
+
+from selenium.common.exceptions import TimeoutException
+
+from asyncselenium.webdriver.chrome.async_cdp import CDPError
+from asyncselenium.webdriver.remote import navigation
+
+
+async def navigate(page, url, until, timeout=None, idle_time=navigation.IDLE_TIME):
+    """
+    Navigates ``page`` to ``url`` and returns once ``until`` holds.
+
+    The load is stopped on return, on timeout and on cancellation, so
+    chromedriver does not keep waiting for it.
+
+    :Args:
+     - page - CDPSession of the page
+     - until - 'domcontentloaded', 'networkidle' or a (By, value) locator
+       remote.navigation.locator_expression() supports
+    """
+    loop = asyncio.get_running_loop()
+    tracker = navigation.NetworkIdleTracker(loop.time)
+    tracker.attach(page)
+    # listen before navigating, the event can beat the command's result
+    dom_ready = asyncio.ensure_future(page.wait_for('Page.domContentEventFired'))
+    try:
+        await asyncio.gather(page.send('Page.enable'), page.send('Network.enable'))
+        result = await page.send('Page.navigate', {'url': url})
+        if result.get('errorText'):
+            raise CDPError('navigation to %s failed: %s' % (url, result['errorText']))
+        try:
+            await asyncio.wait_for(_reached(page, until, idle_time, dom_ready, tracker), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutException('%s was not reached on %s within %ss' % (until, url, timeout))
+    finally:
+        dom_ready.cancel()
+        tracker.detach(page)
+        await asyncio.shield(_stop(page))
+
+
+async def _reached(page, until, idle_time, dom_ready, tracker):
+    if until == navigation.DOM_CONTENT_LOADED:
+        await asyncio.shield(dom_ready)
+        return
+    expression = None if until == navigation.NETWORK_IDLE else navigation.locator_expression(*until)
+    while True:
+        if expression is None:
+            if dom_ready.done() and tracker.idle(idle_time):
+                return
+        else:
+            try:
+                result = await page.send('Runtime.evaluate', {'expression': expression, 'returnByValue': True})
+                if result.get('result', {}).get('value') is True:
+                    return
+            except CDPError:
+                # no document yet, or it was replaced while the expression ran
+                pass
+        await asyncio.sleep(navigation.POLL_FREQUENCY)
+
+
+async def _stop(page):
+    try:
+        await page.send('Page.stopLoading')
+    finally:
+        await page.detach()
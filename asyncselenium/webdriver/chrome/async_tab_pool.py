@@ -0,0 +1,246 @@
+"""
+Pool of tabs in one browser shared by many light tasks.
+
+:Usage:
+    async with driver.tab_pool(size=8) as pool:
+        titles = await pool.map(scrape, urls)
+
+    async def scrape(tab, url):
+        await tab.get(url)
+        return await tab.title
+"""
+
+import asyncio
+
+from selenium.common.exceptions import InvalidArgumentException, JavascriptException, TimeoutException
+
+from asyncselenium.webdriver.chrome.async_cdp import CDPError
+from asyncselenium.webdriver.remote import navigation
+
+PAGE_SOURCE_SCRIPT = 'document.documentElement.outerHTML'
+
+# document.readyState values meaning the event of wait_until has fired
+READY_STATES = {'load': ('complete',), 'domcontentloaded': ('interactive', 'complete')}
+
+
+class CDPTab(object):
+    """
+    A tab driven over its own DevTools session.
+
+    Tabs of a pool work concurrently, commands to one tab do not wait for
+    another one or change the driver's current window.
+    """
+
+    def __init__(self, session, load_timeout=30):
+        self.session = session
+        self.target_id = session.target_id
+        self.load_timeout = load_timeout
+
+    def __repr__(self):
+        return '<CDPTab %s>' % self.target_id
+
+    async def setup(self):
+        await asyncio.gather(self.session.send('Page.enable'), self.session.send('Runtime.enable'))
+        return self
+
+    async def get(self, url, wait_until='load'):
+        """
+        Navigates to ``url`` and waits for its load event.
+
+        :Args:
+         - wait_until - 'load', 'domcontentloaded' or None not to wait
+        """
+        event = {'load': 'Page.loadEventFired',
+                 'domcontentloaded': 'Page.domContentEventFired'}.get(wait_until)
+        loaded = None
+        if event is not None:
+            # listen before navigating, the event can beat the command's result
+            loaded = asyncio.ensure_future(self.session.wait_for(event))
+        try:
+            result = await self.session.send('Page.navigate', {'url': url})
+            if result.get('errorText'):
+                raise CDPError('navigation to %s failed: %s' % (url, result['errorText']))
+            if loaded is not None:
+                try:
+                    await asyncio.wait_for(asyncio.shield(loaded), self.load_timeout)
+                except asyncio.TimeoutError:
+                    raise TimeoutException('%s did not load within %ss' % (url, self.load_timeout))
+        finally:
+            if loaded is not None and not loaded.done():
+                loaded.cancel()
+
+    async def execute_script(self, expression, await_promise=True):
+        """Evaluates a JavaScript expression in the tab and returns its value."""
+        result = await self.session.send('Runtime.evaluate', {
+            'expression': expression, 'returnByValue': True, 'awaitPromise': await_promise})
+        if 'exceptionDetails' in result:
+            details = result['exceptionDetails']
+            raise JavascriptException(details.get('exception', {}).get('description') or details.get('text'))
+        return result.get('result', {}).get('value')
+
+    @property
+    async def title(self):
+        return await self.execute_script('document.title')
+
+    @property
+    async def current_url(self):
+        return await self.execute_script('location.href')
+
+    @property
+    async def page_source(self):
+        return await self.execute_script(PAGE_SOURCE_SCRIPT)
+
+    async def close(self):
+        await self.session.connection.send('Target.closeTarget', {'targetId': self.target_id})
+
+
+class WindowTab(object):
+    """
+    The current window of the WebDriver session used as a tab.
+
+    Its commands go through the driver, so tasks on it run one at a time.
+    """
+
+    def __init__(self, driver, handle, load_timeout=30):
+        self.driver = driver
+        self.handle = handle
+        self.load_timeout = load_timeout
+
+    def __repr__(self):
+        return '<WindowTab %s>' % self.handle
+
+    async def get(self, url, wait_until='load'):
+        """
+        Navigates to ``url`` and waits for its load event.
+
+        The navigation command returns as the page load strategy of the
+        session says, under 'eager' or 'none' the document's readyState is
+        then polled until the event of ``wait_until`` has fired.
+
+        :Args:
+         - wait_until - 'load', 'domcontentloaded' or None not to wait
+        """
+        await self.driver.get(url)
+        ready_states = READY_STATES.get(wait_until)
+        if ready_states is None or (self.driver.capabilities or {}).get('pageLoadStrategy', 'normal') == 'normal':
+            return
+        loop = asyncio.get_running_loop()
+        end_time = loop.time() + self.load_timeout
+        while await self.driver.execute_script(navigation.READY_STATE_SCRIPT) not in ready_states:
+            if loop.time() >= end_time:
+                raise TimeoutException('%s did not load within %ss' % (url, self.load_timeout))
+            await asyncio.sleep(navigation.POLL_FREQUENCY)
+
+    async def execute_script(self, expression, await_promise=True):
+        return await self.driver.execute_script('return ' + expression)
+
+    @property
+    async def title(self):
+        return await self.driver.title
+
+    @property
+    async def current_url(self):
+        return await self.driver.current_url
+
+    @property
+    async def page_source(self):
+        return await self.driver.page_source
+
+    async def close(self):
+        await self.driver.switch_to.window(self.handle)
+        await self.driver.close()
+
+
+class AsyncTabPool(object):
+    """
+    Runs tasks on ``size`` tabs of one browser.
+
+    With DevTools, ``use_cdp``, each tab is a target with its own session
+    and tasks on different tabs run concurrently. Without it, e.g. on
+    other browsers, the only tab is the current window of the WebDriver
+    session and tasks run on it one after the other, as commands of one
+    session would anyway, hence ``size`` must be 1.
+
+    :Args:
+     - driver - an AsyncChromeDriver, or any async driver if not use_cdp
+     - size - number of tabs
+     - use_cdp - drive the tabs over DevTools
+     - load_timeout - seconds a tab waits for a page load
+    """
+
+    def __init__(self, driver, size=4, use_cdp=True, load_timeout=30):
+        if not use_cdp and size != 1:
+            raise InvalidArgumentException('tasks run one at a time without DevTools, size must be 1, not %r' % size)
+        self.driver = driver
+        self.size = size
+        self.use_cdp = use_cdp
+        self.load_timeout = load_timeout
+        self.tabs = []
+        self._idle = None
+
+    async def start(self):
+        self._idle = asyncio.Queue()
+        if self.use_cdp:
+            cdp = await self.driver.cdp()
+
+            async def open_tab():
+                target = await cdp.send('Target.createTarget', {'url': 'about:blank'})
+                session = await cdp.attach(target['targetId'])
+                return await CDPTab(session, self.load_timeout).setup()
+            self.tabs = list(await asyncio.gather(*[open_tab() for _ in range(self.size)]))
+        else:
+            self.tabs = [WindowTab(self.driver, await self.driver.current_window_handle, self.load_timeout)]
+        for tab in self.tabs:
+            self._idle.put_nowait(tab)
+        return self
+
+    async def close(self):
+        """Closes the tabs opened by the pool, the window tab is the driver's own."""
+        if self.use_cdp:
+            await asyncio.gather(*[tab.close() for tab in self.tabs], return_exceptions=True)
+        self.tabs = []
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def tab(self):
+        """
+        Async context manager lending an idle tab.
+
+        :Usage:
+            async with pool.tab() as tab:
+                await tab.get(url)
+        """
+        return _LentTab(self)
+
+    async def _acquire(self):
+        return await self._idle.get()
+
+    def _release(self, tab):
+        self._idle.put_nowait(tab)
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs ``fn(tab, *args, **kwargs)`` on an idle tab."""
+        async with self.tab() as tab:
+            return await fn(tab, *args, **kwargs)
+
+    async def map(self, fn, items):
+        """Runs ``fn(tab, item)`` for every item, returns the results in order."""
+        return await asyncio.gather(*[self.run(fn, item) for item in items])
+
+
+class _LentTab(object):
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._tab = None
+
+    async def __aenter__(self):
+        self._tab = await self._pool._acquire()
+        return self._tab
+
+    async def __aexit__(self, *args):
+        self._pool._release(self._tab)
@@ -1,16 +1,29 @@
 import warnings
 
 from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.remote import session_state
+from asyncselenium.webdriver.chrome.async_cdp import CDPConnection, browser_websocket_url
+from asyncselenium.webdriver.chrome.async_tab_pool import AsyncTabPool
+from asyncselenium.webdriver.chrome.async_dialogs import DialogWatcher
+from asyncselenium.webdriver.chrome.async_log_stream import CDPLogStream
+from asyncselenium.webdriver.chrome import async_navigation
+from asyncselenium.webdriver.remote.navigation import locator_expression
 from asyncselenium.webdriver.chrome.async_remote_connection import AsyncChromeConnection
+from asyncselenium.webdriver.chrome.presets import apply_preset
+from asyncselenium.webdriver.chrome.memory_watchdog import process_tree_rss
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
 
 class AsyncChromeDriver(AsyncWebdriver):
+    _cdp = None
+    # DialogWatcher of the page watched by watch_dialogs()
+    dialog_watcher = None
 
     async def __init__(self, executable_path="chromedriver", port=0,
                  options=None, service_args=None,
                  desired_capabilities=None, service_log_path=None,
-                 chrome_options=None, keep_alive=True, service: Service=None, session_id=None):
+                 chrome_options=None, keep_alive=True, service: Service=None, session_id=None, preset=None):
         """
         Creates a new instance of the chrome driver.
 
@@ -26,21 +39,14 @@ class AsyncChromeDriver(AsyncWebdriver):
          - service_log_path - Where to log information from the driver.
          - chrome_options - Deprecated argument for options
          - keep_alive - Whether to configure ChromeRemoteConnection to use HTTP keep-alive.
+         - preset - name of an option preset, added to the given options, see create_options
         """
         if chrome_options:
             warnings.warn('use options instead of chrome_options',
                           DeprecationWarning, stacklevel=2)
             options = chrome_options
 
-        if options is None:
-            # desired_capabilities stays as passed in
-            if desired_capabilities is None:
-                desired_capabilities = self.create_options().to_capabilities()
-        else:
-            if desired_capabilities is None:
-                desired_capabilities = options.to_capabilities()
-            else:
-                desired_capabilities.update(options.to_capabilities())
+        desired_capabilities = self._capabilities(options, desired_capabilities, preset)
         self.service = service
         if not service:
             self.service = Service(
@@ -50,15 +56,19 @@ class AsyncChromeDriver(AsyncWebdriver):
                 log_path=service_log_path)
             self.service.start()
 
+        executor = AsyncChromeConnection(
+            remote_server_addr=self.service.service_url,
+            keep_alive=keep_alive)
+        if getattr(self.service, 'process', None) is not None:
+            # fail commands fast instead of waiting on a crashed chromedriver
+            executor.breaker.watch_process(self.service.process)
         try:
             await AsyncWebdriver.__init__(
                 self,
-                command_executor=AsyncChromeConnection(
-                    remote_server_addr=self.service.service_url,
-                    keep_alive=keep_alive),
+                command_executor=executor,
                 desired_capabilities=desired_capabilities, session_id=session_id)
         except Exception:
-            self.quit()
+            await self.quit()
             raise
         self._is_remote = False
 
@@ -87,7 +97,7 @@ class AsyncChromeDriver(AsyncWebdriver):
             'offline': False}
 
         """
-        return await self.execute("getNetworkConditions")['value']
+        return (await self.execute("getNetworkConditions"))['value']
 
     async def set_network_conditions(self, **network_conditions):
         """
@@ -130,13 +140,149 @@ class AsyncChromeDriver(AsyncWebdriver):
             {'base64Encoded': False, 'body': 'response body string'}
 
         """
-        return await self.execute("executeCdpCommand", {'cmd': cmd, 'params': cmd_args})['value']
+        return (await self.execute("executeCdpCommand", {'cmd': cmd, 'params': cmd_args}))['value']
+
+    async def _performance_metrics(self):
+        try:
+            result = await self.execute_cdp_cmd('Performance.getMetrics', {})
+        except WebDriverException:
+            result = None
+        if not result or not result.get('metrics'):
+            # the Performance domain is enabled per target, once is enough
+            await self.execute_cdp_cmd('Performance.enable', {})
+            result = await self.execute_cdp_cmd('Performance.getMetrics', {})
+        return {metric['name']: metric['value'] for metric in result.get('metrics', ())}
+
+    async def _export_cookies(self):
+        # every domain of the profile in one call, not only the current page's
+        cookies = (await self.execute_cdp_cmd('Network.getAllCookies', {}))['cookies']
+        return [session_state.cdp_to_webdriver(cookie) for cookie in cookies]
+
+    async def _import_cookies(self, cookies, origin=None):
+        await self.add_cookies(cookies)
+
+    async def add_cookies(self, cookies):
+        """
+        Adds several cookies with a single Network.setCookies call.
+
+        Unlike add_cookie, cookies of any domain can be set. Cookies without
+        a domain are set for the current url, host-only ones for their host.
+        """
+        if not cookies:
+            return
+        url = None
+        params = []
+        for cookie in cookies:
+            param = session_state.webdriver_to_cdp(cookie)
+            if not param.get('domain') and 'url' not in param:
+                param.pop('domain', None)
+                if url is None:
+                    url = await self.current_url
+                param['url'] = url
+            params.append(param)
+        await self.execute_cdp_cmd('Network.setCookies', {'cookies': params})
+
+    async def cdp(self):
+        """
+        Returns the DevTools websocket connection of the browser, opened on first use.
+
+        The browser must be reachable on the debugger address chromedriver
+        reports, i.e. run on the same host.
+        """
+        if self._cdp is None or self._cdp.closed:
+            address = (self.capabilities.get('goog:chromeOptions') or {}).get('debuggerAddress')
+            if not address:
+                raise WebDriverException('the session reports no goog:chromeOptions debuggerAddress')
+            self._cdp = await CDPConnection(await browser_websocket_url(address)).connect()
+        return self._cdp
+
+    async def memory_usage(self):
+        """
+        Returns the memory used by the session in bytes.
+
+        ``js_heap`` is the JavaScript heap of the current page, ``rss`` the
+        resident memory of chromedriver and the browser, None without psutil
+        or when chromedriver was not started by this driver.
+        """
+        metrics = await self._performance_metrics()
+        process = getattr(self.service, 'process', None)
+        return {'js_heap': int(metrics.get('JSHeapTotalSize', 0)),
+                'rss': process_tree_rss(process.pid) if process is not None else None}
+
+    async def current_target(self):
+        """Attaches to the DevTools target of the current window and returns its CDPSession."""
+        handle = await self.current_window_handle
+        # chromedriver handles are the target id, older versions prefix it
+        target_id = handle[len('CDwindow-'):] if handle.startswith('CDwindow-') else handle
+        return await (await self.cdp()).attach(target_id)
+
+    async def watch_dialogs(self, policy=None, prompt_text=None):
+        """
+        Follows the JavaScript dialogs of the current window over DevTools.
+
+        alert_is_present then answers without a request while no dialog is
+        open and AsyncWebDriverWait wakes up as soon as one opens.
+
+        :Args:
+         - policy - None to leave dialogs open, 'accept', 'dismiss' or a
+           callable(dialog) deciding, see DialogWatcher
+         - prompt_text - text entered in prompts the policy accepts
+
+        :Returns:
+          The DialogWatcher, also kept as ``driver.dialog_watcher``.
+        """
+        await self.unwatch_dialogs()
+        handle = await self.current_window_handle
+        self.dialog_watcher = await DialogWatcher(await self.current_target(), policy, prompt_text,
+                                                  handle=handle).start()
+        return self.dialog_watcher
+
+    async def unwatch_dialogs(self):
+        """Stops the DialogWatcher of watch_dialogs() and detaches its DevTools session."""
+        watcher, self.dialog_watcher = self.dialog_watcher, None
+        if watcher is not None:
+            watcher.stop()
+            await watcher.session.detach()
+
+    async def _get_until(self, url, until, timeout, idle_time):
+        if isinstance(until, tuple) and locator_expression(*until) is None:
+            # e.g. link text, only WebDriver can look it up
+            return await super()._get_until(url, until, timeout, idle_time)
+        await async_navigation.navigate(await self.current_target(), url, until, timeout, idle_time)
+
+    def log_stream(self, log_type='browser', max_size=1000):
+        """
+        Streams a log as an async iterator, the browser log of the current
+        window is pushed over DevTools, other logs poll get_log.
+        """
+        if log_type == 'browser':
+            return CDPLogStream(self, max_size)
+        return super().log_stream(log_type, max_size)
+
+    def tab_pool(self, size=4, use_cdp=True, load_timeout=30):
+        """
+        Returns an AsyncTabPool running tasks on ``size`` tabs of this browser.
+
+        :Usage:
+            async with driver.tab_pool(8) as pool:
+                titles = await pool.map(scrape, urls)
+        """
+        return AsyncTabPool(self, size, use_cdp, load_timeout)
 
     async def quit(self, stop_service=True):
         """
         Closes the browser and shuts down the ChromeDriver executable
         that is started when starting the ChromeDriver
         """
+        if self.dialog_watcher is not None:
+            try:
+                await self.unwatch_dialogs()
+            except Exception:
+                # the browser may be gone already
+                pass
+        if self._cdp is not None:
+            await self._cdp.close()
+            self._cdp = None
         try:
             await AsyncWebdriver.quit(self)
         except Exception:
@@ -149,5 +295,35 @@ class AsyncChromeDriver(AsyncWebdriver):
     def stop_service(self):
         self.service.stop()
 
-    def create_options(self):
-        return Options()
\ No newline at end of file
+    @classmethod
+    def _capabilities(cls, options, desired_capabilities, preset):
+        if preset is not None:
+            options = apply_preset(options if options is not None else Options(), preset)
+        if options is None:
+            # desired_capabilities stays as passed in
+            if desired_capabilities is None:
+                desired_capabilities = cls.create_options().to_capabilities()
+        else:
+            if desired_capabilities is None:
+                desired_capabilities = options.to_capabilities()
+            else:
+                desired_capabilities.update(options.to_capabilities())
+        return desired_capabilities
+
+    @classmethod
+    def create_options(cls, preset=None):
+        """
+        Returns Chrome options, bare or bundling the flags of a preset.
+
+        :Args:
+         - preset - None, 'scrape-fast', 'low-memory' or 'deterministic-render', see presets
+
+        :Usage:
+            options = AsyncChromeDriver.create_options('scrape-fast')
+            options.add_argument('--proxy-server=http://127.0.0.1:8080')
+            driver = await AsyncChromeDriver(options=options)
+        """
+        options = Options()
+        if preset is not None:
+            apply_preset(options, preset)
+        return options
@@ -0,0 +1,252 @@
+"""
+Sessions recycled before their browser's memory grows out of bounds.
+
+Resident memory of the chromedriver and browser processes is read with
+psutil, an optional dependency (``pip install asyncselenium[watchdog]``),
+the JavaScript heap of the current page over DevTools.
+
+:Usage:
+    driver = await RecyclingDriver(lambda: AsyncChromeDriver(preset='scrape-fast'),
+                                   max_rss=2 * 1024 ** 3, max_age=3600).start()
+    for url in urls:
+        await driver.get(url)
+        ...
+    await driver.quit()
+"""
+
+import asyncio
+import inspect
+import logging
+
+try:
+    import psutil
+except ImportError:  # optional dependency
+    psutil = None
+
+LOGGER = logging.getLogger(__name__)
+
+# objects of a driver whose commands go through the proxy as well
+GATED_OBJECTS = frozenset(('switch_to',))
+
+
+def process_tree_rss(pid):
+    """Returns the resident memory of a process and its descendants in bytes, None without psutil."""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return 0
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total
+
+
+class RecyclingDriver(object):
+    """
+    A driver proxy replacing its driver by a fresh one once the browser
+    uses more than ``max_rss`` bytes, the page's JavaScript heap more than
+    ``max_js_heap`` bytes, or the driver is ``max_age`` seconds old.
+
+    Memory is sampled every ``interval`` seconds with the driver's
+    memory_usage(). The swap waits for the commands in flight and holds
+    new ones back until the fresh driver is ready. With ``keep_state`` the
+    cookies, storages and url of the old session are carried over when they
+    can still be read, elements and other windows are not,
+    ``on_recycle(driver)`` may restore more.
+
+    Coroutine functions, async properties, methods returning a coroutine
+    such as execute() and the methods of ``switch_to`` are gated and always
+    reach the current driver. Other attributes are read from the current
+    driver and go stale with it, e.g. elements and command_executor.
+
+    :Args:
+     - factory - coroutine function returning a new driver
+     - interval - seconds between two samples
+     - keep_state - carry the session state over to the fresh driver
+     - on_recycle - optional coroutine function awaited with the fresh driver
+    """
+
+    def __init__(self, factory, max_rss=None, max_js_heap=None, max_age=None, interval=30,
+                 keep_state=True, on_recycle=None):
+        self._factory = factory
+        self.max_rss = max_rss
+        self.max_js_heap = max_js_heap
+        self.max_age = max_age
+        self.interval = interval
+        self.keep_state = keep_state
+        self.on_recycle = on_recycle
+        self.recycles = 0
+        self.last_usage = None
+        self._driver = None
+        self._born = None
+        self._task = None
+        self._open = None
+        self._idle = None
+        self._in_flight = 0
+
+    @property
+    def driver(self):
+        """The driver currently behind the proxy."""
+        return self._driver
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._open = asyncio.Event()
+        self._open.set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._driver = await self._factory()
+        self._born = loop.time()
+        self._task = asyncio.ensure_future(self._watch())
+        return self
+
+    async def quit(self):
+        """Stops watching and quits the driver."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._driver is not None:
+            await self._driver.quit()
+            self._driver = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *args):
+        await self.quit()
+
+    @property
+    def age(self):
+        return asyncio.get_running_loop().time() - self._born
+
+    async def sample(self):
+        """Returns the driver's memory usage, a dict of js_heap and rss in bytes."""
+        memory_usage = getattr(self._driver, 'memory_usage', None)
+        self.last_usage = await memory_usage() if memory_usage is not None else {}
+        return self.last_usage
+
+    def exceeded(self, usage):
+        """Returns why the driver should be recycled, None if it should not."""
+        if self.max_age is not None and self.age >= self.max_age:
+            return 'age %.0fs' % self.age
+        rss = usage.get('rss')
+        if self.max_rss is not None and rss is not None and rss >= self.max_rss:
+            return 'rss %d bytes' % rss
+        js_heap = usage.get('js_heap')
+        if self.max_js_heap is not None and js_heap is not None and js_heap >= self.max_js_heap:
+            return 'js heap %d bytes' % js_heap
+        return None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                reason = self.exceeded(await self.sample())
+                if reason is not None:
+                    await self.recycle(reason)
+            except Exception:
+                LOGGER.exception('memory watchdog of %r failed', self._driver)
+
+    async def recycle(self, reason='requested'):
+        """Swaps in a fresh driver once the commands in flight are done."""
+        self._open.clear()
+        try:
+            await self._idle.wait()
+            old = self._driver
+            state = url = None
+            if self.keep_state:
+                try:
+                    state, url = await asyncio.gather(old.export_state(), old.current_url)
+                except Exception:
+                    # a crashed browser is the driver most in need of a replacement
+                    LOGGER.warning('exporting the state of %r failed, recycling without it', old, exc_info=True)
+                    state = url = None
+            driver = await self._factory()
+            try:
+                if state is not None:
+                    await driver.import_state(state)
+                    if url and url != await driver.current_url:
+                        await driver.get(url)
+                if self.on_recycle is not None:
+                    await self.on_recycle(driver)
+            except BaseException:
+                await driver.quit()
+                raise
+            self._driver = driver
+            self._born = asyncio.get_running_loop().time()
+            self.recycles += 1
+            LOGGER.info('recycled %r after %s', old, reason)
+        finally:
+            self._open.set()
+        try:
+            await old.quit()
+        except Exception:
+            LOGGER.warning('quitting the recycled driver %r failed', old, exc_info=True)
+
+    async def _call(self, fn):
+        while not self._open.is_set():
+            await self._open.wait()
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            value = fn(self._driver)
+            if inspect.isawaitable(value):
+                value = await value
+            return value
+        finally:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.set()
+
+    def _attribute(self, target, name):
+        # ``target(driver)`` is the object of the driver the attribute is read from
+        owner = target(self._driver)
+        static = getattr(type(owner), name, None)
+        if isinstance(static, property) and inspect.iscoroutinefunction(static.fget):
+            return self._call(lambda driver: getattr(target(driver), name))
+        value = getattr(owner, name)
+        if name in GATED_OBJECTS:
+            return _GatedObject(self, lambda driver: getattr(target(driver), name))
+        if not callable(value) or inspect.isclass(value):
+            return value
+
+        def call(*args, **kwargs):
+            if not inspect.iscoroutinefunction(value):
+                result = value(*args, **kwargs)
+                if not inspect.iscoroutine(result):
+                    return result
+                # e.g. execute(), made again on the driver current once the gate opens
+                result.close()
+            return self._call(lambda driver: getattr(target(driver), name)(*args, **kwargs))
+        call.__name__ = name
+        call.__doc__ = value.__doc__
+        return call
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self._attribute(_itself, name)
+
+
+def _itself(driver):
+    return driver
+
+
+class _GatedObject(object):
+    """Stands in for an object of the driver, e.g. switch_to, following its recycles."""
+
+    def __init__(self, recycler, target):
+        self._recycler = recycler
+        self._target = target
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self._recycler._attribute(self._target, name)
@@ -0,0 +1,68 @@
+"""
+Named Chrome option bundles for create_options(preset=...).
+
+ - scrape-fast - headless, no images, GPU, extensions or background
+   throttling, 'eager' page loads return at DOMContentLoaded
+ - low-memory - headless, no images, GPU or extensions, fewer renderer
+   processes, a small disk cache and a capped JavaScript heap
+ - deterministic-render - headless with a fixed window, scale factor, color
+   profile and font rendering, so screenshots of a page match across runs
+
+``python -m asyncselenium.bench presets --chromedriver PATH`` measures them
+against a local page.
+"""
+
+from selenium.common.exceptions import InvalidArgumentException
+
+# /dev/shm is 64MB in most containers, Chrome crashes on large pages there
+_SHARED_MEMORY = ['--disable-dev-shm-usage']
+
+_QUIET = ['--disable-extensions', '--disable-default-apps', '--disable-sync',
+          '--disable-background-networking', '--no-first-run', '--mute-audio']
+
+_NO_THROTTLING = ['--disable-background-timer-throttling', '--disable-backgrounding-occluded-windows',
+                  '--disable-renderer-backgrounding']
+
+_NO_IMAGES = {'profile.managed_default_content_settings.images': 2}
+
+PRESETS = {
+    'scrape-fast': {
+        'arguments': ['--headless', '--disable-gpu', '--blink-settings=imagesEnabled=false']
+        + _SHARED_MEMORY + _QUIET + _NO_THROTTLING,
+        'prefs': _NO_IMAGES,
+        'page_load_strategy': 'eager',
+    },
+    'low-memory': {
+        'arguments': ['--headless', '--disable-gpu', '--blink-settings=imagesEnabled=false',
+                      '--renderer-process-limit=2', '--disk-cache-size=33554432',
+                      '--js-flags=--max-old-space-size=512']
+        + _SHARED_MEMORY + _QUIET,
+        'prefs': _NO_IMAGES,
+        'page_load_strategy': 'eager',
+    },
+    'deterministic-render': {
+        'arguments': ['--headless', '--window-size=1280,800', '--force-device-scale-factor=1',
+                      '--hide-scrollbars', '--force-color-profile=srgb', '--font-render-hinting=none',
+                      '--disable-lcd-text', '--disable-gpu']
+        + _SHARED_MEMORY + _QUIET + _NO_THROTTLING,
+        'prefs': {},
+        'page_load_strategy': 'normal',
+    },
+}
+
+
+def apply_preset(options, preset):
+    """Adds the arguments, preferences and page load strategy of ``preset`` to ``options``."""
+    try:
+        bundle = PRESETS[preset]
+    except KeyError:
+        raise InvalidArgumentException('unknown preset %r, choose from %s' % (preset, ', '.join(sorted(PRESETS))))
+    for argument in bundle['arguments']:
+        if argument not in options.arguments:
+            options.add_argument(argument)
+    if bundle['prefs']:
+        prefs = dict(options.experimental_options.get('prefs', {}))
+        prefs.update(bundle['prefs'])
+        options.add_experimental_option('prefs', prefs)
+    options.set_capability('pageLoadStrategy', bundle['page_load_strategy'])
+    return options
@@ -0,0 +1,218 @@
+"""
+Chrome profiles prepared once and cloned per session.
+
+A template is a user-data-dir whose first run is done and whose HTTP cache
+is warm. Every session gets its own clone, so sessions start warm without
+sharing a mutable profile. Files are cloned as reflinks where the file
+system supports them (btrfs, xfs) and copied otherwise. Clones are made
+next to the template, reflinks do not cross file systems. Overlay mounts
+would avoid even the copies, but need privileges a test runner rarely has.
+
+:Usage:
+    template = await ProfileTemplate.prepare('/var/profiles/base', urls=['https://www.baidu.com'])
+    async with await template.clone() as profile:
+        driver = await AsyncChromeDriver(options=profile.apply(AsyncChromeDriver.create_options()))
+        ...
+        await driver.quit()
+"""
+
+import asyncio
+import errno
+import os
+import shutil
+import stat
+import tempfile
+
+from asyncselenium.webdriver.chrome.async_webdriver import AsyncChromeDriver
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+# ioctl cloning a whole file on Linux, _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# directories of cache entries, a browser drops an entry it cannot write
+CACHE_DIRS = frozenset(('Cache', 'Code Cache', 'GPUCache', 'GrShaderCache', 'ShaderCache',
+                        'DawnCache', 'CacheStorage', 'ScriptCache'))
+
+# files of the running browser, a clone must not inherit them
+LOCK_FILES = frozenset(('SingletonLock', 'SingletonSocket', 'SingletonCookie', 'lockfile'))
+
+# reflinks are not supported by the file system, or across file systems
+_NO_REFLINK = (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS)
+
+
+def reflink(source, destination):
+    """
+    Clones ``source`` to ``destination`` sharing its blocks until either is
+    written. Raises OSError where the file system cannot do it.
+    """
+    if fcntl is None:
+        raise OSError(errno.ENOSYS, 'reflinks need fcntl')
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.remove(destination)
+            raise
+    shutil.copystat(source, destination)
+
+
+def _is_cache(relative):
+    return not CACHE_DIRS.isdisjoint(relative.split(os.sep)[:-1])
+
+
+def clone_tree(source, destination, use_reflinks=True, hardlink_cache=False):
+    """
+    Clones the profile ``source`` into the directory ``destination``.
+
+    :Returns:
+     - a dict counting the files cloned by 'reflink', 'hardlink' and 'copy'
+    """
+    counts = {'reflink': 0, 'hardlink': 0, 'copy': 0}
+    for directory, dirnames, filenames in os.walk(source):
+        relative_directory = os.path.relpath(directory, source)
+        target_directory = os.path.normpath(os.path.join(destination, relative_directory))
+        os.makedirs(target_directory, exist_ok=True)
+        for name in filenames + [name for name in dirnames if os.path.islink(os.path.join(directory, name))]:
+            if name in LOCK_FILES:
+                continue
+            src = os.path.join(directory, name)
+            dst = os.path.join(target_directory, name)
+            if os.path.islink(src):
+                os.symlink(os.readlink(src), dst)
+                continue
+            if use_reflinks:
+                try:
+                    reflink(src, dst)
+                    counts['reflink'] += 1
+                    continue
+                except OSError as e:
+                    if e.errno not in _NO_REFLINK:
+                        raise
+                    # the whole tree is on the same file system, do not retry
+                    use_reflinks = False
+            if hardlink_cache and _is_cache(os.path.join(relative_directory, name)):
+                try:
+                    os.link(src, dst)
+                    counts['hardlink'] += 1
+                    continue
+                except OSError as e:
+                    if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                        raise
+                    hardlink_cache = False
+            shutil.copy2(src, dst)
+            counts['copy'] += 1
+    return counts
+
+
+def freeze_cache(path):
+    """
+    Makes the cache entries of a template read-only, a clone's browser then
+    drops an entry it shares through a hardlink instead of changing the
+    template. Root ignores the mode, do not share cache entries with browsers
+    running as root.
+    """
+    for directory, dirnames, filenames in os.walk(path):
+        for name in filenames:
+            file = os.path.join(directory, name)
+            if _is_cache(os.path.relpath(file, path)) and not os.path.islink(file):
+                mode = os.stat(file).st_mode
+                os.chmod(file, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+class ClonedProfile(object):
+    """
+    A user-data-dir cloned from a template, removed by remove() or on
+    leaving ``async with``.
+    """
+
+    def __init__(self, path, counts):
+        self.path = path
+        self.counts = counts
+
+    def __repr__(self):
+        return '<ClonedProfile %s %r>' % (self.path, self.counts)
+
+    def apply(self, options):
+        """Makes ``options`` start Chrome on this profile and returns them."""
+        options.add_argument('--user-data-dir=%s' % self.path)
+        return options
+
+    async def remove(self):
+        await asyncio.get_running_loop().run_in_executor(None, shutil.rmtree, self.path, True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.remove()
+
+
+class ProfileTemplate(object):
+    """
+    A prepared user-data-dir.
+
+    :Args:
+     - path - the template profile, not used by a browser while cloned
+     - clone_root - directory of the clones, the template's parent directory
+       by default, it must be on the template's file system for reflinks and
+       hardlinks
+     - use_reflinks - clone files as reflinks where supported
+     - hardlink_cache - share cache entries between clones as hardlinks
+       instead of copying them where reflinks are not supported. The
+       template's cache entries are made read-only for it (freeze_cache),
+       only use it when browsers do not run as root.
+    """
+
+    def __init__(self, path, clone_root=None, use_reflinks=True, hardlink_cache=False):
+        self.path = os.path.abspath(path)
+        self.clone_root = os.path.dirname(self.path) if clone_root is None else clone_root
+        self.use_reflinks = use_reflinks
+        self.hardlink_cache = hardlink_cache
+        self._frozen = False
+
+    @classmethod
+    async def prepare(cls, path, urls=(), warm=None, driver_factory=None, **kwargs):
+        """
+        Runs Chrome once on ``path`` to build the template.
+
+        :Args:
+         - urls - pages opened to warm the HTTP cache
+         - warm - optional coroutine function taking the driver, e.g. to log
+           in or install extensions
+         - driver_factory - coroutine function taking Chrome options and
+           returning a driver, AsyncChromeDriver by default
+        """
+        if driver_factory is None:
+            def driver_factory(options):
+                return AsyncChromeDriver(options=options)
+        os.makedirs(path, exist_ok=True)
+        options = AsyncChromeDriver.create_options()
+        options.add_argument('--user-data-dir=%s' % os.path.abspath(path))
+        driver = await driver_factory(options)
+        try:
+            for url in urls:
+                await driver.get(url)
+            if warm is not None:
+                await warm(driver)
+        finally:
+            # the profile is flushed to disk when the browser exits
+            await driver.quit()
+        return cls(path, **kwargs)
+
+    def clone_sync(self, path=None):
+        if self.hardlink_cache and not self._frozen:
+            freeze_cache(self.path)
+            self._frozen = True
+        if path is None:
+            path = tempfile.mkdtemp(prefix='%s-clone-' % os.path.basename(self.path), dir=self.clone_root)
+        counts = clone_tree(self.path, path, self.use_reflinks, self.hardlink_cache)
+        return ClonedProfile(path, counts)
+
+    async def clone(self, path=None):
+        """Clones the template to ``path``, a new directory in ``clone_root`` if None, in the default executor."""
+        return await asyncio.get_running_loop().run_in_executor(None, self.clone_sync, path)
@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import time
+
+import aiohttp
+
+from selenium.common.exceptions import WebDriverException
+from asyncselenium.webdriver.remote.async_remote_connection import CONNECTION_ERRORS
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+
+LOGGER = logging.getLogger(__name__)
+
+
+class GridEndpoint(object):
+    """
+    State the scheduler keeps about one hub, node or standalone driver.
+
+    :Args:
+     - url - the command executor url, e.g. 'http://hub:4444/wd/hub'
+     - capacity - number of sessions the endpoint can hold, used when its
+       status does not report slots (Grid 3 hubs, chromedriver)
+    """
+
+    def __init__(self, url, capacity=None):
+        self.url = url.rstrip('/')
+        self.capacity = capacity
+        self.ready = True
+        self.total_slots = capacity
+        self.free_slots = capacity
+        self.latency = None
+        self.create_latency = None
+        self.pending = 0
+        self.active = 0
+        self.placed_since_probe = 0
+        self.last_probe = None
+        self.last_error = None
+
+    def __repr__(self):
+        return '<GridEndpoint %s ready=%s free=%s pending=%d active=%d latency=%s>' % (
+            self.url, self.ready, self.free_slots, self.pending, self.active, self.latency)
+
+    @property
+    def available(self):
+        """Slots expected to be free right now, None if unknown."""
+        if self.free_slots is not None:
+            return self.free_slots - self.placed_since_probe - self.pending
+        if self.capacity is not None:
+            return self.capacity - self.active - self.pending
+        return None
+
+    def update_status(self, value):
+        """Reads readiness and free slots out of a /status response value."""
+        if not isinstance(value, dict):
+            value = {}
+        self.ready = bool(value.get('ready', True))
+        nodes = value.get('nodes')
+        if nodes is not None:
+            # Selenium Grid 4 lists the slots of every node
+            total = free = 0
+            for node in nodes:
+                if node.get('availability', 'UP') != 'UP':
+                    continue
+                for slot in node.get('slots', ()):
+                    total += 1
+                    if slot.get('session') is None:
+                        free += 1
+            self.total_slots, self.free_slots = total, free
+        elif value.get('maxSessions') is not None:
+            self.total_slots = value['maxSessions']
+            self.free_slots = value['maxSessions'] - value.get('sessions', 0)
+        else:
+            self.total_slots = self.capacity
+            self.free_slots = None
+        self.placed_since_probe = 0
+
+
+class AsyncGridScheduler(object):
+    """
+    Places new sessions over several grids and standalone driver hosts.
+
+    Endpoints are probed on their ``/status`` url concurrently, a new session
+    goes to the ready endpoint with the most free slots, weighted down by its
+    observed probe latency. At most ``max_pending`` session creations are in
+    flight per endpoint, further requests wait for a slot instead of queueing
+    on a single hub.
+
+    :Args:
+     - endpoints - urls or GridEndpoint instances
+     - max_pending - concurrent session creations allowed per endpoint
+     - probe_interval - seconds between background probes, None disables them
+     - probe_timeout - seconds a /status request may take
+     - acquire_timeout - seconds to wait for a free slot before giving up
+     - latency_alpha - weight of the newest sample in the latency moving average
+
+    :Usage:
+        async with AsyncGridScheduler(['http://grid-a:4444/wd/hub',
+                                       'http://grid-b:4444/wd/hub']) as scheduler:
+            async with scheduler.session(options=chrome_options) as driver:
+                await driver.get('https://www.baidu.com')
+    """
+
+    def __init__(self, endpoints, max_pending=2, probe_interval=5.0, probe_timeout=2.0,
+                 acquire_timeout=300.0, latency_alpha=0.3):
+        self.endpoints = [e if isinstance(e, GridEndpoint) else GridEndpoint(e) for e in endpoints]
+        if not self.endpoints:
+            raise ValueError('at least one endpoint is required')
+        self.max_pending = max_pending
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.acquire_timeout = acquire_timeout
+        self.latency_alpha = latency_alpha
+        self._changed = None
+        self._probe_task = None
+        self._http = None
+
+    def _condition(self):
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    async def _notify(self):
+        async with self._condition():
+            self._changed.notify_all()
+
+    def _observe(self, current, sample):
+        if current is None:
+            return sample
+        return current + self.latency_alpha * (sample - current)
+
+    async def start(self):
+        """Probes every endpoint once and starts the background probing."""
+        await self.probe()
+        if self.probe_interval and self._probe_task is None:
+            self._probe_task = asyncio.ensure_future(self._probe_forever())
+        return self
+
+    async def stop(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    async def _probe_forever(self):
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            await self.probe()
+
+    async def probe(self):
+        """Queries the status of all endpoints concurrently."""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.probe_timeout))
+        await asyncio.gather(*[self._probe(endpoint) for endpoint in self.endpoints])
+        await self._notify()
+
+    async def _probe(self, endpoint):
+        started = time.perf_counter()
+        try:
+            async with self._http.get(endpoint.url + '/status') as resp:
+                data = await resp.json(content_type=None)
+            endpoint.update_status((data or {}).get('value'))
+            endpoint.latency = self._observe(endpoint.latency, time.perf_counter() - started)
+            endpoint.last_error = None
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            LOGGER.info('probing %s failed: %r', endpoint.url, e)
+            endpoint.ready = False
+            endpoint.last_error = e
+        endpoint.last_probe = time.time()
+
+    def _pick(self):
+        candidates = []
+        for endpoint in self.endpoints:
+            if not endpoint.ready or endpoint.pending >= self.max_pending:
+                continue
+            available = endpoint.available
+            if available is not None and available <= 0:
+                continue
+            candidates.append(endpoint)
+        if not candidates:
+            return None
+        fastest = min(e.latency or 0.001 for e in candidates)
+
+        def score(endpoint):
+            # unknown capacity counts as one free slot
+            available = endpoint.available if endpoint.available is not None else 1
+            return (available * fastest / (endpoint.latency or 0.001), -endpoint.pending)
+        return max(candidates, key=score)
+
+    async def acquire(self):
+        """
+        Waits for an endpoint with a free slot and reserves a pending creation on it.
+
+        Pair with release_pending() once the session is created or failed.
+        """
+        condition = self._condition()
+        async with condition:
+            endpoint = self._pick()
+            if endpoint is None:
+                try:
+                    await asyncio.wait_for(condition.wait_for(self._pick), self.acquire_timeout)
+                except asyncio.TimeoutError:
+                    raise WebDriverException('no grid endpoint had a free slot within %ss: %s' % (
+                        self.acquire_timeout, self.endpoints))
+                endpoint = self._pick()
+            endpoint.pending += 1
+            return endpoint
+
+    async def create_driver(self, driver_cls=AsyncWebdriver, **kwargs):
+        """
+        Creates a driver on the best endpoint.
+
+        Keyword arguments are passed to ``driver_cls`` together with the
+        chosen ``command_executor``. Drivers should be given back with
+        quit() or release() so their slot is freed.
+        """
+        endpoint = await self.acquire()
+        started = time.perf_counter()
+        try:
+            driver = await driver_cls(command_executor=endpoint.url, **kwargs)
+        except CONNECTION_ERRORS as e:
+            # connection level failure, keep the endpoint out until the next probe,
+            # other errors such as a bad keyword argument say nothing about it
+            endpoint.ready = False
+            endpoint.last_error = e
+            raise
+        else:
+            endpoint.create_latency = self._observe(endpoint.create_latency, time.perf_counter() - started)
+            endpoint.active += 1
+            endpoint.placed_since_probe += 1
+            driver._grid_endpoint = endpoint
+            return driver
+        finally:
+            endpoint.pending -= 1
+            await self._notify()
+
+    async def release(self, driver):
+        """Frees the slot of a driver created by this scheduler without quitting it."""
+        endpoint = getattr(driver, '_grid_endpoint', None)
+        if endpoint is None:
+            return
+        driver._grid_endpoint = None
+        endpoint.active -= 1
+        if endpoint.free_slots is not None:
+            endpoint.free_slots += 1
+        await self._notify()
+
+    async def quit(self, driver):
+        """Quits a driver created by this scheduler and frees its slot."""
+        try:
+            await driver.quit()
+        finally:
+            await self.release(driver)
+
+    def session(self, driver_cls=AsyncWebdriver, **kwargs):
+        """
+        Async context manager creating a driver and quitting it on exit.
+
+        :Usage:
+            async with scheduler.session(options=options) as driver:
+                ...
+        """
+        return _ScheduledSession(self, driver_cls, kwargs)
+
+
+class _ScheduledSession(object):
+
+    def __init__(self, scheduler, driver_cls, kwargs):
+        self._scheduler = scheduler
+        self._driver_cls = driver_cls
+        self._kwargs = kwargs
+        self._driver = None
+
+    async def __aenter__(self):
+        self._driver = await self._scheduler.create_driver(self._driver_cls, **self._kwargs)
+        return self._driver
+
+    async def __aexit__(self, *args):
+        await self._scheduler.quit(self._driver)
@@ -1,5 +1,8 @@
 import aiohttp
+import asyncio
 import logging
+import string
+import time
 
 try:
     from urllib import parse
@@ -7,20 +10,196 @@ except ImportError:  # above is available in py3+, below is py2.7
     import urlparse as parse
 
 from selenium.webdriver.remote import utils
+from selenium.webdriver.remote.command import Command
 from selenium.webdriver.remote.errorhandler import ErrorCode
 from selenium.webdriver.remote.remote_connection import RemoteConnection
+from asyncselenium.webdriver.remote.command_listener import CommandEvent, notify
+from asyncselenium.webdriver.remote.circuit_breaker import get_breaker, release_breaker, EndpointUnavailableException
+from asyncselenium.webdriver.remote import deadline
 
 LOGGER = logging.getLogger(__name__)
 
+# failures counted by the circuit breaker, HTTP error statuses are not among them
+CONNECTION_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+# not gated by the command limiter, sessions are limited on their own
+UNLIMITED_COMMANDS = frozenset((Command.NEW_SESSION,))
+
+# commands waiting for a page load, far slower than the latency baseline
+PAGE_LOAD_COMMANDS = frozenset((Command.GET, Command.REFRESH, Command.GO_BACK, Command.GO_FORWARD))
+
 class AsyncRemoteConnection(RemoteConnection):
     '''Async connection with the async remote webdriver server
     '''
+    _default_listeners = []
+    _default_limiter = None
+    _connect_timeout = None
+    _read_timeout = None
+
+    def __init__(self, remote_server_addr, keep_alive=False, resolve_ip=True):
+        RemoteConnection.__init__(self, remote_server_addr, keep_alive, resolve_ip)
+        # W3C New Window, not known to selenium 3
+        self._commands.setdefault('newWindow', ('POST', '/session/$sessionId/window/new'))
+        self._listeners = list(self._default_listeners)
+        self.limiter = self._default_limiter
+        self.connect_timeout = None
+        self.read_timeout = None
+        self.breaker = get_breaker(self._url)
+        self._holds_breaker = True
+        self._session = None
+        self._session_loop = None
+
+    @classmethod
+    def set_timeouts(cls, connect=None, read=None):
+        """
+        Sets the default connect and read timeouts, in seconds, of all connections.
+
+        A connection's own ``connect_timeout`` and ``read_timeout`` attributes
+        take precedence when set. The overall request timeout is still the
+        one of set_timeout().
+        """
+        cls._connect_timeout = connect
+        cls._read_timeout = read
+
+    def _client_timeout(self, limit=None):
+        total = self.get_timeout()
+        if total is None:
+            total = aiohttp.client.DEFAULT_TIMEOUT.total
+        if limit is not None and (total is None or limit < total):
+            total = limit
+        connect = self.connect_timeout if self.connect_timeout is not None else self._connect_timeout
+        read = self.read_timeout if self.read_timeout is not None else self._read_timeout
+        return aiohttp.ClientTimeout(total=total, sock_connect=connect, sock_read=read)
+
+    def _client_session(self):
+        # one pooled session per connection, recreated if used from another loop
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(force_close=not self.keep_alive))
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        """Closes the pooled HTTP connections and gives the circuit breaker back."""
+        if self._holds_breaker:
+            self._holds_breaker = False
+            release_breaker(self.breaker)
+        session, self._session = self._session, None
+        if session is not None and not session.closed and self._session_loop is asyncio.get_running_loop():
+            await session.close()
+
+    @classmethod
+    def add_default_listener(cls, listener):
+        """
+        Registers a command listener on every connection created afterwards,
+        including the one used for the new session request.
+        """
+        cls._default_listeners.append(listener)
+
+    @classmethod
+    def remove_default_listener(cls, listener):
+        cls._default_listeners.remove(listener)
+
+    @classmethod
+    def set_default_limiter(cls, limiter):
+        """
+        Sets the limiter gating the requests of connections created from now on.
+
+        :Args:
+         - limiter - object with async acquire() and release(duration, error),
+           e.g. an AdaptiveLimiter, or None
+        """
+        cls._default_limiter = limiter
+
+    def add_listener(self, listener):
+        """
+        Registers an AbstractCommandListener on this connection.
+
+        :Args:
+         - listener - object with before_command(event) and after_command(event) hooks
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def notify_exception(self, session_id, exception):
+        """Forwards an exception raised for the session to the listeners."""
+        if self._listeners:
+            notify(self._listeners, 'on_exception', session_id, exception)
+
+    def execute(self, command, params):
+        """
+        Send a command to the remote server.
+
+        :Args:
+         - command - A string specifying the command to execute.
+         - params - A dictionary of named parameters to send with the command as
+           its JSON payload.
+
+        :Returns:
+          A coroutine function which sends the request when called.
+        """
+        command_info = self._commands[command]
+        assert command_info is not None, 'Unrecognised command %s' % command
+        path = string.Template(command_info[1]).substitute(params)
+        session_id = params.get('sessionId') if isinstance(params, dict) else None
+        if hasattr(self, 'w3c') and self.w3c and isinstance(params, dict) and 'sessionId' in params:
+            del params['sessionId']
+        data = utils.dump_json(params)
+        url = '%s%s' % (self._url, path)
+        if not self._listeners:
+            request = self._request(command_info[0], url, body=data)
+            if self.limiter is not None and command not in UNLIMITED_COMMANDS:
+                request = self._limited(request, self.limiter, command not in PAGE_LOAD_COMMANDS)
+            return request
+
+        event = CommandEvent(command, session_id, command_info[0], url, data)
+        request = self._request(command_info[0], url, body=data, event=event)
+        if self.limiter is not None and command not in UNLIMITED_COMMANDS:
+            request = self._limited(request, self.limiter, command not in PAGE_LOAD_COMMANDS)
+        listeners = list(self._listeners)
+
+        async def __instrumented_request():
+            notify(listeners, 'before_command', event)
+            event.start = time.perf_counter()
+            try:
+                return await request()
+            except BaseException as e:
+                event.exception = e
+                raise
+            finally:
+                event.duration = time.perf_counter() - event.start
+                notify(listeners, 'after_command', event)
+        return __instrumented_request
+
+    @staticmethod
+    def _limited(request, limiter, timed=True):
+        # the limiter only sees the time spent on the wire, not in its queue,
+        # and no time at all for requests which are not ``timed``
+
+        async def __limited_request():
+            await limiter.acquire()
+            started = time.perf_counter()
+            duration, error = None, False
+            try:
+                response = await request()
+                if timed:
+                    duration = time.perf_counter() - started
+                return response
+            except CONNECTION_ERRORS:
+                error = True
+                raise
+            finally:
+                limiter.release(duration, error)
+        return __limited_request
 
-    def _request(self, method, url, body=None):
+    def _request(self, method, url, body=None, event=None):
 
         async def __async_request():
             nonlocal body
-            LOGGER.debug('%s %s %s' % (method, url, body))
+            LOGGER.debug('%s %s %s', method, url, body)
 
             parsed_url = parse.urlparse(url)
             headers = self.get_remote_connection_headers(parsed_url, self.keep_alive)
@@ -28,13 +207,24 @@ class AsyncRemoteConnection(RemoteConnection):
             if body and method != 'POST' and method != 'PUT':
                 body = None
 
-            async with aiohttp.ClientSession(headers=headers) as session:
-                async with session.request(method, url, data=body) as resp:
+            # a request which cannot finish before the deadline is not sent at all
+            left = deadline.check('deadline exceeded before %s %s' % (method, url))
+            task = asyncio.current_task()
+            breaker = self.breaker
+            breaker.enter(task)
+            try:
+                session = self._client_session()
+                async with session.request(method, url, data=body, headers=headers,
+                                           timeout=self._client_timeout(left)) as resp:
                     statuscode = resp.status
                     data = await resp.text()
+                    breaker.record_success()
+                    if event is not None:
+                        event.status = statuscode
+                        event.response_size = len(data)
                     try:
                         if 300 <= statuscode < 304:
-                            return self._request('GET', resp.headers.get('location'))
+                            return await self._request('GET', resp.headers.get('location'))()
                         if 399 < statuscode <= 500:
                             return {'status': statuscode, 'value': data}
                         content_type = []
@@ -61,6 +251,22 @@ class AsyncRemoteConnection(RemoteConnection):
                             return data
                     finally:
                         LOGGER.debug("Finished Request")
+            except asyncio.CancelledError:
+                if breaker.interrupted(task):
+                    uncancel = getattr(task, 'uncancel', None)
+                    if uncancel is not None:
+                        uncancel()
+                    raise EndpointUnavailableException('%s was interrupted, %s is unavailable: %s' % (
+                        url, breaker.endpoint, breaker.reason)) from None
+                raise
+            except CONNECTION_ERRORS as e:
+                if left is not None and isinstance(e, asyncio.TimeoutError) and deadline.remaining() <= 0:
+                    # cut short by the deadline, not the endpoint's fault
+                    raise deadline.DeadlineExceeded('deadline exceeded during %s %s' % (method, url)) from e
+                breaker.record_failure(e)
+                raise
+            finally:
+                breaker.exit(task)
         return __async_request
 
 
@@ -6,6 +6,11 @@ from selenium.common.exceptions import NoSuchElementException, NoSuchFrameExcept
 
 class AsyncSwithTo(SwitchTo):
 
+    def __init__(self, driver):
+        SwitchTo.__init__(self, driver)
+        # handle -> window.name of the windows seen while switching by name
+        self._window_names = {}
+
     @property
     async def active_element(self):
         """
@@ -89,22 +94,58 @@ class AsyncSwithTo(SwitchTo):
             return
         data = {'name': window_name}
         await self._driver.execute(Command.SWITCH_TO_WINDOW, data)
+        self._driver._current_window_handle = None
 
-    async def _w3c_window(self, window_name):
-        async def send_handle(h):
-            await self._driver.execute(Command.SWITCH_TO_WINDOW, {'handle': h})
+    async def _send_handle(self, handle):
+        await self._driver.execute(Command.SWITCH_TO_WINDOW, {'handle': handle})
+        self._driver._current_window_handle = handle
+
+    def _handle_named(self, window_name):
+        for handle, name in self._window_names.items():
+            if name == window_name:
+                return handle
+        return None
+
+    def forget_window(self, handle):
+        """Drops a closed window from the name index."""
+        self._window_names.pop(handle, None)
+
+    def refresh_window_index(self):
+        """
+        Forgets the indexed window names, e.g. after a page changed its
+        window.name, the next switch by name reads them again.
+        """
+        self._window_names.clear()
+
+    async def _window_name(self):
+        return await self._driver.execute_script('return window.name')
 
+    async def _w3c_window(self, window_name):
+        # A name found in the index costs a single switch, otherwise try it
+        # as a handle first. On a miss every window is visited to read its
+        # window.name, the indexed ones too as a page may have renamed its
+        # window since. A renamed window keeps its old name in the index
+        # until the next miss or refresh_window_index().
+        handle = self._handle_named(window_name)
         try:
-            # Try using it as a handle first.
-            await send_handle(window_name)
+            await self._send_handle(handle or window_name)
+            return
         except NoSuchWindowException as e:
-            # Check every window to try to find the given window name.
-            original_handle = await self._driver.current_window_handle
-            handles = await self._driver.window_handles
-            for handle in handles:
-                await send_handle(handle)
-                current_name = await self._driver.execute_script('return window.name')
-                if window_name == current_name:
-                    return
-            await send_handle(original_handle)
-            raise e
+            error = e
+        if handle is not None:
+            self.forget_window(handle)
+        original_handle = await self._driver.current_window_handle
+        handles = await self._driver.window_handles
+        for closed in set(self._window_names) - set(handles):
+            self.forget_window(closed)
+        # windows not indexed yet are the likelier ones
+        unindexed = [candidate for candidate in handles if candidate not in self._window_names]
+        indexed = [candidate for candidate in handles if candidate in self._window_names]
+        for candidate in unindexed + indexed:
+            await self._send_handle(candidate)
+            current_name = await self._window_name()
+            self._window_names[candidate] = current_name
+            if window_name == current_name:
+                return
+        await self._send_handle(original_handle)
+        raise error
@@ -1,4 +1,8 @@
+import aiohttp
+import asyncio
 import base64
+import logging
+import time
 import warnings
 
 from typing import Any, Coroutine
@@ -6,16 +10,38 @@ from selenium.webdriver.remote.command import Command
 from selenium.webdriver.remote.remote_connection import RemoteConnection
 from selenium.webdriver.remote.webdriver import WebDriver, _make_w3c_caps
 from selenium.common.exceptions import (InvalidArgumentException,
+                                        JavascriptException,
+                                        TimeoutException,
                                         WebDriverException,
-                                        NoSuchCookieException)
+                                        NoSuchCookieException,
+                                        NoSuchWindowException)
 from selenium.webdriver.common.by import By
 from asyncselenium.webdriver.remote.async_object import Asyncobject
 from asyncselenium.webdriver.remote.async_swith_to import AsyncSwithTo
 from asyncselenium.webdriver.remote.async_webelement import AsyncWebElement
 from asyncselenium.webdriver.remote.async_remote_connection import AsyncRemoteConnection
+from asyncselenium.webdriver.remote.deadline import Deadline
+from asyncselenium.webdriver.remote import session_state
+from asyncselenium.webdriver.remote import deadline
+from asyncselenium.webdriver.remote import navigation
+from asyncselenium.webdriver.remote.log_stream import PollingLogStream
+from asyncselenium.webdriver.remote.page_telemetry import PageLoad, SLOWEST_RESOURCES, TELEMETRY_SCRIPT
+from asyncselenium.webdriver.remote.fetch import CHUNK_SIZE, READ_TIMEOUT, FetchResult, cookie_header, stream_to_file
+
+LOGGER = logging.getLogger(__name__)
+
 
 class AsyncWebdriver(WebDriver, Asyncobject):
     _web_element_cls = AsyncWebElement
+    # optional CommandPolicy hedging and retrying idempotent commands
+    command_policy = None
+    # pooled client of fetch(), created on first use
+    _http = None
+    _user_agent = None
+    # handle of the current window, known until the next close or failed command on it
+    _current_window_handle = None
+    # coroutine function receiving a PageLoad after get, refresh and back
+    _telemetry = None
 
     async def __init__(self, command_executor='http://127.0.0.1:4444/wd/hub',
                  desired_capabilities=None, browser_profile=None, proxy=None,
@@ -74,9 +100,20 @@ class AsyncWebdriver(WebDriver, Asyncobject):
                     params['sessionId'] = self.session_id
 
             params = self._wrap_value(params)
-            response = await self.command_executor.execute(driver_command, params)()
+            policy = self.command_policy
+            if policy is not None and policy.applies(driver_command):
+                response = await policy.execute(self.command_executor, driver_command, params)
+            else:
+                response = await self.command_executor.execute(driver_command, params)()
             if response:
-                self.error_handler.check_response(response)
+                try:
+                    self.error_handler.check_response(response)
+                except WebDriverException as e:
+                    if isinstance(e, NoSuchWindowException) and driver_command != Command.SWITCH_TO_WINDOW:
+                        # the current window was closed behind our back
+                        self._current_window_handle = None
+                    self._notify_exception(e)
+                    raise
                 response['value'] = self._unwrap_value(
                     response.get('value', None))
                 return response
@@ -85,8 +122,98 @@ class AsyncWebdriver(WebDriver, Asyncobject):
             return {'success': 0, 'value': None, 'sessionId': self.session_id}            
         return _async_execute()
 
-    async def get(self, url):
+    def deadline(self, seconds):
+        """
+        Returns an async context manager bounding every command, wait and
+        page load inside it to ``seconds`` in total.
+
+        :Usage:
+            async with driver.deadline(30):
+                await driver.get('https://www.baidu.com')
+        """
+        return Deadline(seconds)
+
+    def _notify_exception(self, exception):
+        notify_exception = getattr(self.command_executor, 'notify_exception', None)
+        if notify_exception is not None:
+            notify_exception(self.session_id, exception)
+
+    async def get(self, url, until=None, timeout=None, idle_time=navigation.IDLE_TIME):
+        """
+        Loads a web page in the current browser session.
+
+        :Args:
+         - until - None to wait as the page load strategy says, or a
+           condition ending the navigation early: 'domcontentloaded',
+           'networkidle' or a (By, value) locator, see navigation
+         - timeout - seconds to wait for ``until``, unbounded if None
+         - idle_time - seconds without requests meaning 'networkidle'
+
+        :Usage:
+            await driver.get('https://www.baidu.com', until=(By.ID, 'kw'))
+        """
+        started = time.perf_counter()
+        if until is None:
+            await self.execute(Command.GET, {'url': url})
+        else:
+            await self._get_until(url, navigation.check_until(until), timeout, idle_time)
+        if self._telemetry is not None:
+            await self._report_load('get', started)
+
+    async def _get_until(self, url, until, timeout, idle_time):
         await self.execute(Command.GET, {'url': url})
+        end_time = None if timeout is None else time.perf_counter() + timeout
+        while not await self._navigation_done(until, idle_time):
+            if end_time is not None and time.perf_counter() >= end_time:
+                raise TimeoutException('%s was not reached on %s within %ss' % (until, url, timeout))
+            await asyncio.sleep(navigation.POLL_FREQUENCY)
+        await self.execute_script(navigation.STOP_LOADING_SCRIPT)
+
+    async def _navigation_done(self, until, idle_time):
+        try:
+            if until == navigation.DOM_CONTENT_LOADED:
+                return await self.execute_script(navigation.READY_STATE_SCRIPT) != 'loading'
+            if until == navigation.NETWORK_IDLE:
+                return await self.execute_script(navigation.NETWORK_IDLE_SCRIPT, idle_time * 1000)
+            return bool(await self.find_elements(*until))
+        except JavascriptException:
+            # the document was replaced while the script ran
+            return False
+
+    def enable_telemetry(self, callback):
+        """
+        Reports the load of every page opened by get, refresh and back.
+
+        After each navigation one script reads the Navigation and Resource
+        Timing entries of the page, Chrome adds Performance.getMetrics, and
+        ``callback`` is awaited with a PageLoad.
+
+        :Args:
+         - callback - coroutine function taking a PageLoad
+        """
+        self._telemetry = callback
+
+    def disable_telemetry(self):
+        self._telemetry = None
+
+    async def _performance_metrics(self):
+        """Returns the browser's performance metrics by name, none unless the driver knows them."""
+        return {}
+
+    async def _report_load(self, command, started):
+        elapsed = time.perf_counter() - started
+        try:
+            timing, metrics = await asyncio.gather(
+                self.execute_script(TELEMETRY_SCRIPT, SLOWEST_RESOURCES), self._performance_metrics())
+        except deadline.DeadlineExceeded:
+            raise
+        except WebDriverException as e:
+            # telemetry never fails a navigation
+            LOGGER.warning('collecting the telemetry of %s failed: %s', command, e)
+            return
+        timing = timing or {}
+        await self._telemetry(PageLoad(command, timing.get('url'), elapsed, timing.get('navigation'),
+                                       timing.get('resources'), metrics))
     
     @property
     async def title(self):
@@ -441,7 +568,11 @@ class AsyncWebdriver(WebDriver, Asyncobject):
         :Usage:
             driver.close()
         """
+        handle = self._current_window_handle
+        self._current_window_handle = None
         await self.execute(Command.CLOSE)
+        if handle is not None:
+            self._switch_to.forget_window(handle)
 
     async def quit(self):
         """
@@ -454,6 +585,11 @@ class AsyncWebdriver(WebDriver, Asyncobject):
             await self.execute(Command.QUIT)
         finally:
             self.stop_client()
+            if isinstance(self.command_executor, AsyncRemoteConnection):
+                await self.command_executor.close()
+            if self._http is not None:
+                await self._http.close()
+                self._http = None
 
     @property
     async def current_window_handle(self):
@@ -463,10 +599,13 @@ class AsyncWebdriver(WebDriver, Asyncobject):
         :Usage:
             driver.current_window_handle
         """
-        if self.w3c:
-            return (await self.execute(Command.W3C_GET_CURRENT_WINDOW_HANDLE))['value']
-        else:
-            return (await self.execute(Command.GET_CURRENT_WINDOW_HANDLE))['value']
+        if self._current_window_handle is None:
+            if self.w3c:
+                handle = (await self.execute(Command.W3C_GET_CURRENT_WINDOW_HANDLE))['value']
+            else:
+                handle = (await self.execute(Command.GET_CURRENT_WINDOW_HANDLE))['value']
+            self._current_window_handle = handle
+        return self._current_window_handle
 
     @property
     async def window_handles(self):
@@ -481,6 +620,18 @@ class AsyncWebdriver(WebDriver, Asyncobject):
         else:
             return (await self.execute(Command.GET_WINDOW_HANDLES))['value']
     
+    async def new_window(self, type_hint='tab'):
+        """
+        Opens a new tab or window without switching to it.
+
+        :Args:
+         - type_hint: 'tab' or 'window', the browser may pick the other one
+
+        :Returns:
+          A dict with the 'handle' and 'type' of the new window.
+        """
+        return (await self.execute('newWindow', {'type': type_hint}))['value']
+
     async def maximize_window(self):
         """
         Maximizes the current window that webdriver is using
@@ -548,7 +699,10 @@ class AsyncWebdriver(WebDriver, Asyncobject):
         :Usage:
             driver.back()
         """
+        started = time.perf_counter()
         await self.execute(Command.GO_BACK)
+        if self._telemetry is not None:
+            await self._report_load('back', started)
 
     async def forward(self):
         """
@@ -566,7 +720,10 @@ class AsyncWebdriver(WebDriver, Asyncobject):
         :Usage:
             driver.refresh()
         """
+        started = time.perf_counter()
         await self.execute(Command.REFRESH)
+        if self._telemetry is not None:
+            await self._report_load('refresh', started)
 
     async def get_cookies(self):
         """
@@ -630,6 +787,155 @@ class AsyncWebdriver(WebDriver, Asyncobject):
         """
         await self.execute(Command.ADD_COOKIE, {'cookie': cookie_dict})
 
+    async def export_state(self):
+        """
+        Captures the cookies, localStorage and sessionStorage of the current page.
+
+        The storages are read with a single script, concurrently with the cookies.
+
+        :Usage:
+            state = await driver.export_state()
+        """
+        cookies, storage = await asyncio.gather(
+            self._export_cookies(), self.execute_script(session_state.EXPORT_STORAGE_SCRIPT))
+        storage = storage or {}
+        return {'origin': storage.get('origin'),
+                'cookies': cookies,
+                'localStorage': storage.get('localStorage') or {},
+                'sessionStorage': storage.get('sessionStorage') or {},
+                'time': time.time()}
+
+    async def import_state(self, state, navigate=True):
+        """
+        Restores a state from export_state().
+
+        :Args:
+         - state - the exported dict
+         - navigate - open the state's origin first if the current page is on
+           another one, storages and cookies can only be set from there
+
+        :Usage:
+            await driver.import_state(state)
+            await driver.refresh()
+        """
+        origin = state.get('origin')
+        if navigate and origin and origin != 'null':
+            if not session_state.same_origin(await self.current_url, origin):
+                await self.get(origin + '/')
+        cookies = session_state.live_cookies(state.get('cookies') or ())
+        await asyncio.gather(
+            self._import_cookies(cookies, origin),
+            self.execute_script(session_state.IMPORT_STORAGE_SCRIPT,
+                                state.get('localStorage') or {}, state.get('sessionStorage') or {}))
+
+    async def _export_cookies(self):
+        return await self.get_cookies()
+
+    async def _import_cookies(self, cookies, origin=None):
+        # WebDriver only sets cookies of the current page's domain
+        host = session_state.origin_host(origin)
+        if host:
+            cookies = [cookie for cookie in cookies if session_state.cookie_matches(cookie, host)]
+        await self.add_cookies(cookies)
+
+    async def add_cookies(self, cookies):
+        """
+        Adds several cookies, their requests are sent concurrently.
+
+        :Args:
+         - cookies: list of cookie dicts as taken by add_cookie
+
+        :Usage:
+            driver.add_cookies([{'name': 'foo', 'value': 'bar'}, {'name': 'sid', 'value': '1'}])
+        """
+        await asyncio.gather(*[self.add_cookie(dict(cookie)) for cookie in cookies])
+
+    async def delete_cookies(self, names):
+        """
+        Deletes the cookies with the given names, their requests are sent concurrently.
+
+        :Usage:
+            driver.delete_cookies(['foo', 'sid'])
+        """
+        await asyncio.gather(*[self.delete_cookie(name) for name in names])
+
+    async def update_cookies(self, cookies, current=None, delete_missing=False):
+        """
+        Makes the session's cookies match ``cookies``, sending only what changed.
+
+        :Args:
+         - cookies: the cookies the session should have
+         - current: the cookies it has, fetched with get_cookies() if None
+         - delete_missing: also delete the cookies missing from ``cookies``
+
+        :Returns:
+          (number of cookies added or overwritten, number deleted)
+        """
+        if current is None:
+            current = await self.get_cookies()
+        changed, stale = session_state.cookie_diff(current, cookies)
+        if not delete_missing:
+            stale = []
+        await asyncio.gather(self.add_cookies(changed), self.delete_cookies(stale))
+        return len(changed), len(stale)
+
+    @property
+    async def user_agent(self):
+        """The browser's user agent, read once and cached."""
+        if self._user_agent is None:
+            self._user_agent = await self.execute_script('return navigator.userAgent')
+        return self._user_agent
+
+    async def fetch(self, url, path=None, method='GET', headers=None, data=None,
+                    session=None, chunk_size=CHUNK_SIZE):
+        """
+        Downloads ``url`` directly over HTTP, authenticated as the browser.
+
+        The request carries the session's cookies for ``url`` and the
+        browser's user agent, the page itself stays untouched. With a
+        ``path`` the body is streamed to that file instead of memory.
+
+        :Args:
+         - url - the resource to download
+         - path - file to stream the body to, the body is returned if None
+         - method, headers, data - of the request, headers override the defaults
+         - session - aiohttp.ClientSession to send it with, a client pooled
+           per driver by default
+         - chunk_size - bytes read at once while streaming
+
+        :Returns:
+          A FetchResult, raises aiohttp.ClientResponseError on an error status.
+
+        :Usage:
+            await driver.fetch('https://example.com/report.pdf', path='/tmp/report.pdf')
+        """
+        # every cookie of the profile where the driver can export them, the
+        # current page's domain may not be the one of ``url``
+        cookies, user_agent = await asyncio.gather(self._export_cookies(), self.user_agent)
+        request_headers = {'User-Agent': user_agent}
+        cookie = cookie_header(cookies, url)
+        if cookie:
+            request_headers['Cookie'] = cookie
+        request_headers.update(headers or {})
+        if session is None:
+            if self._http is None or self._http.closed:
+                # large downloads take long, only a stalled one times out
+                self._http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None, sock_read=READ_TIMEOUT))
+            session = self._http
+        left = deadline.check('deadline exceeded before fetching %s' % url)
+        timeout = session.timeout
+        if left is not None:
+            timeout = aiohttp.ClientTimeout(total=left, sock_read=timeout.sock_read)
+        async with session.request(method, url, headers=request_headers, data=data,
+                                   timeout=timeout, raise_for_status=True) as resp:
+            if path is None:
+                body = await resp.read()
+                size = len(body)
+            else:
+                body = None
+                size = await stream_to_file(resp, path, chunk_size)
+            return FetchResult(str(resp.url), resp.status, dict(resp.headers), size, path, body)
+
     async def implicitly_wait(self, time_to_wait):
         """
         Sets a sticky timeout to implicitly wait for an element to be found,
@@ -968,3 +1274,17 @@ class AsyncWebdriver(WebDriver, Asyncobject):
             driver.get_log('server')
         """
         return (await self.execute(Command.GET_LOG, {'type': log_type}))['value']
+
+    def log_stream(self, log_type='browser', max_size=1000):
+        """
+        Streams a log as an async iterator instead of polling get_log.
+
+        At most ``max_size`` unread entries are kept, older ones are dropped
+        and counted in the stream's ``dropped``.
+
+        :Usage:
+            async with driver.log_stream('browser') as stream:
+                async for entry in stream:
+                    print(entry['message'])
+        """
+        return PollingLogStream(self, log_type, max_size)
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import time
+
+try:
+    from urllib import parse
+except ImportError:  # above is available in py3+, below is py2.7
+    import urlparse as parse
+
+from selenium.common.exceptions import WebDriverException
+
+LOGGER = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class EndpointUnavailableException(WebDriverException):
+    """
+    Thrown when a command is refused or interrupted because the circuit
+    breaker of its driver endpoint is open.
+    """
+    pass
+
+
+class CircuitBreaker(object):
+    """
+    Tracks the health of one driver endpoint.
+
+    After ``failure_threshold`` consecutive connection level failures the
+    breaker opens: commands in flight to the endpoint are interrupted and new
+    ones fail immediately with EndpointUnavailableException. After
+    ``reset_timeout`` seconds one trial command is let through, its success
+    closes the breaker again.
+
+    A ``liveness`` callable, e.g. checking a local driver process, opens the
+    breaker as soon as it returns False. It is checked before every command
+    and every ``liveness_interval`` seconds while commands are in flight.
+    """
+
+    def __init__(self, endpoint, failure_threshold=3, reset_timeout=5.0,
+                 liveness=None, liveness_interval=0.05):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.liveness = liveness
+        self.liveness_interval = liveness_interval
+        self.failures = 0
+        self.reason = None
+        self._state = CLOSED
+        self._opened_at = None
+        self._trial = None
+        self._in_flight = set()
+        self._interrupted = set()
+        self._watcher = None
+        self._connections = 0
+
+    def __repr__(self):
+        return '<CircuitBreaker %s %s>' % (self.endpoint, self.state)
+
+    @property
+    def state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+        return self._state
+
+    def watch_process(self, process):
+        """Resets the breaker and opens it as soon as ``process`` (a Popen) exits."""
+        self.reset()
+        self.liveness = lambda: process.poll() is None
+
+    def close(self):
+        """Stops watching the liveness of the endpoint."""
+        if self._watcher is not None and not self._watcher.done():
+            self._watcher.cancel()
+        self._watcher = None
+
+    def reset(self):
+        self._state = CLOSED
+        self.failures = 0
+        self.reason = None
+        self._trial = None
+
+    def trip(self, reason):
+        """Opens the breaker and interrupts the commands in flight."""
+        if self._state != OPEN:
+            LOGGER.warning('circuit breaker for %s opened: %s', self.endpoint, reason)
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self.reason = reason
+        self._trial = None
+        current = asyncio.current_task() if _running() else None
+        for task in list(self._in_flight):
+            if task is not current and not task.done():
+                self._interrupted.add(task)
+                task.cancel()
+
+    def enter(self, task):
+        """Registers a command about to be sent, raising if the endpoint is down."""
+        if self.liveness is not None and not self.liveness():
+            self.trip('driver process is not running')
+        state = self.state
+        if state == OPEN or (state == HALF_OPEN and self._trial is not None):
+            raise EndpointUnavailableException('%s is unavailable: %s' % (self.endpoint, self.reason))
+        if state == HALF_OPEN:
+            self._trial = task
+        self._in_flight.add(task)
+        if self.liveness is not None and (self._watcher is None or self._watcher.done()):
+            self._watcher = asyncio.ensure_future(self._watch())
+
+    def exit(self, task):
+        self._in_flight.discard(task)
+        if self._trial is task:
+            self._trial = None
+
+    def interrupted(self, task):
+        """Returns True, once, if ``task`` was cancelled by trip()."""
+        if task in self._interrupted:
+            self._interrupted.discard(task)
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        if self._state != CLOSED:
+            LOGGER.info('circuit breaker for %s closed', self.endpoint)
+            self.reset()
+
+    def record_failure(self, exception):
+        self.failures += 1
+        if self.liveness is not None and not self.liveness():
+            self.trip('driver process is not running')
+        elif self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.trip('%d consecutive failures, last: %r' % (self.failures, exception))
+
+    async def _watch(self):
+        try:
+            while self._in_flight:
+                await asyncio.sleep(self.liveness_interval)
+                if self.liveness is not None and not self.liveness():
+                    self.trip('driver process is not running')
+        finally:
+            self._watcher = None
+
+
+def _running():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+_breakers = {}
+
+
+def endpoint_key(url):
+    parsed = parse.urlparse(url)
+    return '%s://%s' % (parsed.scheme, parsed.netloc)
+
+
+def get_breaker(url, **kwargs):
+    """
+    Returns the circuit breaker shared by every connection to the endpoint of ``url``.
+
+    Keyword arguments configure the breaker when it is created. Every
+    connection taking a breaker gives it back with release_breaker().
+    """
+    key = endpoint_key(url)
+    breaker = _breakers.get(key)
+    if breaker is None:
+        breaker = _breakers[key] = CircuitBreaker(key, **kwargs)
+    breaker._connections += 1
+    return breaker
+
+
+def release_breaker(breaker):
+    """
+    Gives back a breaker taken with get_breaker(), once its last connection
+    is closed it is dropped and a new connection to the endpoint, e.g. to a
+    driver started later on the same port, gets a fresh one.
+    """
+    breaker._connections -= 1
+    if breaker._connections <= 0:
+        if _breakers.get(breaker.endpoint) is breaker:
+            del _breakers[breaker.endpoint]
+        breaker.close()
@@ -0,0 +1,74 @@
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+
+class CommandEvent(object):
+    """
+    Describes one command sent by an AsyncRemoteConnection.
+
+    The same instance is handed to ``before_command`` and ``after_command``,
+    fields filled in by the request are:
+     - payload_size: size of the JSON body that was sent, in characters
+     - status: HTTP status code of the response, None if no response arrived
+     - response_size: size of the response body, in characters
+     - duration: time spent on the command in seconds
+     - exception: the exception raised while sending, if any
+    """
+    __slots__ = ('command', 'session_id', 'method', 'url', 'body', 'payload_size',
+                 'status', 'response_size', 'start', 'duration', 'exception')
+
+    def __init__(self, command, session_id, method, url, body=None):
+        self.command = command
+        self.session_id = session_id
+        self.method = method
+        self.url = url
+        self.body = body
+        self.payload_size = len(body) if body and method in ('POST', 'PUT') else 0
+        self.status = None
+        self.response_size = 0
+        self.start = None
+        self.duration = None
+        self.exception = None
+
+    def __repr__(self):
+        return '<CommandEvent %s session=%s status=%s duration=%s>' % (
+            self.command, self.session_id, self.status, self.duration)
+
+
+class AbstractCommandListener(object):
+    """
+    Base class for command hooks registered on an AsyncRemoteConnection.
+
+    Hooks are called inline for every command, implementations should be
+    cheap and must not block. Exceptions raised by a hook are logged and
+    never reach the caller of the command.
+
+    :Usage:
+        class Printer(AbstractCommandListener):
+            def after_command(self, event):
+                print(event.command, event.duration)
+
+        driver.command_executor.add_listener(Printer())
+    """
+
+    def before_command(self, event):
+        pass
+
+    def after_command(self, event):
+        pass
+
+    def on_exception(self, session_id, exception):
+        """
+        Called when a command of the session raised a WebDriverException or
+        an AsyncWebDriverWait on the session timed out.
+        """
+        pass
+
+
+def notify(listeners, hook, *args):
+    for listener in listeners:
+        try:
+            getattr(listener, hook)(*args)
+        except Exception:
+            LOGGER.exception('command listener %r failed in %s', listener, hook)
@@ -0,0 +1,176 @@
+"""
+Hedging and retries of idempotent commands.
+
+:Usage:
+    driver.command_policy = CommandPolicy(hedge_quantile=0.95, max_retries=2)
+"""
+
+import asyncio
+import logging
+import random
+import time
+
+from selenium.webdriver.remote.command import Command
+
+from asyncselenium.webdriver.remote.async_remote_connection import CONNECTION_ERRORS
+from asyncselenium.webdriver.support.command_metrics import LatencyHistogram
+
+LOGGER = logging.getLogger(__name__)
+
+# reads which can be sent twice without changing the page
+IDEMPOTENT_COMMANDS = frozenset([
+    Command.GET_TITLE,
+    Command.GET_CURRENT_URL,
+    Command.FIND_ELEMENTS,
+    Command.FIND_CHILD_ELEMENTS,
+    Command.GET_ELEMENT_TEXT,
+    Command.GET_ELEMENT_ATTRIBUTE,
+    Command.GET_ELEMENT_PROPERTY,
+    Command.GET_ELEMENT_TAG_NAME,
+    Command.GET_ELEMENT_VALUE_OF_CSS_PROPERTY,
+    Command.GET_ELEMENT_RECT,
+    Command.GET_ELEMENT_SIZE,
+    Command.GET_ELEMENT_LOCATION,
+    Command.IS_ELEMENT_SELECTED,
+    Command.IS_ELEMENT_ENABLED,
+])
+
+
+class RetryBudget(object):
+    """
+    Token bucket limiting extra requests to a fraction of the traffic.
+
+    Every command deposits ``ratio`` tokens up to ``capacity``, every hedge
+    or retry withdraws one, so under a widespread outage extra requests stay
+    around ``ratio`` of the load instead of multiplying it.
+    """
+
+    def __init__(self, ratio=0.1, capacity=10.0):
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = capacity
+
+    def deposit(self):
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self):
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class CommandPolicy(object):
+    """
+    Opt-in policy reducing the tail latency of idempotent commands.
+
+    A command still running after the ``hedge_quantile`` of its observed
+    latency gets a duplicate request and the first answer wins. Connection
+    level failures are retried with jittered exponential backoff. Hedges and
+    retries share one RetryBudget.
+
+    :Args:
+     - hedge_quantile - latency quantile after which a duplicate is sent, None disables hedging
+     - hedge_delay - fixed hedging delay in seconds, overrides the quantile
+     - min_samples - samples of a command needed before hedging it on its quantile
+     - min_hedge_delay - lower bound of the hedging delay in seconds
+     - max_retries - retries of a connection failure, 0 disables retrying
+     - backoff - base of the exponential backoff in seconds
+     - max_backoff - upper bound of a backoff in seconds
+     - budget - a RetryBudget, shared between drivers to bound their total extra load
+     - commands - commands the policy applies to
+    """
+
+    def __init__(self, hedge_quantile=0.95, hedge_delay=None, min_samples=20, min_hedge_delay=0.01,
+                 max_retries=2, backoff=0.05, max_backoff=1.0, budget=None,
+                 commands=IDEMPOTENT_COMMANDS):
+        self.hedge_quantile = hedge_quantile
+        self.hedge_delay = hedge_delay
+        self.min_samples = min_samples
+        self.min_hedge_delay = min_hedge_delay
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = budget if budget is not None else RetryBudget()
+        self.commands = frozenset(commands)
+        self.latency = {}
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retries = 0
+        self.denied = 0
+
+    def applies(self, command):
+        return command in self.commands
+
+    def delay(self, command):
+        """Returns the hedging delay of ``command``, None when it is not hedged yet."""
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        histogram = self.latency.get(command)
+        if self.hedge_quantile is None or histogram is None or histogram.count < self.min_samples:
+            return None
+        return max(self.min_hedge_delay, histogram.quantile(self.hedge_quantile))
+
+    def _record(self, command, duration):
+        histogram = self.latency.get(command)
+        if histogram is None:
+            histogram = self.latency[command] = LatencyHistogram()
+        histogram.record(duration)
+
+    def _spend(self):
+        if self.budget.withdraw():
+            return True
+        self.denied += 1
+        return False
+
+    async def execute(self, executor, command, params):
+        """Sends ``command`` through ``executor`` and returns its response."""
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                return await self._hedged(executor, command, params)
+            except CONNECTION_ERRORS as e:
+                if attempt >= self.max_retries or not self._spend():
+                    raise
+                attempt += 1
+                self.retries += 1
+                pause = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                LOGGER.debug('retrying %s in %.3fs after %r', command, pause, e)
+                await asyncio.sleep(pause)
+
+    async def _attempt(self, executor, command, params):
+        started = time.perf_counter()
+        # the connection consumes sessionId out of the params, every attempt gets a copy
+        response = await executor.execute(command, dict(params) if params else params)()
+        self._record(command, time.perf_counter() - started)
+        return response
+
+    async def _hedged(self, executor, command, params):
+        delay = self.delay(command)
+        if delay is None:
+            return await self._attempt(executor, command, params)
+        first = asyncio.ensure_future(self._attempt(executor, command, params))
+        try:
+            done, _ = await asyncio.wait((first,), timeout=delay)
+            if done or not self._spend():
+                return await first
+            self.hedges += 1
+            second = asyncio.ensure_future(self._attempt(executor, command, params))
+            pending = {first, second}
+            try:
+                while True:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    answered = [task for task in done if task.exception() is None]
+                    if answered:
+                        if answered[0] is second:
+                            self.hedge_wins += 1
+                        return answered[0].result()
+                    if not pending:
+                        return done.pop().result()
+            finally:
+                for task in pending:
+                    task.cancel()
+        finally:
+            if not first.done():
+                first.cancel()
@@ -0,0 +1,100 @@
+"""
+Deadlines shared by every command sent within them.
+
+:Usage:
+    async with driver.deadline(30):
+        await driver.get('https://www.baidu.com')
+        await AsyncWebDriverWait(driver, 60).until(ec.title_contains('baidu'))
+"""
+
+import asyncio
+import contextvars
+import time
+
+from selenium.common.exceptions import TimeoutException
+
+# monotonic time at which the innermost deadline of the current context expires
+_deadline = contextvars.ContextVar('asyncselenium_deadline', default=None)
+
+
+class DeadlineExceeded(TimeoutException):
+    """
+    Thrown when the time budget of a deadline ran out.
+    """
+    pass
+
+
+def remaining():
+    """Returns the seconds left before the current deadline, None without one."""
+    when = _deadline.get()
+    if when is None:
+        return None
+    return when - time.monotonic()
+
+
+def check(message='deadline exceeded'):
+    """
+    Raises DeadlineExceeded if the current deadline has passed.
+
+    :Returns:
+     - the seconds left, None without a deadline
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(message)
+    return left
+
+
+class Deadline(object):
+    """
+    Async context manager bounding everything awaited inside it to ``seconds``.
+
+    Requests are sent with the remaining time as their timeout, or not at
+    all once it is spent, AsyncWebDriverWait gives up at the deadline. When
+    the time runs out the task that entered the deadline is cancelled and
+    DeadlineExceeded is raised out of the block. Nested deadlines can only
+    shorten the budget.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expired = False
+        self.when = None
+        self._token = None
+        self._task = None
+        self._handle = None
+
+    async def __aenter__(self):
+        when = time.monotonic() + self.seconds
+        outer = _deadline.get()
+        if outer is not None and outer <= when:
+            # the outer deadline comes first and will cancel
+            self.when = outer
+        else:
+            self.when = when
+            self._task = asyncio.current_task()
+            self._handle = asyncio.get_running_loop().call_later(self.seconds, self._expire)
+        self._token = _deadline.set(self.when)
+        return self
+
+    def _expire(self):
+        self.expired = True
+        self._task.cancel()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._handle is not None:
+            self._handle.cancel()
+        _deadline.reset(self._token)
+        if self.expired and exc_type is not None and issubclass(exc_type, asyncio.CancelledError):
+            uncancel = getattr(self._task, 'uncancel', None)
+            if uncancel is not None:
+                uncancel()
+            raise DeadlineExceeded('deadline of %ss exceeded' % self.seconds) from exc
+        return False
+
+    @property
+    def remaining(self):
+        """Seconds left, None before the block is entered."""
+        if self.when is None:
+            return None
+        return self.when - time.monotonic()
@@ -0,0 +1,82 @@
+"""
+Direct HTTP downloads authenticated with the cookies of a session.
+"""
+
+import asyncio
+import collections
+import os
+import time
+
+try:
+    from urllib import parse
+except ImportError:  # above is available in py3+, below is py2.7
+    import urlparse as parse
+
+from asyncselenium.webdriver.remote.session_state import cookie_sent_to
+
+CHUNK_SIZE = 64 * 1024
+
+# seconds a download may stall, its total time is not bounded
+READ_TIMEOUT = 60
+
+FetchResult = collections.namedtuple('FetchResult', 'url status headers size path body')
+FetchResult.__doc__ = """
+Outcome of AsyncWebdriver.fetch().
+
+``body`` holds the content when no path was given, ``path`` the file it was
+streamed to otherwise.
+"""
+
+
+def cookie_header(cookies, url, now=None):
+    """
+    Builds the Cookie header a browser would send to ``url``.
+
+    Cookies are filtered on domain, host-only cookies going to their host
+    alone, path, secure flag and expiry, longer paths come first.
+    """
+    parsed = parse.urlparse(url)
+    host = parsed.hostname or ''
+    path = parsed.path or '/'
+    now = time.time() if now is None else now
+    selected = []
+    for cookie in cookies:
+        if not cookie_sent_to(cookie, host):
+            continue
+        cookie_path = cookie.get('path') or '/'
+        if not (path == cookie_path or path.startswith(cookie_path.rstrip('/') + '/')):
+            continue
+        if cookie.get('secure') and parsed.scheme != 'https':
+            continue
+        if cookie.get('expiry') is not None and cookie['expiry'] <= now:
+            continue
+        selected.append(cookie)
+    selected.sort(key=lambda cookie: -len(cookie.get('path') or '/'))
+    return '; '.join('%s=%s' % (cookie['name'], cookie['value']) for cookie in selected)
+
+
+async def stream_to_file(response, path, chunk_size=CHUNK_SIZE):
+    """
+    Writes the body of an aiohttp response to ``path`` chunk by chunk.
+
+    The file is written next to ``path`` and moved in place once complete,
+    writes run in the default executor so the loop keeps serving commands.
+
+    :Returns:
+     - the number of bytes written
+    """
+    loop = asyncio.get_running_loop()
+    partial = os.fspath(path) + '.part'
+    size = 0
+    f = await loop.run_in_executor(None, open, partial, 'wb')
+    try:
+        async for chunk in response.content.iter_chunked(chunk_size):
+            await loop.run_in_executor(None, f.write, chunk)
+            size += len(chunk)
+    except BaseException:
+        f.close()
+        os.remove(partial)
+        raise
+    await loop.run_in_executor(None, f.close)
+    os.replace(partial, path)
+    return size
@@ -0,0 +1,132 @@
+"""
+Browser logs delivered as an async iterator.
+
+:Usage:
+    async with driver.log_stream('browser') as stream:
+        async for entry in stream:
+            print(entry['level'], entry['message'])
+"""
+
+import asyncio
+import collections
+
+
+class LogStream(object):
+    """
+    A bounded buffer of log entries read with ``async for``.
+
+    Entries are dicts in the get_log format: level, message, source and
+    timestamp in milliseconds. When the reader falls behind and
+    ``max_size`` entries are waiting, the oldest ones are dropped and
+    counted in ``dropped``. Subclasses feed the buffer with push() from
+    _open() on, a LogStream itself is fed by its owner.
+
+    :Args:
+     - max_size - number of entries kept until they are read
+    """
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self.received = 0
+        self.dropped = 0
+        self._entries = collections.deque()
+        self._ready = None
+        self._error = None
+        self._started = False
+        self._closed = False
+
+    def push(self, entry):
+        if len(self._entries) >= self.max_size:
+            self._entries.popleft()
+            self.dropped += 1
+        self._entries.append(entry)
+        self.received += 1
+        if self._ready is not None:
+            self._ready.set()
+
+    def fail(self, error):
+        """Ends the stream with ``error``, raised once the buffered entries are read."""
+        self._error = error
+        if self._ready is not None:
+            self._ready.set()
+
+    async def start(self):
+        if not self._started:
+            self._started = True
+            self._ready = asyncio.Event()
+            await self._open()
+        return self
+
+    async def close(self):
+        if self._started and not self._closed:
+            self._closed = True
+            await self._close()
+            self._ready.set()
+
+    async def _open(self):
+        """Starts feeding the buffer, nothing to do when entries are pushed from outside."""
+
+    async def _close(self):
+        """Stops feeding the buffer."""
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self.start()
+        while not self._entries:
+            if self._error is not None:
+                raise self._error
+            if self._closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        return self._entries.popleft()
+
+
+class PollingLogStream(LogStream):
+    """
+    Streams a log by polling get_log, which returns the entries buffered
+    since the previous call.
+
+    The interval shrinks to ``min_interval`` while entries keep coming and
+    doubles up to ``max_interval`` while the log is quiet.
+
+    :Args:
+     - driver - the async driver
+     - log_type - type of log, e.g. 'browser' or 'driver'
+    """
+
+    def __init__(self, driver, log_type='browser', max_size=1000, min_interval=0.05, max_interval=1):
+        super().__init__(max_size)
+        self.driver = driver
+        self.log_type = log_type
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._task = None
+
+    async def _open(self):
+        self._task = asyncio.ensure_future(self._poll())
+
+    async def _close(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _poll(self):
+        interval = self.min_interval
+        while True:
+            try:
+                entries = await self.driver.get_log(self.log_type)
+            except Exception as e:
+                self.fail(e)
+                return
+            for entry in entries:
+                self.push(entry)
+            interval = self.min_interval if entries else min(interval * 2, self.max_interval)
+            await asyncio.sleep(interval)
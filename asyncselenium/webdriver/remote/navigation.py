@@ -0,0 +1,110 @@
+"""
+Conditions ending a navigation before the page load event.
+
+get(url, until=...) accepts:
+ - 'domcontentloaded' - the document is parsed
+ - 'networkidle' - no request finished or, with DevTools, was in flight for
+   ``idle_time`` seconds
+ - a (By, value) locator - an element matching it exists
+
+Once the condition holds the rest of the load is stopped, so following
+commands do not wait for it under the 'normal' page load strategy. Chrome
+navigates over DevTools and returns as soon as the condition holds, other
+drivers check it once the navigation command returns, which is early only
+under the 'eager' or 'none' page load strategy.
+"""
+
+import json
+
+from selenium.common.exceptions import InvalidArgumentException
+from selenium.webdriver.common.by import By
+
+DOM_CONTENT_LOADED = 'domcontentloaded'
+NETWORK_IDLE = 'networkidle'
+
+# seconds without network activity meaning the network is idle
+IDLE_TIME = 0.5
+# seconds between two checks of a condition
+POLL_FREQUENCY = 0.05
+
+READY_STATE_SCRIPT = 'return document.readyState'
+
+# resource timing entries are reported when a request finishes, in flight
+# requests are not seen, hence the idle time is counted from the last one
+NETWORK_IDLE_SCRIPT = '''
+if (window.__asyncseleniumLastResource === undefined) {
+    window.__asyncseleniumLastResource = performance.now();
+    new PerformanceObserver(function () {
+        window.__asyncseleniumLastResource = performance.now();
+    }).observe({entryTypes: ['resource']});
+}
+return document.readyState !== 'loading' && performance.now() - window.__asyncseleniumLastResource >= arguments[0];
+'''
+
+STOP_LOADING_SCRIPT = "if (document.readyState !== 'complete') { window.stop(); }"
+
+
+def check_until(until):
+    """Raises InvalidArgumentException if ``until`` is not a navigation condition."""
+    if until in (DOM_CONTENT_LOADED, NETWORK_IDLE):
+        return until
+    if isinstance(until, (tuple, list)) and len(until) == 2:
+        return tuple(until)
+    raise InvalidArgumentException("until must be 'domcontentloaded', 'networkidle' or a (By, value) locator")
+
+
+def locator_expression(by, value):
+    """
+    Returns a JavaScript expression true when an element matches the
+    locator, None for locators without a selector equivalent.
+    """
+    if by == By.XPATH:
+        return ('document.evaluate(%s, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null)'
+                '.singleNodeValue !== null' % json.dumps(value))
+    if by == By.ID:
+        selector = '[id=%s]' % json.dumps(value)
+    elif by == By.NAME:
+        selector = '[name=%s]' % json.dumps(value)
+    elif by == By.CLASS_NAME:
+        selector = '.' + value
+    elif by in (By.TAG_NAME, By.CSS_SELECTOR):
+        selector = value
+    else:
+        return None
+    return 'document.querySelector(%s) !== null' % json.dumps(selector)
+
+
+class NetworkIdleTracker(object):
+    """
+    Counts the requests of a page in flight from DevTools Network events.
+
+    :Args:
+     - clock - callable returning the time in seconds
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.in_flight = set()
+        self.last_activity = clock()
+        self._handlers = {'Network.requestWillBeSent': self._started,
+                          'Network.loadingFinished': self._finished,
+                          'Network.loadingFailed': self._finished}
+
+    def attach(self, session):
+        for event, handler in self._handlers.items():
+            session.on(event, handler)
+
+    def detach(self, session):
+        for event, handler in self._handlers.items():
+            session.off(event, handler)
+
+    def _started(self, params):
+        self.in_flight.add(params.get('requestId'))
+        self.last_activity = self.clock()
+
+    def _finished(self, params):
+        self.in_flight.discard(params.get('requestId'))
+        self.last_activity = self.clock()
+
+    def idle(self, idle_time):
+        return not self.in_flight and self.clock() - self.last_activity >= idle_time
@@ -0,0 +1,65 @@
+"""
+Load timings of the pages a driver navigates to.
+
+:Usage:
+    async def report(load):
+        print(load.url, load.elapsed, load.navigation['ttfb'], load.metrics.get('JSHeapUsedSize'))
+
+    driver.enable_telemetry(report)
+    await driver.get('https://www.baidu.com')
+"""
+
+import collections
+
+PageLoad = collections.namedtuple('PageLoad', 'command url elapsed navigation resources metrics')
+PageLoad.__doc__ = """
+A page load reported to the telemetry callback.
+
+``elapsed`` is the time the navigation command took as seen by the client,
+``navigation`` the phases of the Navigation Timing entry in milliseconds,
+``resources`` a summary of the Resource Timing entries and ``metrics`` the
+DevTools Performance.getMetrics values, empty when the browser has none.
+"""
+
+# a single round trip after the load, the page does the summing
+TELEMETRY_SCRIPT = '''
+var slowest = arguments[0];
+var round = function (value) { return Math.round(value * 10) / 10; };
+var nav = performance.getEntriesByType('navigation')[0];
+var navigation = null;
+if (nav) {
+    navigation = {
+        type: nav.type,
+        redirect: round(nav.redirectEnd - nav.redirectStart),
+        dns: round(nav.domainLookupEnd - nav.domainLookupStart),
+        connect: round(nav.connectEnd - nav.connectStart),
+        ttfb: round(nav.responseStart - nav.requestStart),
+        download: round(nav.responseEnd - nav.responseStart),
+        domInteractive: round(nav.domInteractive),
+        domContentLoaded: round(nav.domContentLoadedEventEnd),
+        load: round(nav.loadEventEnd),
+        transferSize: nav.transferSize || 0
+    };
+}
+var entries = performance.getEntriesByType('resource');
+var byType = {};
+var transferSize = 0;
+for (var i = 0; i < entries.length; i++) {
+    var entry = entries[i];
+    var kind = byType[entry.initiatorType] || (byType[entry.initiatorType] = {count: 0, transferSize: 0, duration: 0});
+    kind.count += 1;
+    kind.transferSize += entry.transferSize || 0;
+    kind.duration = round(kind.duration + entry.duration);
+    transferSize += entry.transferSize || 0;
+}
+var sorted = entries.slice().sort(function (a, b) { return b.duration - a.duration; });
+return {url: location.href,
+        navigation: navigation,
+        resources: {count: entries.length, transferSize: transferSize, byType: byType,
+                    slowest: sorted.slice(0, slowest).map(function (entry) {
+                        return {name: entry.name, type: entry.initiatorType, duration: round(entry.duration)};
+                    })}};
+'''
+
+# resources listed by duration in PageLoad.resources['slowest']
+SLOWEST_RESOURCES = 5
@@ -0,0 +1,252 @@
+"""
+Snapshots of the authenticated state of a session.
+
+A state is a JSON serializable dict of the page origin, its cookies in the
+WebDriver format and the contents of localStorage and sessionStorage.
+
+:Usage:
+    cache = SessionStateCache(ttl=3600, path='/tmp/states')
+
+    async def login(driver):
+        await driver.get('https://example.com/login')
+        ...
+
+    await cache.restore(driver, 'alice', login)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+try:
+    from urllib import parse
+except ImportError:  # above is available in py3+, below is py2.7
+    import urlparse as parse
+
+# one round trip for both storages, keys are read with key() so every entry is seen
+EXPORT_STORAGE_SCRIPT = '''
+var dump = function (storage) {
+    var items = {};
+    for (var i = 0; i < storage.length; i++) {
+        var key = storage.key(i);
+        items[key] = storage.getItem(key);
+    }
+    return items;
+};
+return {origin: window.location.origin,
+        localStorage: dump(window.localStorage),
+        sessionStorage: dump(window.sessionStorage)};
+'''
+
+IMPORT_STORAGE_SCRIPT = '''
+var load = function (storage, items) {
+    for (var key in items) {
+        storage.setItem(key, items[key]);
+    }
+};
+load(window.localStorage, arguments[0] || {});
+load(window.sessionStorage, arguments[1] || {});
+'''
+
+
+def cookie_matches(cookie, host):
+    """Returns True if ``cookie`` can be set on a page of ``host``."""
+    domain = (cookie.get('domain') or '').lstrip('.')
+    return not domain or host == domain or host.endswith('.' + domain)
+
+
+def cookie_sent_to(cookie, host):
+    """
+    Returns True if a browser sends ``cookie`` to ``host``. Domain cookies,
+    reported with a leading dot, go to subdomains as well, host-only ones
+    only to their host.
+    """
+    domain = cookie.get('domain') or ''
+    if domain and not domain.startswith('.'):
+        return host == domain
+    return cookie_matches(cookie, host)
+
+
+def live_cookies(cookies, now=None):
+    """Returns the cookies which have not expired."""
+    now = time.time() if now is None else now
+    return [cookie for cookie in cookies if cookie.get('expiry') is None or cookie['expiry'] > now]
+
+
+def cookie_key(cookie):
+    return cookie['name'], (cookie.get('domain') or '').lstrip('.'), cookie.get('path') or '/'
+
+
+# attributes compared by cookie_diff, besides the name, domain and path
+_COOKIE_FIELDS = ('value', 'secure', 'httpOnly', 'expiry', 'sameSite')
+
+
+def cookie_diff(current, desired):
+    """
+    Compares the cookies a session has to the ones it should have.
+
+    Cookies are identified by name, domain and path, a desired cookie
+    without a domain matches one of the same name and path on any domain.
+    Attributes the desired cookie leaves out are not compared.
+
+    :Returns:
+     - (cookies to add or overwrite, names of the cookies to delete)
+    """
+    existing = {cookie_key(cookie): cookie for cookie in current}
+    matched = set()
+    changed = []
+    for cookie in desired:
+        name, domain, path = cookie_key(cookie)
+        if domain:
+            keys = [(name, domain, path)]
+        else:
+            keys = [key for key in existing if key[0] == name and key[2] == path]
+        key = next((key for key in keys if key in existing), None)
+        have = existing.get(key)
+        if have is None or any(have.get(field) != cookie[field] for field in _COOKIE_FIELDS if field in cookie):
+            changed.append(cookie)
+        matched.add(key)
+        matched.add((name, domain, path))
+    wanted = {cookie['name'] for cookie in desired}
+    stale = sorted({key[0] for key in existing if key not in matched} - wanted)
+    return changed, stale
+
+
+def cdp_to_webdriver(cookie):
+    """Converts a Chrome DevTools cookie to the WebDriver format."""
+    result = {'name': cookie['name'], 'value': cookie['value'],
+              'domain': cookie.get('domain'), 'path': cookie.get('path', '/'),
+              'secure': cookie.get('secure', False), 'httpOnly': cookie.get('httpOnly', False)}
+    if not cookie.get('session', False) and cookie.get('expires', -1) > 0:
+        result['expiry'] = int(cookie['expires'])
+    if cookie.get('sameSite'):
+        result['sameSite'] = cookie['sameSite']
+    return result
+
+
+def webdriver_to_cdp(cookie):
+    """
+    Converts a WebDriver cookie to Network.setCookies parameters.
+
+    Host-only cookies, whose domain has no leading dot, are set by url so
+    they stay host-only instead of becoming domain cookies.
+    """
+    result = {'name': cookie['name'], 'value': cookie['value'],
+              'domain': cookie.get('domain'), 'path': cookie.get('path', '/'),
+              'secure': cookie.get('secure', False), 'httpOnly': cookie.get('httpOnly', False)}
+    domain = result['domain']
+    if domain and not domain.startswith('.'):
+        del result['domain']
+        result['url'] = '%s://%s%s' % ('https' if result['secure'] else 'http', domain, result['path'] or '/')
+    if cookie.get('expiry') is not None:
+        result['expires'] = cookie['expiry']
+    if cookie.get('sameSite'):
+        result['sameSite'] = cookie['sameSite']
+    return result
+
+
+def origin_host(origin):
+    return parse.urlparse(origin or '').hostname or ''
+
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def _origin_key(url):
+    parsed = parse.urlparse(url or '')
+    try:
+        port = parsed.port
+    except ValueError:
+        return None
+    return parsed.scheme, parsed.hostname, port or _DEFAULT_PORTS.get(parsed.scheme)
+
+
+def same_origin(url, origin):
+    """Returns True if ``url`` is on ``origin``, comparing scheme, host and port."""
+    key = _origin_key(url)
+    return key is not None and key[1] is not None and key == _origin_key(origin)
+
+
+class SessionStateCache(object):
+    """
+    States of logged in sessions keyed by account.
+
+    restore() imports the cached state of an account into a session, or
+    runs the login once, even for concurrent callers, and caches its
+    result. States older than ``ttl`` seconds are dropped. With a ``path``
+    states are also kept as JSON files there and survive the process.
+
+    :Args:
+     - ttl - seconds a state stays valid, forever if None
+     - path - optional directory persisting the states
+    """
+
+    def __init__(self, ttl=None, path=None):
+        self.ttl = ttl
+        self.path = path
+        self._states = {}
+        self._locks = {}
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def _file(self, account):
+        return os.path.join(self.path, hashlib.sha1(str(account).encode('utf-8')).hexdigest() + '.json')
+
+    def _valid(self, state):
+        return state is not None and (self.ttl is None or time.time() - state.get('time', 0) < self.ttl)
+
+    def get(self, account):
+        """Returns the valid state of ``account``, None if there is none."""
+        state = self._states.get(account)
+        if state is None and self.path is not None:
+            try:
+                with open(self._file(account)) as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = None
+        if not self._valid(state):
+            self.invalidate(account)
+            return None
+        self._states[account] = state
+        return state
+
+    def put(self, account, state):
+        self._states[account] = state
+        if self.path is not None:
+            with open(self._file(account), 'w') as f:
+                json.dump(state, f)
+
+    def invalidate(self, account):
+        """Forgets the state of ``account``, e.g. after the site logged it out."""
+        self._states.pop(account, None)
+        if self.path is not None:
+            try:
+                os.remove(self._file(account))
+            except OSError:
+                pass
+
+    async def restore(self, driver, account, login=None):
+        """
+        Makes ``driver`` authenticated as ``account``.
+
+        :Args:
+         - login - coroutine function taking the driver, run when no state is cached
+
+        :Returns:
+         - True if a cached state was imported, False if the login ran
+        """
+        lock = self._locks.get(account)
+        if lock is None:
+            lock = self._locks[account] = asyncio.Lock()
+        async with lock:
+            state = self.get(account)
+            if state is None:
+                if login is None:
+                    raise KeyError('no session state cached for %r' % (account,))
+                await login(driver)
+                self.put(account, await driver.export_state())
+                return False
+        await driver.import_state(state)
+        return True
@@ -0,0 +1,244 @@
+"""
+Adaptive limits for in-flight commands and active sessions.
+
+The limits follow the gradient between the long term and the recent command
+latency: they grow while latency stays near its baseline and shrink as soon
+as it climbs or connections fail.
+
+:Usage:
+    controller = ConcurrencyController()
+    controller.install()
+    async with controller.session(command_executor=grid_url, options=options) as driver:
+        await driver.get('https://www.baidu.com')
+    print(prometheus_text(controller))
+"""
+
+import asyncio
+import collections
+import math
+
+from asyncselenium.webdriver.remote.async_remote_connection import (AsyncRemoteConnection, CONNECTION_ERRORS,
+                                                                   PAGE_LOAD_COMMANDS)
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.remote.command_listener import AbstractCommandListener
+from asyncselenium.webdriver.support.command_metrics import _escape
+
+# statuses of an overloaded grid or proxy
+OVERLOAD_STATUSES = (502, 503, 504)
+
+
+class AdaptiveLimiter(object):
+    """
+    Concurrency limit adjusted from observed latencies.
+
+    Each sample updates a short and a long exponential moving average of the
+    latency. The limit moves towards ``limit * gradient + sqrt(limit)``, where
+    the gradient ``tolerance * long / short`` is clamped to [0.5, 1]: a stable
+    latency lets the limit grow by about its square root, a latency above
+    ``tolerance`` times the baseline shrinks it by up to half. Errors cut the
+    limit by ``backoff``. The limit only grows while at least half of it is
+    used, so an idle client does not inflate it.
+
+    :Args:
+     - initial_limit, min_limit, max_limit - bounds of the limit
+     - tolerance - latency increase over the baseline accepted without shrinking
+     - smoothing - weight of a new sample in the short average and of the new limit
+     - long_window - number of samples the long average roughly covers
+     - backoff - factor applied to the limit on an error
+    """
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=100, tolerance=1.5,
+                 smoothing=0.2, long_window=100, backoff=0.9):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.long_alpha = 2.0 / (long_window + 1)
+        self.backoff = backoff
+        self.in_flight = 0
+        self.short_rtt = None
+        self.long_rtt = None
+        self.samples = 0
+        self.errors = 0
+        self._waiters = collections.deque()
+
+    def __repr__(self):
+        return '<AdaptiveLimiter limit=%d in_flight=%d waiting=%d>' % (
+            self.current_limit, self.in_flight, self.waiting)
+
+    @property
+    def current_limit(self):
+        return max(self.min_limit, int(self.limit))
+
+    @property
+    def waiting(self):
+        return len(self._waiters)
+
+    async def acquire(self):
+        """Waits until the number in flight is below the limit and takes a slot."""
+        if not self._waiters and self.in_flight < self.current_limit:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over right before the cancellation
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, duration=None, error=False):
+        """
+        Frees a slot.
+
+        :Args:
+         - duration - latency of the finished work in seconds, None for no sample
+         - error - whether the work failed in a way signalling overload
+        """
+        self.in_flight -= 1
+        if error:
+            self.on_error()
+        elif duration is not None:
+            self.observe(duration)
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.current_limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def observe(self, rtt):
+        """Adjusts the limit to a latency sample in seconds."""
+        self.samples += 1
+        if self.short_rtt is None:
+            self.short_rtt = self.long_rtt = rtt
+            return
+        self.short_rtt += self.smoothing * (rtt - self.short_rtt)
+        self.long_rtt += self.long_alpha * (rtt - self.long_rtt)
+        if self.long_rtt > 2 * self.short_rtt:
+            # latency dropped for good, let the baseline follow faster
+            self.long_rtt *= 0.95
+        if self.short_rtt <= 0:
+            return
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_rtt / self.short_rtt))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        if target > self.limit and self.in_flight + 1 < self.limit / 2:
+            return
+        limit = self.limit * (1 - self.smoothing) + target * self.smoothing
+        self.limit = float(min(self.max_limit, max(self.min_limit, limit)))
+        self._wake()
+
+    def on_error(self):
+        self.errors += 1
+        self.limit = float(max(self.min_limit, self.limit * self.backoff))
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *args):
+        self.release()
+
+
+class ConcurrencyController(AbstractCommandListener):
+    """
+    Drives a command limiter and a session limiter from command latencies.
+
+    The command limiter gates the requests of the connections it is
+    installed on, except new sessions. The session limiter follows the
+    latency of the same commands and gates new sessions created through
+    session(). Neither takes the latency of new sessions and page loads
+    into its baseline.
+    """
+
+    def __init__(self, commands=None, sessions=None):
+        self.commands = commands if commands is not None else AdaptiveLimiter(initial_limit=16, max_limit=256)
+        self.sessions = sessions if sessions is not None else AdaptiveLimiter(initial_limit=4, max_limit=64)
+
+    def install(self, connection=None):
+        """Gates and observes ``connection``, or every new connection by default."""
+        if connection is None:
+            AsyncRemoteConnection.set_default_limiter(self.commands)
+            AsyncRemoteConnection.add_default_listener(self)
+        else:
+            connection.limiter = self.commands
+            connection.add_listener(self)
+
+    def uninstall(self, connection=None):
+        if connection is None:
+            AsyncRemoteConnection.set_default_limiter(None)
+            AsyncRemoteConnection.remove_default_listener(self)
+        else:
+            connection.limiter = None
+            connection.remove_listener(self)
+
+    def after_command(self, event):
+        if event.session_id is None:
+            # session creation is far slower than commands, keep it out of the baseline
+            return
+        if isinstance(event.exception, CONNECTION_ERRORS) or event.status in OVERLOAD_STATUSES:
+            self.sessions.on_error()
+        elif event.exception is None and event.command not in PAGE_LOAD_COMMANDS:
+            self.sessions.observe(event.duration)
+
+    def session(self, driver_cls=AsyncWebdriver, **kwargs):
+        """
+        Async context manager creating a driver once a session slot is free
+        and quitting it on exit.
+        """
+        return _LimitedSession(self.sessions, driver_cls, kwargs)
+
+    def snapshot(self):
+        return {name: {'limit': limiter.current_limit,
+                       'in_flight': limiter.in_flight,
+                       'waiting': limiter.waiting,
+                       'errors': limiter.errors}
+                for name, limiter in (('commands', self.commands), ('sessions', self.sessions))}
+
+
+class _LimitedSession(object):
+
+    def __init__(self, limiter, driver_cls, kwargs):
+        self._limiter = limiter
+        self._driver_cls = driver_cls
+        self._kwargs = kwargs
+        self._driver = None
+
+    async def __aenter__(self):
+        await self._limiter.acquire()
+        try:
+            self._driver = await self._driver_cls(**self._kwargs)
+        except BaseException:
+            self._limiter.release()
+            raise
+        return self._driver
+
+    async def __aexit__(self, *args):
+        try:
+            await self._driver.quit()
+        finally:
+            self._limiter.release()
+
+
+def prometheus_text(controller, prefix='asyncselenium'):
+    """Renders the limits of a ConcurrencyController as Prometheus gauges."""
+    gauges = (('concurrency_limit', 'Current adaptive concurrency limit.', 'limit'),
+              ('concurrency_in_flight', 'Work currently holding a slot.', 'in_flight'),
+              ('concurrency_waiting', 'Work waiting for a slot.', 'waiting'))
+    snapshot = controller.snapshot()
+    lines = []
+    for metric, help_text, key in gauges:
+        name = '%s_%s' % (prefix, metric)
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s gauge' % name)
+        for kind, stats in sorted(snapshot.items()):
+            lines.append('%s{kind="%s"} %d' % (name, _escape(kind), stats[key]))
+    return '\n'.join(lines) + '\n'
@@ -21,6 +21,7 @@ from selenium.common.exceptions import StaleElementReferenceException
 from selenium.common.exceptions import WebDriverException
 from selenium.common.exceptions import NoAlertPresentException
 from asyncselenium.webdriver.remote.async_webelement import AsyncWebElement
+from asyncselenium.common.async_alert import AsyncAlert
 
 """
  * Canned "Expected Conditions" which are generally useful within webdriver
@@ -391,18 +392,37 @@ class new_window_is_opened(object):
         return len(await driver.window_handles) > len(self.current_handles)
 
 
+def _dialog_watcher(driver):
+    """Returns the DialogWatcher of the driver's current window, None to poll instead."""
+    watcher = getattr(driver, 'dialog_watcher', None)
+    if watcher is None or watcher.handle != getattr(driver, '_current_window_handle', None):
+        return None
+    return watcher
+
+
 class alert_is_present(object):
-    """ Expect an alert to be present."""
+    """ Expect an alert to be present.
+
+    Drivers watching the dialogs of their current window over DevTools
+    answer without a request and wake up the wait as soon as a dialog
+    opens or closes."""
     def __init__(self):
         pass
 
     async def __call__(self, driver):
+        watcher = _dialog_watcher(driver)
+        if watcher is not None:
+            return AsyncAlert(driver) if watcher.current is not None else False
         try:
             alert = await driver.switch_to.alert
             return alert
         except NoAlertPresentException:
             return False
 
+    def wakeup(self, driver):
+        watcher = _dialog_watcher(driver)
+        return watcher.changed() if watcher is not None else None
+
 
 async def _find_element(driver, by):
     """Looks up an element. Logs and re-raises ``WebDriverException``
@@ -21,6 +21,7 @@ import asyncio
 from typing import Awaitable
 from selenium.common.exceptions import NoSuchElementException
 from selenium.common.exceptions import TimeoutException
+from asyncselenium.webdriver.remote import deadline
 
 POLL_FREQUENCY = 0.5  # How long to sleep inbetween calls to the method
 IGNORED_EXCEPTIONS = (NoSuchElementException,)  # exceptions ignored during calls to the method
@@ -68,7 +69,8 @@ class AsyncWebDriverWait:
         screen = None
         stacktrace = None
 
-        end_time = time.time() + self._timeout
+        timeout, limited = self._budget()
+        end_time = time.time() + timeout
         while True:
             try:
                 value = await method(self._driver)
@@ -77,15 +79,18 @@ class AsyncWebDriverWait:
             except self._ignored_exceptions as exc:
                 screen = getattr(exc, 'screen', None)
                 stacktrace = getattr(exc, 'stacktrace', None)
-            await asyncio.sleep(self._poll)
+            await self._sleep(end_time, limited, method)
             if time.time() > end_time:
                 break
-        raise TimeoutException(message, screen, stacktrace)
+        exception = (deadline.DeadlineExceeded if limited else TimeoutException)(message, screen, stacktrace)
+        self._notify_timeout(exception)
+        raise exception
 
     async def until_not(self, method, message=''):
         """Calls the method provided with the driver as an argument until the \
         return value is False."""
-        end_time = time.time() + self._timeout
+        timeout, limited = self._budget()
+        end_time = time.time() + timeout
         while True:
             try:
                 value = await method(self._driver)
@@ -93,7 +98,38 @@ class AsyncWebDriverWait:
                     return value
             except self._ignored_exceptions:
                 return True
-            await asyncio.sleep(self._poll)
+            await self._sleep(end_time, limited, method)
             if time.time() > end_time:
                 break
-        raise TimeoutException(message)
+        exception = (deadline.DeadlineExceeded if limited else TimeoutException)(message)
+        self._notify_timeout(exception)
+        raise exception
+
+    def _budget(self):
+        # the timeout, shortened to the current deadline if that comes first
+        left = deadline.remaining()
+        if left is not None and left < self._timeout:
+            return max(left, 0), True
+        return self._timeout, False
+
+    async def _sleep(self, end_time, limited, method=None):
+        delay = self._poll
+        if limited:
+            # do not poll past the deadline
+            delay = max(min(self._poll, end_time - time.time()), 0)
+        # conditions may offer an awaitable finishing when a new check is worth it
+        wakeup = getattr(method, 'wakeup', None)
+        event = wakeup(self._driver) if wakeup is not None else None
+        if event is None:
+            await asyncio.sleep(delay)
+            return
+        try:
+            await asyncio.wait_for(event, delay)
+        except asyncio.TimeoutError:
+            pass
+
+    def _notify_timeout(self, exception):
+        # lets listeners such as the flight recorder see the timeout
+        notify_exception = getattr(self._driver, '_notify_exception', None)
+        if notify_exception is not None:
+            notify_exception(exception)
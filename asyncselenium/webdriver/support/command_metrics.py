@@ -0,0 +1,145 @@
+"""
+Per command latency metrics built on the command listener hooks.
+
+:Usage:
+    metrics = CommandMetrics()
+    AsyncRemoteConnection.add_default_listener(metrics)
+    ...
+    print(metrics.snapshot()['get'])
+    print(prometheus_text(metrics))
+"""
+
+from bisect import bisect_left
+
+from asyncselenium.webdriver.remote.command_listener import AbstractCommandListener
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _bucket_bounds(lowest=0.0005, highest=600.0, factor=1.2):
+    bounds = []
+    bound = lowest
+    while bound < highest:
+        bounds.append(bound)
+        bound *= factor
+    bounds.append(highest)
+    return bounds
+
+
+# shared by every histogram, upper bounds in seconds
+BUCKET_BOUNDS = _bucket_bounds()
+
+
+class LatencyHistogram(object):
+    """
+    Fixed log bucketed histogram of durations in seconds.
+
+    Recording is a bisect over ~70 bounds and an increment, quantiles are
+    interpolated inside the bucket so their relative error stays within the
+    20% bucket growth factor.
+    """
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        self.counts[bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Returns the estimated q-quantile (0 < q <= 1), None if empty."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if not bucket_count:
+                continue
+            if seen + bucket_count >= rank:
+                lower = BUCKET_BOUNDS[index - 1] if index else 0.0
+                upper = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(estimate, self.max)
+            seen += bucket_count
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+
+class CommandMetrics(AbstractCommandListener):
+    """
+    Command listener collecting a latency histogram and error count per command.
+
+    Responses with an HTTP status of 400 and above as well as transport
+    errors are counted as errors.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.errors = {}
+
+    def after_command(self, event):
+        histogram = self.histograms.get(event.command)
+        if histogram is None:
+            histogram = self.histograms[event.command] = LatencyHistogram()
+            self.errors[event.command] = 0
+        histogram.record(event.duration)
+        if event.exception is not None or (event.status or 0) >= 400:
+            self.errors[event.command] += 1
+
+    def reset(self):
+        self.histograms.clear()
+        self.errors.clear()
+
+    def snapshot(self):
+        """
+        Returns a dict of command name to its count, errors, mean, max,
+        p50, p95 and p99 in seconds.
+        """
+        result = {}
+        for command, histogram in self.histograms.items():
+            stats = {'count': histogram.count,
+                     'errors': self.errors[command],
+                     'mean': histogram.mean,
+                     'max': histogram.max}
+            for q in QUANTILES:
+                stats['p%g' % (q * 100)] = histogram.quantile(q)
+            result[command] = stats
+        return result
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(metrics, prefix='asyncselenium'):
+    """
+    Renders CommandMetrics in the Prometheus text exposition format.
+
+    Latencies are exported as a summary with the p50/p95/p99 quantiles,
+    errors as a counter, both labelled by command.
+    """
+    name = '%s_command_duration_seconds' % prefix
+    errors = '%s_command_errors_total' % prefix
+    lines = ['# HELP %s Latency of WebDriver commands.' % name,
+             '# TYPE %s summary' % name]
+    for command, histogram in sorted(metrics.histograms.items()):
+        label = _escape(command)
+        for q in QUANTILES:
+            lines.append('%s{command="%s",quantile="%g"} %r' % (name, label, q, histogram.quantile(q)))
+        lines.append('%s_sum{command="%s"} %r' % (name, label, histogram.sum))
+        lines.append('%s_count{command="%s"} %d' % (name, label, histogram.count))
+    lines.append('# HELP %s WebDriver commands that failed.' % errors)
+    lines.append('# TYPE %s counter' % errors)
+    for command, count in sorted(metrics.errors.items()):
+        lines.append('%s{command="%s"} %d' % (errors, _escape(command), count))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,379 @@
+"""
+Crawls run by a pool of sessions.
+
+The frontier orders URLs by priority, keeps per domain politeness delays and
+concurrency limits, remembers the URLs it has seen in a Bloom filter and
+spills the URLs beyond ``max_memory`` to disk, so a crawl of millions of
+URLs runs in constant memory.
+
+:Usage:
+    drivers = [await AsyncChromeDriver(preset='scrape-fast') for _ in range(4)]
+    crawler = Crawler(drivers, delay=1, max_depth=2)
+    async for page in crawler.crawl(['https://www.baidu.com']):
+        print(page.url, page.error or len(page.links))
+"""
+
+import asyncio
+import collections
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import tempfile
+
+try:
+    from urllib import parse
+except ImportError:  # above is available in py3+, below is py2.7
+    import urlparse as parse
+
+from selenium.common.exceptions import WebDriverException
+from asyncselenium.webdriver.remote.async_remote_connection import CONNECTION_ERRORS
+
+LOGGER = logging.getLogger(__name__)
+
+# what a single page may fail with, the crawl goes on
+PAGE_ERRORS = (WebDriverException,) + CONNECTION_ERRORS
+
+# one round trip for every link of the page, resolved to absolute URLs
+LINKS_SCRIPT = 'return Array.prototype.map.call(document.links, function (a) { return a.href; });'
+
+CrawlEntry = collections.namedtuple('CrawlEntry', 'priority url depth')
+CrawlEntry.__doc__ = """A URL in the frontier, lower priorities are crawled first."""
+
+CrawledPage = collections.namedtuple('CrawledPage', 'url depth links data error')
+CrawledPage.__doc__ = """
+A page yielded by Crawler.crawl().
+
+``links`` are the absolute URLs the page links to, ``data`` what the
+crawler's ``extract`` returned and ``error`` the WebDriverException,
+connection error or timeout the page failed with, None on success.
+"""
+
+
+def normalize_url(url):
+    """Drops the fragment of ``url``, pages differing only by it are the same."""
+    return parse.urldefrag(url)[0]
+
+
+def url_domain(url):
+    return parse.urlparse(url).hostname or ''
+
+
+class BloomFilter(object):
+    """
+    A set of strings in a fixed number of bits, false positives happen at
+    ``error_rate`` once ``capacity`` items were added, false negatives never.
+    Past ``capacity`` the rate grows quickly, a warning is logged once.
+    """
+
+    def __init__(self, capacity=1000000, error_rate=1e-4):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        # double hashing, k positions from two hashes
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def add(self, item):
+        """Adds ``item``, returns False if it was (probably) there already."""
+        new = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                new = True
+        self.count += new
+        if new and self.count == self.capacity + 1:
+            LOGGER.warning('Bloom filter holds %d items past its capacity of %d, '
+                           'new URLs are increasingly taken for seen ones', self.count, self.capacity)
+        return new
+
+
+class _Domain(object):
+
+    def __init__(self):
+        self.heap = []
+        self.active = 0
+        self.next_time = 0.0
+
+
+class Frontier(object):
+    """
+    The URLs left to crawl.
+
+    Up to ``max_memory`` URLs are kept in memory, further ones are appended
+    to files in ``spill_dir`` and read back, in the order they were spilled,
+    once the memory holds less than half of that.
+
+    :Args:
+     - delay - seconds between the end of a page and the start of the next
+       one of the same domain
+     - per_domain - pages of a domain crawled at the same time
+     - max_memory - URLs kept in memory
+     - spill_dir - directory of the spill files, a temporary one if None
+     - seen - set like object of the URLs already queued, a BloomFilter by default
+     - capacity - URLs the default BloomFilter is sized for, size it for the
+       whole crawl
+     - error_rate - false positive rate of the default BloomFilter, URLs
+       wrongly taken for seen ones are never crawled
+    """
+
+    def __init__(self, delay=1.0, per_domain=1, max_memory=10000, spill_dir=None, seen=None,
+                 capacity=1000000, error_rate=1e-4):
+        self.delay = delay
+        self.per_domain = per_domain
+        self.max_memory = max_memory
+        self.seen = BloomFilter(capacity, error_rate) if seen is None else seen
+        self.spilled = 0
+        self._spill_dir = spill_dir
+        self._domains = {}
+        self._in_memory = 0
+        self._in_flight = 0
+        self._segments = collections.deque()
+        self._writer = None
+        self._writer_lines = 0
+        self._order = itertools.count()
+        self._waiters = []
+
+    def __len__(self):
+        return self._in_memory + self.spilled
+
+    @property
+    def finished(self):
+        return not len(self) and not self._in_flight
+
+    def add(self, url, priority=0, depth=0):
+        """Queues ``url`` unless it was queued before, returns True if it was new."""
+        url = normalize_url(url)
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        self._push(CrawlEntry(priority, url, depth))
+        return True
+
+    def _push(self, entry):
+        if self._in_memory >= self.max_memory:
+            self._spill(entry)
+        else:
+            self._queue(entry)
+        self._notify()
+
+    def _queue(self, entry):
+        key = url_domain(entry.url)
+        domain = self._domains.get(key)
+        if domain is None:
+            domain = self._domains[key] = _Domain()
+        heapq.heappush(domain.heap, (entry.priority, next(self._order), entry))
+        self._in_memory += 1
+
+    def _spill(self, entry):
+        segment_size = max(1, self.max_memory // 2)
+        if self._writer is None or self._writer_lines >= segment_size:
+            self._close_writer()
+            if self._spill_dir is None:
+                self._spill_dir = tempfile.mkdtemp(prefix='asyncselenium-frontier-')
+            os.makedirs(self._spill_dir, exist_ok=True)
+            path = os.path.join(self._spill_dir, 'segment-%d.jsonl' % next(self._order))
+            self._writer = open(path, 'w')
+            self._writer_lines = 0
+            self._segments.append(path)
+        self._writer.write(json.dumps(entry) + '\n')
+        self._writer_lines += 1
+        self.spilled += 1
+
+    def _close_writer(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _refill(self):
+        # an empty memory always refills, max_memory // 2 is 0 for tiny frontiers
+        while self._segments and (not self._in_memory or self._in_memory < self.max_memory // 2):
+            path = self._segments.popleft()
+            if self._writer is not None and self._writer.name == path:
+                self._close_writer()
+            with open(path) as f:
+                entries = [CrawlEntry(*json.loads(line)) for line in f]
+            os.remove(path)
+            self.spilled -= len(entries)
+            for entry in entries:
+                self._queue(entry)
+
+    def _notify(self):
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _take(self, now):
+        """Returns the best entry a domain may start now, or the seconds until one may."""
+        self._refill()
+        best = None
+        wait = None
+        idle = []
+        for key, domain in self._domains.items():
+            if not domain.heap:
+                if not domain.active and domain.next_time <= now:
+                    idle.append(key)
+                continue
+            if domain.active >= self.per_domain:
+                continue
+            if domain.next_time > now:
+                wait = min(wait, domain.next_time - now) if wait is not None else domain.next_time - now
+            elif best is None or domain.heap[0] < best.heap[0]:
+                best = domain
+        # domains are only remembered while queued, crawled or in their delay
+        for key in idle:
+            del self._domains[key]
+        if best is None:
+            return None, wait
+        entry = heapq.heappop(best.heap)[2]
+        best.active += 1
+        self._in_memory -= 1
+        self._in_flight += 1
+        return entry, None
+
+    async def get(self):
+        """Waits for the next URL a domain may crawl, returns None once the crawl is finished."""
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.finished:
+                self._notify()
+                return None
+            entry, wait = self._take(loop.time())
+            if entry is not None:
+                return entry
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def done(self, entry):
+        """Marks ``entry`` as crawled, its domain may start another page after the delay."""
+        domain = self._domains[url_domain(entry.url)]
+        domain.active -= 1
+        domain.next_time = asyncio.get_running_loop().time() + self.delay
+        self._in_flight -= 1
+        self._notify()
+
+    def close(self):
+        """Removes the spill files."""
+        self._close_writer()
+        while self._segments:
+            try:
+                os.remove(self._segments.popleft())
+            except OSError:
+                pass
+        self.spilled = 0
+
+
+class Crawler(object):
+    """
+    Crawls with one worker per driver.
+
+    Pages are yielded as they are crawled, a bounded queue keeps the workers
+    at most a few pages ahead of the consumer.
+
+    :Args:
+     - drivers - async drivers, one page at a time each
+     - extract - optional coroutine function taking the driver and the
+       entry, its result is the page's ``data``
+     - follow - callable(url, entry) returning the priority of a link or
+       None to skip it, by default links of the seed domains are followed
+       breadth first
+     - max_depth - links of pages at this depth are not followed
+     - max_pages - pages to crawl at most, unbounded if None
+     - frontier_args - keyword arguments of the Frontier, e.g. ``capacity``
+       for crawls of more than a million URLs
+    """
+
+    def __init__(self, drivers, extract=None, follow=None, max_depth=None, max_pages=None, **frontier_args):
+        self.drivers = list(drivers)
+        self.extract = extract
+        self.follow = follow
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.frontier = Frontier(**frontier_args)
+        self.crawled = 0
+        self._seed_domains = set()
+
+    def _priority(self, url, entry):
+        if self.follow is not None:
+            return self.follow(url, entry)
+        if url_domain(url) in self._seed_domains:
+            return entry.depth + 1
+        return None
+
+    async def _crawl_one(self, driver, entry):
+        links, data, error = [], None, None
+        try:
+            await driver.get(entry.url)
+            links = await driver.execute_script(LINKS_SCRIPT) or []
+            if self.extract is not None:
+                data = await self.extract(driver, entry)
+        except PAGE_ERRORS as e:
+            error = e
+        if self.max_depth is None or entry.depth < self.max_depth:
+            for url in links:
+                if not url.startswith(('http://', 'https://')):
+                    continue
+                priority = self._priority(url, entry)
+                if priority is not None:
+                    self.frontier.add(url, priority, entry.depth + 1)
+        return CrawledPage(entry.url, entry.depth, links, data, error)
+
+    async def _work(self, driver, results):
+        while True:
+            entry = await self.frontier.get()
+            if entry is None:
+                return
+            if self.max_pages is not None and self.crawled >= self.max_pages:
+                self.frontier.done(entry)
+                return
+            self.crawled += 1
+            try:
+                page = await self._crawl_one(driver, entry)
+            finally:
+                self.frontier.done(entry)
+            await results.put(page)
+
+    async def crawl(self, seeds):
+        """Async generator of the CrawledPage of every URL reached from ``seeds``."""
+        for url in seeds:
+            self._seed_domains.add(url_domain(url))
+            self.frontier.add(url)
+        results = asyncio.Queue(maxsize=2 * len(self.drivers))
+        workers = [asyncio.ensure_future(self._work(driver, results)) for driver in self.drivers]
+        finished = asyncio.ensure_future(asyncio.gather(*workers))
+        try:
+            while True:
+                getter = asyncio.ensure_future(results.get())
+                await asyncio.wait([getter, finished], return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield getter.result()
+                    continue
+                getter.cancel()
+                while not results.empty():
+                    yield results.get_nowait()
+                finished.result()
+                return
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            finished.cancel()
+            self.frontier.close()
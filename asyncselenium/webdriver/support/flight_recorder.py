@@ -0,0 +1,140 @@
+"""
+Per session ring buffer of recent commands, dumped when a session fails.
+
+:Usage:
+    recorder = FlightRecorder(size=100)
+    AsyncRemoteConnection.add_default_listener(recorder)
+    driver = await AsyncChromeDriver(...)
+    ...
+    # on a TimeoutException from AsyncWebDriverWait or a WebDriverException
+    # the last 100 commands of the session are logged as a warning
+"""
+
+import logging
+import time
+
+from collections import deque
+
+from selenium.common.exceptions import (NoSuchElementException,
+                                        StaleElementReferenceException,
+                                        NoAlertPresentException,
+                                        NoSuchCookieException)
+from selenium.webdriver.remote.command import Command
+from asyncselenium.webdriver.remote.command_listener import AbstractCommandListener
+
+LOGGER = logging.getLogger(__name__)
+
+# lookups that miss all the time while polling, they do not trigger a dump
+IGNORED_EXCEPTIONS = (NoSuchElementException, StaleElementReferenceException,
+                      NoAlertPresentException, NoSuchCookieException)
+
+
+class FlightRecorder(AbstractCommandListener):
+    """
+    Command listener keeping the last ``size`` commands of every session.
+
+    Recording a command is a tuple append to a bounded deque, payloads are
+    only sliced to ``payload_limit`` characters, nothing is formatted until
+    a dump happens.
+
+    :Args:
+     - size - number of commands kept per session
+     - payload_limit - number of characters of the request body kept
+     - max_sessions - number of sessions kept, the oldest one is dropped first
+     - sink - callable receiving (session_id, reason, text) on every dump,
+       by default the dump is logged as a warning
+     - ignored_exceptions - exception classes which do not trigger a dump
+    """
+
+    def __init__(self, size=50, payload_limit=200, max_sessions=1000,
+                 sink=None, ignored_exceptions=IGNORED_EXCEPTIONS):
+        self.size = size
+        self.payload_limit = payload_limit
+        self.max_sessions = max_sessions
+        self.sink = sink
+        self.ignored_exceptions = tuple(ignored_exceptions)
+        self._sessions = {}
+        self._pending = {}
+
+    def _buffer(self, session_id):
+        buffer = self._sessions.get(session_id)
+        if buffer is None:
+            if len(self._sessions) >= self.max_sessions:
+                del self._sessions[next(iter(self._sessions))]
+            buffer = self._sessions[session_id] = deque(maxlen=self.size)
+        return buffer
+
+    def before_command(self, event):
+        self._pending[id(event)] = (time.time(), event)
+
+    def after_command(self, event):
+        started, _ = self._pending.pop(id(event), (None, None))
+        body = event.body
+        if body and event.payload_size:
+            body = body[:self.payload_limit]
+        else:
+            body = None
+        self._buffer(event.session_id).append(
+            (started, event.command, event.duration, event.status,
+             event.exception, event.payload_size, body))
+        if event.command == Command.QUIT and event.exception is None:
+            self._sessions.pop(event.session_id, None)
+        elif isinstance(event.exception, Exception):
+            # transport errors, cancellation is a BaseException and not a failure
+            self.dump(event.session_id, event.exception)
+
+    def on_exception(self, session_id, exception):
+        if not isinstance(exception, self.ignored_exceptions):
+            self.dump(session_id, exception)
+
+    def records(self, session_id):
+        """
+        Returns the recorded commands of a session, oldest first, as tuples of
+        (start time, command, duration, status, exception, payload size, payload).
+        """
+        return list(self._sessions.get(session_id, ()))
+
+    def pending(self, session_id):
+        """Returns the commands of the session that have not completed yet."""
+        return [(started, event) for started, event in list(self._pending.values())
+                if event.session_id == session_id]
+
+    def format(self, session_id, reason=None):
+        lines = ['flight recorder for session %s%s' % (
+            session_id, ': %s' % _describe(reason) if reason is not None else '')]
+        for started, command, duration, status, exception, size, body in self.records(session_id):
+            line = '  %s %s %s status=%s %dB' % (
+                _timestamp(started), command,
+                '%.1fms' % (duration * 1000) if duration is not None else '-', status, size)
+            if exception is not None:
+                line += ' error=%s' % _describe(exception)
+            if body:
+                line += ' body=%s%s' % (body, '...' if size > len(body) else '')
+            lines.append(line)
+        now = time.time()
+        for started, event in self.pending(session_id):
+            lines.append('  %s %s pending for %.1fms' % (
+                _timestamp(started), event.command, (now - started) * 1000))
+        return '\n'.join(lines)
+
+    def dump(self, session_id, reason=None):
+        """Formats the session's recent commands and hands them to the sink."""
+        text = self.format(session_id, reason)
+        if self.sink is not None:
+            self.sink(session_id, reason, text)
+        else:
+            LOGGER.warning(text)
+        return text
+
+
+def _timestamp(value):
+    if value is None:
+        return '-'
+    return time.strftime('%H:%M:%S', time.localtime(value)) + ('%.3f' % (value % 1))[1:]
+
+
+def _describe(exception):
+    message = getattr(exception, 'msg', None)
+    if message is None:
+        message = str(exception)
+    return '%s(%s)' % (type(exception).__name__, message.strip()[:200])
@@ -0,0 +1,279 @@
+"""
+Fan-out of scenarios over worker processes.
+
+Each worker process runs its own event loop, so its connections, sessions
+and the JSON parsing of their responses stay on its own core.
+
+:Usage:
+    async def scrape(url):
+        driver = await AsyncChromeDriver()
+        try:
+            await driver.get(url)
+            return await driver.title
+        finally:
+            await driver.quit()
+
+    async with ProcessRunner(workers=8, max_concurrency=40) as runner:
+        titles = await runner.map(scrape, urls)
+
+Scenario functions and their arguments are pickled, so they must be
+defined at module level and importable from the worker processes.
+"""
+
+import asyncio
+import inspect
+import itertools
+import logging
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import zlib
+from concurrent.futures.process import BrokenProcessPool
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _Worker(object):
+
+    def __init__(self, index, process, tasks):
+        self.index = index
+        self.process = process
+        self.tasks = tasks
+        self.pending = 0
+        self.broken = False
+
+
+class ProcessRunner(object):
+    """
+    Runs async scenario functions in ``workers`` processes.
+
+    :Args:
+     - workers - number of worker processes, the cpu count by default
+     - max_concurrency - scenarios running at once per worker, unbounded if None
+     - initializer - function, sync or async, called in every worker before its first scenario
+     - initargs - arguments of ``initializer``
+     - mp_context - multiprocessing context, 'spawn' by default
+    """
+
+    def __init__(self, workers=None, max_concurrency=None, initializer=None, initargs=(),
+                 mp_context=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency
+        self.initializer = initializer
+        self.initargs = initargs
+        self._context = mp_context or multiprocessing.get_context('spawn')
+        self._workers = []
+        self._pending = {}
+        self._ids = itertools.count()
+        self._results = None
+        self._reader = None
+        self._loop = None
+        self._closing = False
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._results = self._context.Queue()
+        for index in range(self.workers):
+            tasks = self._context.Queue()
+            process = self._context.Process(
+                target=_worker_main, name='asyncselenium-worker-%d' % index, daemon=True,
+                args=(tasks, self._results, self.max_concurrency, self.initializer, self.initargs))
+            process.start()
+            self._workers.append(_Worker(index, process, tasks))
+        self._reader = threading.Thread(target=self._read_results, name='asyncselenium-results', daemon=True)
+        self._reader.start()
+        return self
+
+    async def stop(self):
+        """Lets the workers finish the submitted scenarios and stops them."""
+        self._closing = True
+        for worker in self._workers:
+            if not worker.broken:
+                worker.tasks.put(None)
+        loop = asyncio.get_running_loop()
+        for worker in self._workers:
+            await loop.run_in_executor(None, worker.process.join)
+        self._results.put(None)
+        await loop.run_in_executor(None, self._reader.join)
+        self._workers = []
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    def _shard(self, shard_key):
+        workers = [worker for worker in self._workers if not worker.broken]
+        if not workers:
+            raise BrokenProcessPool('all worker processes died')
+        if shard_key is not None:
+            # stable across runs, unlike hash()
+            return workers[zlib.crc32(str(shard_key).encode('utf-8')) % len(workers)]
+        return min(workers, key=lambda worker: worker.pending)
+
+    def submit(self, fn, *args, shard_key=None, **kwargs):
+        """
+        Runs ``fn(*args, **kwargs)`` in a worker.
+
+        Submissions with the same ``shard_key`` go to the same worker,
+        others to the worker with the fewest pending scenarios.
+
+        :Returns:
+         - an asyncio.Future of the result, cancelling it cancels the scenario
+        """
+        if self._closing or self._loop is None:
+            raise RuntimeError('the runner is not running')
+        # pickled here, the queue's feeder thread would only print the error
+        try:
+            payload = pickle.dumps((fn, args, kwargs))
+        except Exception as e:
+            raise pickle.PicklingError('cannot send %r to a worker process: %s' % (fn, e)) from e
+        worker = self._shard(shard_key)
+        job_id = next(self._ids)
+        future = self._loop.create_future()
+        self._pending[job_id] = (future, worker)
+        worker.pending += 1
+        worker.tasks.put(('run', job_id, payload))
+        future.add_done_callback(lambda f: self._cancelled(f, job_id, worker))
+        return future
+
+    async def map(self, fn, iterable, shard_key=None):
+        """
+        Runs ``fn`` for every item and returns the results in order.
+
+        :Args:
+         - shard_key - optional function of an item returning its shard key
+        """
+        return await asyncio.gather(*[
+            self.submit(fn, item, shard_key=shard_key(item) if shard_key else None) for item in iterable])
+
+    def _cancelled(self, future, job_id, worker):
+        if future.cancelled() and self._pending.pop(job_id, None) is not None:
+            worker.pending -= 1
+            if not worker.broken:
+                worker.tasks.put(('cancel', job_id))
+
+    def _read_results(self):
+        while True:
+            # checked on every message too, other workers may keep the queue busy
+            self._check_workers()
+            try:
+                message = self._results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if message is None:
+                return
+            self._loop.call_soon_threadsafe(self._resolve, *message)
+
+    def _check_workers(self):
+        for worker in self._workers:
+            if not worker.broken and not worker.process.is_alive() and not self._closing:
+                worker.broken = True
+                self._loop.call_soon_threadsafe(self._fail, worker)
+
+    def _resolve(self, job_id, ok, payload):
+        entry = self._pending.pop(job_id, None)
+        if entry is None:
+            return
+        future, worker = entry
+        worker.pending -= 1
+        if future.done():
+            return
+        try:
+            value = pickle.loads(payload)
+        except Exception as e:
+            # e.g. a class the worker could import and this process cannot
+            future.set_exception(RuntimeError('cannot unpickle the result of job %d: %r' % (job_id, e)))
+            return
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+    def _fail(self, worker):
+        LOGGER.error('worker process %d died with exit code %s', worker.index, worker.process.exitcode)
+        for job_id, (future, owner) in list(self._pending.items()):
+            if owner is worker:
+                del self._pending[job_id]
+                worker.pending -= 1
+                if not future.done():
+                    future.set_exception(BrokenProcessPool(
+                        'worker process %d died with exit code %s' % (worker.index, worker.process.exitcode)))
+
+
+def _worker_main(tasks, results, max_concurrency, initializer, initargs):
+    asyncio.run(_serve(tasks, results, max_concurrency, initializer, initargs))
+
+
+def _forward(tasks, loop, inbox):
+    # multiprocessing queues block, read them off the event loop
+    while True:
+        message = tasks.get()
+        loop.call_soon_threadsafe(inbox.put_nowait, message)
+        if message is None:
+            return
+
+
+async def _serve(tasks, results, max_concurrency, initializer, initargs):
+    loop = asyncio.get_running_loop()
+    if initializer is not None:
+        value = initializer(*initargs)
+        if inspect.isawaitable(value):
+            await value
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+    inbox = asyncio.Queue()
+    threading.Thread(target=_forward, args=(tasks, loop, inbox), daemon=True).start()
+    running = {}
+    while True:
+        message = await inbox.get()
+        if message is None:
+            break
+        if message[0] == 'cancel':
+            task = running.get(message[1])
+            if task is not None:
+                task.cancel()
+            continue
+        _, job_id, payload = message
+        try:
+            fn, args, kwargs = pickle.loads(payload)
+        except Exception as e:
+            results.put(_message(job_id, False, e))
+            continue
+        running[job_id] = loop.create_task(_run(job_id, fn, args, kwargs, semaphore, results, running))
+    if running:
+        await asyncio.gather(*running.values(), return_exceptions=True)
+
+
+async def _run(job_id, fn, args, kwargs, semaphore, results, running):
+    try:
+        if semaphore is not None:
+            async with semaphore:
+                value = await _call(fn, args, kwargs)
+        else:
+            value = await _call(fn, args, kwargs)
+        message = _message(job_id, True, value)
+    except asyncio.CancelledError:
+        return
+    except Exception as e:
+        message = _message(job_id, False, e)
+    finally:
+        running.pop(job_id, None)
+    results.put(message)
+
+
+async def _call(fn, args, kwargs):
+    value = fn(*args, **kwargs)
+    if inspect.isawaitable(value):
+        value = await value
+    return value
+
+
+def _message(job_id, ok, value):
+    # pickled here, a failure in the queue's feeder thread would lose the result
+    try:
+        return job_id, ok, pickle.dumps(value)
+    except Exception as e:
+        return job_id, False, pickle.dumps(RuntimeError('unpicklable result %r: %r' % (value, e)))
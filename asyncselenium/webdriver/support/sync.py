@@ -0,0 +1,227 @@
+"""
+Blocking facade over the async drivers for threaded code.
+
+Every call is run on one shared background event loop, so threads share
+its connection pools instead of each starting a loop of its own.
+
+:Usage:
+    driver = SyncWebdriver(AsyncChromeDriver, options=options)
+    try:
+        driver.get('https://www.baidu.com')
+        print(driver.title)
+        driver.find_element_by_id('kw').send_keys('python')
+        driver.wait(10).until(ec.title_contains('python'))
+    finally:
+        driver.quit()
+"""
+
+import asyncio
+import concurrent.futures
+import inspect
+import threading
+
+from selenium.common.exceptions import TimeoutException
+
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.remote.async_webelement import AsyncWebElement
+from asyncselenium.webdriver.support.async_wait import AsyncWebDriverWait, POLL_FREQUENCY
+
+
+class BackgroundLoop(object):
+    """An event loop running forever in a daemon thread."""
+
+    def __init__(self, name='asyncselenium-loop'):
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        return self._loop
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            started = threading.Event()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, args=(started,), name=self.name, daemon=True)
+            self._thread.start()
+            started.wait()
+
+    def _run(self, started):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(started.set)
+        self._loop.run_forever()
+
+    def stop(self):
+        """Stops the loop and waits for its thread."""
+        with self._lock:
+            if self._thread is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._thread = self._loop = None
+
+    def run(self, coroutine, timeout=None):
+        """
+        Runs ``coroutine`` on the loop and blocks until its result.
+
+        :Args:
+         - timeout - seconds to wait, the coroutine is cancelled when they pass
+        """
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError('blocking on the background loop from its own thread would deadlock')
+        future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutException('no result within %ss' % timeout)
+
+
+_shared_loop = BackgroundLoop()
+
+
+def shared_loop():
+    """Returns the BackgroundLoop used by default by every sync proxy."""
+    return _shared_loop
+
+
+class SyncProxy(object):
+    """
+    Blocking proxy of an asyncselenium object.
+
+    Async properties and methods are run on the background loop. Returned
+    asyncselenium objects, e.g. elements, are wrapped in proxies in turn.
+    """
+
+    def __init__(self, target, loop=None, timeout=None):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_background', loop or _shared_loop)
+        object.__setattr__(self, '_timeout', timeout)
+
+    def __repr__(self):
+        return '<%s %r>' % (type(self).__name__, self._target)
+
+    def __eq__(self, other):
+        if isinstance(other, SyncProxy):
+            other = other._target
+        return self._target == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __getattr__(self, name):
+        static = getattr(type(self._target), name, None)
+        if isinstance(static, property):
+            return self._run(self._get(name))
+        value = getattr(self._target, name)
+        if callable(value):
+            return self._method(value)
+        return self._wrap(value)
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value._target if isinstance(value, SyncProxy) else value)
+
+    def _method(self, method):
+        def call(*args, **kwargs):
+            return self._run(self._invoke(method, args, kwargs))
+        call.__name__ = getattr(method, '__name__', 'call')
+        call.__doc__ = getattr(method, '__doc__', None)
+        return call
+
+    async def _get(self, name):
+        value = getattr(self._target, name)
+        if inspect.isawaitable(value):
+            value = await value
+        return value
+
+    @staticmethod
+    async def _invoke(method, args, kwargs):
+        args = [_unwrap(arg) for arg in args]
+        kwargs = {key: _unwrap(value) for key, value in kwargs.items()}
+        value = method(*args, **kwargs)
+        if inspect.isawaitable(value):
+            value = await value
+        return value
+
+    def _run(self, coroutine):
+        return self._wrap(self._background.run(coroutine, self._timeout))
+
+    def _wrap(self, value):
+        if isinstance(value, AsyncWebdriver):
+            return SyncWebdriver.wrap(value, self._background, self._timeout)
+        if isinstance(value, AsyncWebElement):
+            return SyncWebElement(value, self._background, self._timeout)
+        if isinstance(value, list):
+            return [self._wrap(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self._wrap(item) for key, item in value.items()}
+        if type(value).__module__.startswith('asyncselenium.') and not isinstance(value, BaseException):
+            return SyncProxy(value, self._background, self._timeout)
+        return value
+
+
+def _unwrap(value):
+    if isinstance(value, SyncProxy):
+        return value._target
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(item) for item in value)
+    return value
+
+
+class SyncWebElement(SyncProxy):
+    """Blocking proxy of an AsyncWebElement."""
+    pass
+
+
+class SyncWebdriver(SyncProxy):
+    """
+    Blocking proxy of an AsyncWebdriver, safe to share between threads.
+
+    :Args:
+     - driver_cls - the async driver class to create on the background loop
+     - loop - BackgroundLoop to run on, the shared one by default
+     - timeout - seconds a call may block, unbounded if None
+     - args, kwargs - passed to ``driver_cls``
+    """
+
+    def __init__(self, driver_cls=AsyncWebdriver, *args, loop=None, timeout=None, **kwargs):
+        loop = loop or _shared_loop
+        driver = loop.run(_create(driver_cls, args, kwargs), timeout)
+        SyncProxy.__init__(self, driver, loop, timeout)
+
+    @classmethod
+    def wrap(cls, driver, loop=None, timeout=None):
+        """Returns a proxy of an existing async driver living on ``loop``."""
+        proxy = cls.__new__(cls)
+        SyncProxy.__init__(proxy, driver, loop, timeout)
+        return proxy
+
+    def wait(self, timeout, poll_frequency=POLL_FREQUENCY, ignored_exceptions=None):
+        """
+        Returns a blocking AsyncWebDriverWait, its until() takes the async
+        expected conditions.
+        """
+        return SyncProxy(AsyncWebDriverWait(self._target, timeout, poll_frequency, ignored_exceptions),
+                         self._background, self._timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.quit()
+
+
+async def _create(driver_cls, args, kwargs):
+    return await driver_cls(*args, **kwargs)
@@ -0,0 +1,209 @@
+"""
+Screenshot comparison against baseline images.
+
+Decoding is done with Pillow and all pixel work with NumPy, both of which are
+optional dependencies (``pip install asyncselenium[visual]``).
+"""
+
+import asyncio
+import functools
+import io
+import os
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from asyncselenium.webdriver.remote.async_webelement import AsyncWebElement
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+try:
+    from PIL import Image
+except ImportError:  # optional dependency
+    Image = None
+
+HASH_SIZE = 8  # dHash grid, gives a 64 bit hash
+
+VisualDiffResult = namedtuple('VisualDiffResult', [
+    'match',           # True if the images are considered equal
+    'diff_pixels',     # number of pixels over tolerance, None if not computed
+    'diff_ratio',      # diff_pixels / compared pixels, None if not computed
+    'hash_distance',   # hamming distance of the perceptual hashes, None if not computed
+    'size',            # (width, height) of the actual image
+    'mask',            # boolean array of differing pixels when requested
+])
+
+
+def _require_numpy():
+    if np is None or Image is None:
+        raise ImportError("visual diff needs numpy and Pillow, "
+                          "install them with `pip install asyncselenium[visual]`")
+
+
+def load_image(image):
+    """
+    Loads an image as a ``(height, width, 3)`` uint8 RGB array.
+
+    :Args:
+     - image: PNG bytes, a file path or an already decoded array.
+    """
+    _require_numpy()
+    if isinstance(image, np.ndarray):
+        if image.ndim == 2:
+            image = np.repeat(image[:, :, None], 3, axis=2)
+        return image[:, :, :3]
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = io.BytesIO(image)
+    elif not isinstance(image, (str, os.PathLike)):
+        raise TypeError("image must be PNG bytes, a path or a numpy array, not %r" % type(image))
+    with Image.open(image) as img:
+        return np.asarray(img.convert('RGB'))
+
+
+def dhash(pixels, hash_size=HASH_SIZE):
+    """
+    Computes the difference hash of a decoded image as an int.
+
+    The image is reduced to grey and area averaged down to a
+    ``hash_size x (hash_size + 1)`` grid, each bit tells whether
+    brightness increases from left to right. Images smaller than the grid
+    are scaled up first, empty ones raise a ValueError.
+    """
+    grey = pixels[:, :, :3].astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    height, width = grey.shape
+    if not height or not width:
+        raise ValueError('cannot hash an empty %dx%d image' % (width, height))
+    if height < hash_size or width < hash_size + 1:
+        # nearest neighbour, every cell of the grid needs at least one pixel
+        grey = np.repeat(grey, -(-hash_size // height), axis=0)
+        grey = np.repeat(grey, -(-(hash_size + 1) // width), axis=1)
+        height, width = grey.shape
+    rows = np.linspace(0, height, hash_size + 1).astype(np.intp)[:-1]
+    cols = np.linspace(0, width, hash_size + 2).astype(np.intp)[:-1]
+    small = np.add.reduceat(np.add.reduceat(grey, rows, axis=0), cols, axis=1)
+    row_counts = np.diff(np.append(rows, height))
+    col_counts = np.diff(np.append(cols, width))
+    small /= np.outer(row_counts, col_counts)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hash_distance(hash_a, hash_b):
+    """Hamming distance between two hashes returned by :func:`dhash`."""
+    return bin(hash_a ^ hash_b).count('1')
+
+
+def _region_slices(region):
+    if isinstance(region, dict):
+        x, y, w, h = region['x'], region['y'], region['width'], region['height']
+    else:
+        x, y, w, h = region
+    # clamp both ends, a region partly off the image only covers its visible part
+    left, top = int(round(x)), int(round(y))
+    right, bottom = left + int(round(w)), top + int(round(h))
+    return slice(max(top, 0), max(bottom, 0)), slice(max(left, 0), max(right, 0))
+
+
+def compare_images(actual, baseline, tolerance=0, max_diff_ratio=0.0,
+                   ignore_regions=None, max_hash_distance=None, return_mask=False):
+    """
+    Compares two images pixel by pixel.
+
+    :Args:
+     - actual: PNG bytes, a file path or an array of the image to check.
+     - baseline: PNG bytes, a file path or an array of the expected image.
+     - tolerance: per channel difference (0-255) a pixel may have and still match.
+     - max_diff_ratio: fraction of pixels allowed to be over tolerance.
+     - ignore_regions: iterable of ``(x, y, width, height)`` tuples or element
+       ``rect`` dicts in image pixels that are left out of the comparison.
+     - max_hash_distance: if set, images whose perceptual hashes are further
+       apart than this are reported as different without a pixel diff, the
+       hashes are only computed then.
+     - return_mask: include the boolean mask of differing pixels in the result.
+
+    :Returns:
+     - VisualDiffResult
+    """
+    actual = load_image(actual)
+    baseline = load_image(baseline)
+    height, width = actual.shape[:2]
+    size = (width, height)
+
+    distance = None
+    if max_hash_distance is not None:
+        distance = hash_distance(dhash(actual), dhash(baseline))
+    if actual.shape != baseline.shape:
+        return VisualDiffResult(False, None, None, distance, size, None)
+    if max_hash_distance is not None and distance > max_hash_distance:
+        return VisualDiffResult(False, None, None, distance, size, None)
+
+    delta = np.abs(actual.astype(np.int16) - baseline.astype(np.int16))
+    mask = delta.max(axis=2) > tolerance
+    compared = mask.size
+    if ignore_regions:
+        keep = np.ones(mask.shape, dtype=bool)
+        for region in ignore_regions:
+            keep[_region_slices(region)] = False
+        mask &= keep
+        compared = int(keep.sum())
+
+    diff_pixels = int(np.count_nonzero(mask))
+    diff_ratio = diff_pixels / compared if compared else 0.0
+    return VisualDiffResult(diff_ratio <= max_diff_ratio, diff_pixels, diff_ratio,
+                            distance, size, mask if return_mask else None)
+
+
+def _compare_pair(options, pair):
+    return compare_images(pair[0], pair[1], **options)
+
+
+def compare_batch(pairs, max_workers=None, chunksize=16, **options):
+    """
+    Compares many ``(actual, baseline)`` pairs in a process pool.
+
+    Pairs should preferably be file paths or PNG bytes, so that decoding
+    happens in the workers as well. Keyword arguments are the same as
+    :func:`compare_images`.
+
+    :Returns:
+     - list of VisualDiffResult in the order of ``pairs``
+    """
+    _require_numpy()
+    compare = functools.partial(_compare_pair, options)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(compare, pairs, chunksize=chunksize))
+
+
+async def visual_diff(driver_or_element, baseline, **options):
+    """
+    Takes a screenshot of a driver or an element and compares it to a baseline.
+
+    The comparison runs in the default executor so the event loop is
+    not blocked while decoding. Keyword arguments are the same as
+    :func:`compare_images`.
+
+    :Usage:
+        result = await visual_diff(driver, 'baselines/home.png', tolerance=8)
+        # regions are in the screenshot's pixels, relative to the element here
+        result = await visual_diff(element, baseline_png, ignore_regions=[(0, 0, 120, 40)])
+    """
+    _require_numpy()
+    if isinstance(driver_or_element, AsyncWebElement):
+        png = await driver_or_element.screenshot_as_png
+    else:
+        png = await driver_or_element.get_screenshot_as_png()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, functools.partial(compare_images, png, baseline, **options))
+
+
+async def visual_diff_batch(pairs, max_workers=None, chunksize=16, **options):
+    """
+    Awaitable version of :func:`compare_batch`.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, functools.partial(compare_batch, pairs, max_workers, chunksize, **options))
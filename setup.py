@@ -54,9 +54,14 @@ setup_args = {
                  'asyncselenium.webdriver.remote',
                  'asyncselenium.webdriver.support',
                  'asyncselenium.webdriver.chrome',
+                 'asyncselenium.testing',
                 ],
     'include_package_data': True,
     'install_requires': ['selenium', 'aiohttp'],
+    'extras_require': {
+        'visual': ['numpy', 'Pillow'],
+        'watchdog': ['psutil'],
+    },
     'zip_safe': False
 }
 
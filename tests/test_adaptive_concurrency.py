@@ -0,0 +1,84 @@
+import asyncio
+
+from selenium.webdriver.remote.command import Command
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.support.adaptive_concurrency import (AdaptiveLimiter, ConcurrencyController,
+                                                                  prometheus_text)
+
+CAPABILITIES = {'browserName': 'fake'}
+
+
+def test_limit_follows_latency_and_errors():
+    limiter = AdaptiveLimiter(initial_limit=10, max_limit=50)
+    limiter.in_flight = 10
+    for _ in range(50):
+        limiter.observe(0.01)
+    grown = limiter.current_limit
+    assert grown > 10
+    for _ in range(20):
+        limiter.observe(0.1)
+    assert limiter.current_limit < grown
+    shrunk = limiter.limit
+    limiter.on_error()
+    assert limiter.limit < shrunk
+
+    idle = AdaptiveLimiter(initial_limit=10)
+    for _ in range(50):
+        idle.observe(0.01)
+    assert idle.current_limit == 10
+
+
+def test_controller_gates_commands_and_sessions():
+    async def main():
+        controller = ConcurrencyController(commands=AdaptiveLimiter(initial_limit=2, max_limit=2),
+                                           sessions=AdaptiveLimiter(initial_limit=1, max_limit=1))
+        peak = [0]
+
+        async with FakeWebDriverServer(latency=0.01) as server:
+            async def job():
+                async with controller.session(command_executor=server.url,
+                                              desired_capabilities=CAPABILITIES) as driver:
+                    controller.install(driver.command_executor)
+
+                    async def read():
+                        await driver.title
+                        peak[0] = max(peak[0], controller.commands.in_flight)
+                    await asyncio.gather(*[read() for _ in range(8)])
+                    return len(server.sessions)
+
+            sessions = await asyncio.gather(job(), job())
+        return sessions, peak[0], controller
+
+    sessions, peak, controller = asyncio.run(main())
+    assert sessions == [1, 1]
+    assert peak <= 2
+    assert controller.commands.in_flight == controller.sessions.in_flight == 0
+    text = prometheus_text(controller)
+    assert 'asyncselenium_concurrency_limit{kind="commands"} 2' in text
+    assert 'asyncselenium_concurrency_in_flight{kind="sessions"} 0' in text
+
+
+def test_sessions_and_page_loads_stay_out_of_the_baseline():
+    async def main():
+        controller = ConcurrencyController()
+        slow = {Command.NEW_SESSION: 0.2, Command.GET: 0.2}
+        async with FakeWebDriverServer(command_latency=slow) as server:
+            server.add_page('http://site.test/', '<html><head><title>Home</title></head><body></body></html>')
+            controller.install()
+            try:
+                driver = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+                for _ in range(3):
+                    await driver.get('http://site.test/')
+                    await driver.title
+                await driver.quit()
+            finally:
+                controller.uninstall()
+        return controller
+
+    controller = asyncio.run(main())
+    # title and quit commands only
+    assert controller.commands.samples == controller.sessions.samples == 4
+    assert controller.commands.long_rtt < 0.1
+    assert controller.commands.in_flight == 0
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from asyncselenium import bench
+
+FAST = ['--sessions', '1,2', '--duration', '0.05', '--iterations', '2', '--poll-frequencies', '0.01',
+        '--page-kb', '1']
+
+
+def _scaled(report, per_sec, ms):
+    results = {}
+    for name, metrics in report['results'].items():
+        results[name] = {metric: value * per_sec if metric.endswith('_per_sec') else
+                         value * ms if metric.endswith('_ms') and value else value
+                         for metric, value in metrics.items()}
+    return {'meta': report['meta'], 'results': results}
+
+
+def test_scenarios_write_the_json_report(tmp_path, capsys):
+    output = tmp_path / 'report.json'
+    assert bench.main(['commands', 'wait', 'payload', '--output', str(output)] + FAST) == 0
+    report = json.loads(output.read_text())
+    assert json.loads(capsys.readouterr().out) == report
+    assert set(report['meta']) >= {'version', 'python', 'latency', 'duration'}
+    assert sorted(report['results']) == ['commands[sessions=1]', 'commands[sessions=2]',
+                                         'payload[page_kb=1]', 'wait[poll=0.01]']
+    commands = report['results']['commands[sessions=2]']
+    assert commands['sessions'] == 2
+    assert commands['commands_per_sec'] > 0
+    assert {'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'} <= set(commands)
+    assert report['results']['wait[poll=0.01]']['iterations'] == 2
+
+
+def test_compare_exits_with_1_on_a_regression(tmp_path, capsys):
+    output = tmp_path / 'report.json'
+    bench.main(['commands', '--output', str(output)] + FAST)
+    report = json.loads(output.read_text())
+    faster = tmp_path / 'faster.json'
+    faster.write_text(json.dumps(_scaled(report, per_sec=100, ms=0.01)))
+    slower = tmp_path / 'slower.json'
+    slower.write_text(json.dumps(_scaled(report, per_sec=0.01, ms=100)))
+    capsys.readouterr()
+
+    assert bench.main(['commands', '--compare', str(faster)] + FAST) == 1
+    assert 'commands_per_sec' in capsys.readouterr().err
+    assert bench.main(['commands', '--compare', str(slower)] + FAST) == 0
+    assert 'REGRESSION' not in capsys.readouterr().err
+
+
+def test_rejects_unknown_scenarios_and_presets_without_chromedriver():
+    with pytest.raises(SystemExit):
+        bench.main(['nope'])
+    with pytest.raises(SystemExit):
+        bench.main(['presets'])
@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from selenium.webdriver.remote.command import Command
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.remote import circuit_breaker
+from asyncselenium.webdriver.remote.circuit_breaker import EndpointUnavailableException, OPEN, CLOSED
+
+CAPABILITIES = {'browserName': 'fake'}
+
+
+def test_breaker_opens_after_connection_failures():
+    async def main():
+        server = FakeWebDriverServer()
+        await server.start()
+        driver = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+        breaker = driver.command_executor.breaker
+        await server.stop()
+        for _ in range(breaker.failure_threshold):
+            with pytest.raises(aiohttp.ClientConnectionError):
+                await driver.title
+        assert breaker.state == OPEN
+        started = time.perf_counter()
+        with pytest.raises(EndpointUnavailableException):
+            await driver.title
+        refused = time.perf_counter() - started
+        await driver.command_executor.close()
+        return refused
+
+    assert asyncio.run(main()) < 0.05
+
+
+def test_liveness_interrupts_commands_in_flight():
+    async def main():
+        async with FakeWebDriverServer(command_latency={Command.GET_TITLE: 1}) as server:
+            driver = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+            breaker = driver.command_executor.breaker
+            breaker.reset_timeout = 0.05
+            alive = [True]
+            breaker.liveness = lambda: alive[0]
+
+            asyncio.get_running_loop().call_later(0.1, alive.__setitem__, 0, False)
+            started = time.perf_counter()
+            with pytest.raises(EndpointUnavailableException):
+                await driver.title
+            interrupted = time.perf_counter() - started
+
+            alive[0] = True
+            await asyncio.sleep(0.05)
+            await driver.current_url
+            state = breaker.state
+            await driver.quit()
+            return interrupted, state
+
+    interrupted, state = asyncio.run(main())
+    assert interrupted < 0.5
+    assert state == CLOSED
+
+
+def test_breaker_is_dropped_with_its_last_connection():
+    async def main():
+        async with FakeWebDriverServer(command_latency={Command.GET_TITLE: 1}) as server:
+            key = circuit_breaker.endpoint_key(server.url)
+            first = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+            second = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+            breaker = first.command_executor.breaker
+            assert second.command_executor.breaker is breaker
+            breaker.liveness = lambda: True
+            breaker.liveness_interval = 10
+            reading = asyncio.ensure_future(first.title)
+            await asyncio.sleep(0.05)
+            watcher = breaker._watcher
+            assert watcher is not None and not watcher.done()
+
+            await second.quit()
+            shared = circuit_breaker._breakers.get(key) is breaker and not watcher.done()
+            await first.quit()
+            await asyncio.sleep(0)
+            dropped = key not in circuit_breaker._breakers and watcher.cancelled()
+            reading.cancel()
+            await asyncio.gather(reading, return_exceptions=True)
+
+            third = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+            fresh = third.command_executor.breaker is not breaker
+            await third.quit()
+            return shared, dropped, fresh
+
+    assert asyncio.run(main()) == (True, True, True)
@@ -0,0 +1,77 @@
+import asyncio
+
+from aiohttp import web
+from selenium.webdriver.remote.command import Command
+
+from asyncselenium.webdriver.remote.async_remote_connection import AsyncRemoteConnection
+from asyncselenium.webdriver.remote.command_listener import AbstractCommandListener
+from asyncselenium.webdriver.support.command_metrics import (CommandMetrics, LatencyHistogram,
+                                                             prometheus_text)
+
+
+def test_histogram_quantiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 1001):
+        histogram.record(ms / 1000.0)
+    assert histogram.count == 1000
+    assert abs(histogram.quantile(0.5) - 0.5) < 0.1
+    assert abs(histogram.quantile(0.99) - 0.99) < 0.2
+    assert histogram.quantile(1) == histogram.max == 1.0
+    assert LatencyHistogram().quantile(0.5) is None
+
+
+class Recorder(AbstractCommandListener):
+    def __init__(self):
+        self.events = []
+
+    def before_command(self, event):
+        self.events.append(('before', event.command, event.session_id))
+
+    def after_command(self, event):
+        self.events.append(('after', event.command, event.status, event.payload_size > 0))
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, 'http://127.0.0.1:%d' % port
+
+
+def test_listeners_and_prometheus():
+    async def handler(request):
+        if request.path.endswith('/title'):
+            return web.json_response({'value': 'hello'})
+        return web.json_response({'value': {'error': 'no such element', 'message': ''}}, status=404)
+
+    async def run():
+        runner, url = await _serve(handler)
+        try:
+            connection = AsyncRemoteConnection(url)
+            connection.w3c = True
+            metrics, recorder = CommandMetrics(), Recorder()
+            connection.add_listener(metrics)
+            connection.add_listener(recorder)
+            response = await connection.execute(Command.GET_TITLE, {'sessionId': 's1'})()
+            assert response['value'] == 'hello'
+            await connection.execute(Command.FIND_ELEMENT,
+                                     {'sessionId': 's1', 'using': 'css selector', 'value': 'p'})()
+            return metrics, recorder
+        finally:
+            await runner.cleanup()
+
+    metrics, recorder = asyncio.run(run())
+    assert recorder.events == [('before', Command.GET_TITLE, 's1'),
+                               ('after', Command.GET_TITLE, 200, False),
+                               ('before', Command.FIND_ELEMENT, 's1'),
+                               ('after', Command.FIND_ELEMENT, 404, True)]
+    snapshot = metrics.snapshot()
+    assert snapshot[Command.GET_TITLE]['count'] == 1
+    assert snapshot[Command.FIND_ELEMENT]['errors'] == 1
+    text = prometheus_text(metrics)
+    assert 'asyncselenium_command_duration_seconds_count{command="getTitle"} 1' in text
+    assert 'asyncselenium_command_errors_total{command="findElement"} 1' in text
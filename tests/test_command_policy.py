@@ -0,0 +1,79 @@
+import asyncio
+
+from aiohttp import web
+
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.remote.command_policy import CommandPolicy, RetryBudget
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, 'http://127.0.0.1:%d' % port
+
+
+def run(handler, scenario):
+    async def main():
+        runner, url = await _serve(handler)
+        try:
+            driver = await AsyncWebdriver(command_executor=url, session_id='s1')
+            try:
+                return await scenario(driver)
+            finally:
+                await driver.command_executor.close()
+        finally:
+            await runner.cleanup()
+    return asyncio.run(main())
+
+
+def test_hedged_request_wins_over_slow_one():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.path)
+        if len(calls) == 1:
+            await asyncio.sleep(2)
+        return web.json_response({'value': 'hedged' if len(calls) > 1 else 'slow'})
+
+    async def scenario(driver):
+        driver.command_policy = policy = CommandPolicy(hedge_delay=0.05)
+        started = asyncio.get_running_loop().time()
+        title = await driver.title
+        return title, asyncio.get_running_loop().time() - started, policy
+
+    title, elapsed, policy = run(handler, scenario)
+    assert title == 'hedged'
+    assert elapsed < 1
+    assert (policy.hedges, policy.hedge_wins) == (1, 1)
+    assert calls == ['/session/s1/title'] * 2
+
+
+def test_connection_failures_are_retried_within_budget():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.path)
+        if len(calls) < 3:
+            request.transport.close()
+        return web.json_response({'value': 'http://site.test/'})
+
+    async def scenario(driver):
+        driver.command_policy = policy = CommandPolicy(hedge_quantile=None, backoff=0.001)
+        url = await driver.current_url
+        return url, policy
+
+    url, policy = run(handler, scenario)
+    assert url == 'http://site.test/'
+    # aiohttp itself may retry a dropped keep-alive connection once
+    assert policy.retries >= 1
+
+    budget = RetryBudget(ratio=0.5, capacity=1)
+    assert budget.withdraw() and not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
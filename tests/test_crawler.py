@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+
+import aiohttp
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.support.crawler import BloomFilter, Crawler, Frontier
+
+CAPABILITIES = {'browserName': 'fake'}
+
+SITE = {
+    'http://a.test/': ['http://a.test/1', 'http://a.test/2#top', 'http://b.test/', 'mailto:x@a.test'],
+    'http://a.test/1': ['http://a.test/', 'http://a.test/2', 'http://a.test/1/deep'],
+    'http://a.test/2': ['http://a.test/1'],
+    'http://a.test/1/deep': ['http://a.test/1/deeper'],
+}
+
+
+def test_crawl_follows_seed_domain_links_once():
+    async def main():
+        async with FakeWebDriverServer() as server:
+            for url in SITE:
+                server.add_page(url, '<html><head><title>%s</title></head><body></body></html>' % url)
+            server.add_script('document.links', lambda session, args: SITE.get(session.window.url, []))
+            drivers = await asyncio.gather(*[
+                AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES) for _ in range(2)])
+
+            async def title(driver, entry):
+                return await driver.title
+
+            try:
+                crawler = Crawler(drivers, extract=title, max_depth=2, delay=0, per_domain=2)
+                return [page async for page in crawler.crawl(['http://a.test/'])]
+            finally:
+                await asyncio.gather(*[driver.quit() for driver in drivers])
+
+    pages = asyncio.run(main())
+    assert sorted(page.url for page in pages) == [
+        'http://a.test/', 'http://a.test/1', 'http://a.test/1/deep', 'http://a.test/2']
+    assert all(page.data == page.url and page.error is None for page in pages)
+    assert {page.url: page.depth for page in pages}['http://a.test/1/deep'] == 2
+
+
+def test_frontier_is_polite_per_domain():
+    async def main():
+        loop = asyncio.get_running_loop()
+        frontier = Frontier(delay=0.1, per_domain=1)
+        for url in ('http://a.test/1', 'http://a.test/2', 'http://b.test/1'):
+            frontier.add(url)
+        first = await frontier.get()
+        other = await asyncio.wait_for(frontier.get(), 0.05)
+        frontier.done(first)
+        done = loop.time()
+        second = await frontier.get()
+        waited = loop.time() - done
+        frontier.done(other)
+        frontier.done(second)
+        return first.url, other.url, second.url, waited, await frontier.get()
+
+    first, other, second, waited, end = asyncio.run(main())
+    assert (first, other, second) == ('http://a.test/1', 'http://b.test/1', 'http://a.test/2')
+    assert waited >= 0.09
+    assert end is None
+
+
+def test_frontier_spills_to_disk_and_dedupes(tmp_path):
+    async def main():
+        frontier = Frontier(delay=0, max_memory=4, spill_dir=str(tmp_path))
+        for i in range(20):
+            assert frontier.add('http://a.test/%d' % i, priority=i)
+        assert not frontier.add('http://a.test/3#fragment')
+        state = len(frontier), frontier.spilled, len(os.listdir(str(tmp_path)))
+        urls = []
+        while True:
+            entry = await frontier.get()
+            if entry is None:
+                break
+            urls.append(entry.url)
+            frontier.done(entry)
+        return state, urls, os.listdir(str(tmp_path))
+
+    state, urls, left = asyncio.run(main())
+    assert state == (20, 16, 8)
+    assert sorted(urls) == sorted('http://a.test/%d' % i for i in range(20))
+    assert urls[:4] == ['http://a.test/0', 'http://a.test/1', 'http://a.test/2', 'http://a.test/3']
+    assert left == []
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    added = sum(bloom.add('http://a.test/%d' % i) for i in range(10000))
+    assert added > 9900
+    assert all('http://a.test/%d' % i in bloom for i in range(10000))
+    assert not bloom.add('http://a.test/5')
+    false_positives = sum('http://b.test/%d' % i in bloom for i in range(10000))
+    assert false_positives < 300
+    assert len(bloom.bits) < 12500
+
+
+class FlakyDriver(object):
+    """Fails a page with errors of the connection rather than of WebDriver."""
+
+    errors = {'http://a.test/timeout': asyncio.TimeoutError(),
+              'http://a.test/refused': aiohttp.ClientConnectionError('refused')}
+
+    def __init__(self):
+        self.url = None
+
+    async def get(self, url):
+        self.url = url
+        if url in self.errors:
+            raise self.errors[url]
+
+    async def execute_script(self, script):
+        return ['http://a.test/timeout', 'http://a.test/refused', 'http://a.test/ok'] if self.url == 'http://a.test/' else []
+
+
+def test_connection_errors_fail_the_page_not_the_crawl():
+    async def main():
+        crawler = Crawler([FlakyDriver()], delay=0)
+        return {page.url: page.error async for page in crawler.crawl(['http://a.test/'])}
+
+    errors = asyncio.run(main())
+    assert set(errors) == {'http://a.test/', 'http://a.test/timeout', 'http://a.test/refused', 'http://a.test/ok'}
+    assert isinstance(errors['http://a.test/timeout'], asyncio.TimeoutError)
+    assert isinstance(errors['http://a.test/refused'], aiohttp.ClientConnectionError)
+    assert errors['http://a.test/ok'] is None
+
+
+def test_frontier_takes_a_plain_set():
+    frontier = Frontier(seen=set())
+    assert frontier.add('http://a.test/')
+    assert not frontier.add('http://a.test/#top')
+    assert len(frontier) == 1
+
+
+def test_bloom_filter_warns_past_its_capacity(caplog):
+    frontier = Frontier(capacity=100, error_rate=0.01)
+    assert frontier.seen.capacity == 100
+    with caplog.at_level(logging.WARNING, logger='asyncselenium.webdriver.support.crawler'):
+        for i in range(300):
+            frontier.seen.add('http://a.test/%d' % i)
+    assert len([record for record in caplog.records if 'capacity' in record.getMessage()]) == 1
+
+
+def test_tiny_frontiers_read_their_spilled_urls_back(tmp_path):
+    async def main(max_memory):
+        frontier = Frontier(delay=0, max_memory=max_memory, spill_dir=str(tmp_path / str(max_memory)))
+        for i in range(3):
+            frontier.add('http://a.test/%d' % i)
+        urls = []
+        while True:
+            entry = await asyncio.wait_for(frontier.get(), 5)
+            if entry is None:
+                return urls
+            urls.append(entry.url)
+            frontier.done(entry)
+
+    for max_memory in (0, 1):
+        assert sorted(asyncio.run(main(max_memory))) == ['http://a.test/%d' % i for i in range(3)]
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+import pytest
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.command import Command
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.remote.deadline import DeadlineExceeded
+from asyncselenium.webdriver.support import async_expected_conditions as ec
+from asyncselenium.webdriver.support.async_wait import AsyncWebDriverWait
+
+CAPABILITIES = {'browserName': 'fake'}
+
+
+def test_deadline_bounds_commands_and_waits():
+    async def main():
+        async with FakeWebDriverServer(command_latency={Command.GET_TITLE: 1}) as server:
+            server.add_page('http://site.test/', '<html><head><title>t</title></head><body></body></html>')
+            driver = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+            timings = []
+            try:
+                started = time.perf_counter()
+                with pytest.raises(DeadlineExceeded):
+                    async with driver.deadline(0.1):
+                        await driver.get('http://site.test/')
+                        await driver.title
+                timings.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                with pytest.raises(DeadlineExceeded):
+                    async with driver.deadline(10):
+                        async with driver.deadline(0.2):
+                            await AsyncWebDriverWait(driver, 30, 0.05).until(
+                                ec.presence_of_element_located((By.ID, 'never')))
+                timings.append(time.perf_counter() - started)
+
+                # nothing is left cancelled once the block is over
+                assert await driver.current_url == 'http://site.test/'
+                assert driver.command_executor.breaker.failures == 0
+            finally:
+                await driver.quit()
+            return timings
+
+    timings = asyncio.run(main())
+    assert max(timings) < 0.5
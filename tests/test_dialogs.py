@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+from selenium.common.exceptions import NoAlertPresentException
+
+from asyncselenium.common.async_alert import AsyncAlert
+from asyncselenium.webdriver.chrome.async_dialogs import DialogWatcher
+from asyncselenium.webdriver.chrome.async_webdriver import AsyncChromeDriver
+from asyncselenium.webdriver.support import async_expected_conditions as ec
+from asyncselenium.webdriver.support.async_wait import AsyncWebDriverWait
+
+
+class FakePage(object):
+    """Stands in for the CDPSession of a page."""
+
+    def __init__(self):
+        self.sent = []
+        self.listeners = {}
+        self.detached = False
+
+    async def send(self, method, params=None, timeout=None):
+        self.sent.append((method, params))
+        if method == 'Page.handleJavaScriptDialog':
+            self.emit('Page.javascriptDialogClosed', {'result': params['accept']})
+        return {}
+
+    def on(self, event, callback):
+        self.listeners.setdefault(event, []).append(callback)
+
+    def off(self, event, callback):
+        self.listeners.get(event, []).remove(callback)
+
+    def emit(self, event, params):
+        for callback in list(self.listeners.get(event, ())):
+            callback(params)
+
+    async def detach(self):
+        self.detached = True
+
+    def open_dialog(self, kind, message):
+        self.emit('Page.javascriptDialogOpening',
+                  {'type': kind, 'message': message, 'url': 'http://site.test/', 'defaultPrompt': ''})
+
+
+class FakeSwitchTo(object):
+    requests = 0
+
+    @property
+    async def alert(self):
+        self.requests += 1
+        raise NoAlertPresentException()
+
+
+class FakeDriver(object):
+    dialog_watcher = None
+    _current_window_handle = None
+
+    def __init__(self):
+        self.switch_to = FakeSwitchTo()
+
+
+class counted_alert_is_present(ec.alert_is_present):
+    calls = 0
+
+    async def __call__(self, driver):
+        self.calls += 1
+        return await super().__call__(driver)
+
+
+def test_alert_is_present_wakes_up_on_the_dialog_event():
+    async def main():
+        page = FakePage()
+        driver = FakeDriver()
+        driver.dialog_watcher = await DialogWatcher(page).start()
+        assert await ec.alert_is_present()(driver) is False
+
+        asyncio.get_running_loop().call_later(0.05, page.open_dialog, 'alert', 'saved')
+        started = time.perf_counter()
+        alert = await AsyncWebDriverWait(driver, 5, poll_frequency=2).until(ec.alert_is_present())
+        elapsed = time.perf_counter() - started
+        assert isinstance(alert, AsyncAlert)
+        assert driver.dialog_watcher.current.message == 'saved'
+
+        await driver.dialog_watcher.accept('ok')
+        assert driver.dialog_watcher.current is None
+        assert page.sent[-1] == ('Page.handleJavaScriptDialog', {'accept': True, 'promptText': 'ok'})
+        return elapsed
+
+    # the wait resolves on the event, not on its 2s poll
+    assert asyncio.run(main()) < 1
+
+
+def test_policy_handles_dialogs_as_they_open():
+    async def main():
+        page = FakePage()
+        watcher = await DialogWatcher(page, policy=lambda dialog: dialog.type != 'confirm').start()
+        page.open_dialog('alert', 'hello')
+        page.open_dialog('confirm', 'delete?')
+        await asyncio.sleep(0)
+        watcher.stop()
+        return page.sent, watcher
+
+    sent, watcher = asyncio.run(main())
+    assert sent == [('Page.enable', None),
+                    ('Page.handleJavaScriptDialog', {'accept': True}),
+                    ('Page.handleJavaScriptDialog', {'accept': False})]
+    assert [dialog.message for dialog in watcher.history] == ['hello', 'delete?']
+    assert watcher.current is None
+
+
+def test_until_not_sleeps_until_the_dialog_closes():
+    async def main():
+        page = FakePage()
+        driver = FakeDriver()
+        driver.dialog_watcher = await DialogWatcher(page).start()
+        page.open_dialog('alert', 'busy')
+        asyncio.get_running_loop().call_later(0.5, page.emit, 'Page.javascriptDialogClosed', {'result': True})
+        condition = counted_alert_is_present()
+        started = time.perf_counter()
+        assert await AsyncWebDriverWait(driver, 5, poll_frequency=0.1).until_not(condition) is False
+        return condition.calls, time.perf_counter() - started
+
+    calls, elapsed = asyncio.run(main())
+    # at most one check per poll while the dialog is open, not a busy loop
+    assert calls <= 7
+    assert elapsed < 1
+
+
+def test_watcher_of_another_window_is_not_trusted():
+    async def main():
+        page = FakePage()
+        driver = FakeDriver()
+        driver.dialog_watcher = await DialogWatcher(page, handle='CDwindow-A').start()
+        driver._current_window_handle = 'CDwindow-A'
+        page.open_dialog('alert', 'on A')
+        on_a = await ec.alert_is_present()(driver)
+        driver._current_window_handle = 'CDwindow-B'
+        on_b = await ec.alert_is_present()(driver)
+        return on_a, on_b, driver.switch_to.requests, ec.alert_is_present().wakeup(driver)
+
+    on_a, on_b, requests, wakeup = asyncio.run(main())
+    assert isinstance(on_a, AsyncAlert)
+    assert on_b is False
+    assert requests == 1
+    assert wakeup is None
+
+
+def test_unwatching_detaches_the_session():
+    async def main():
+        page = FakePage()
+        # no browser needed, only the dialog watcher state of the driver
+        driver = object.__new__(AsyncChromeDriver)
+        driver.dialog_watcher = await DialogWatcher(page).start()
+        await driver.unwatch_dialogs()
+        await driver.unwatch_dialogs()
+        return page, driver.dialog_watcher
+
+    page, watcher = asyncio.run(main())
+    assert page.detached
+    assert watcher is None
+    assert not any(page.listeners.values())
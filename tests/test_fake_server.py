@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.command import Command
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.support import async_expected_conditions as ec
+from asyncselenium.webdriver.support.async_wait import AsyncWebDriverWait
+
+HOME = '''<html><head><title>Home</title></head><body>
+<form id="search"><input id="kw" name="q" value=""><input type="submit" id="su" class="btn primary"></form>
+<div class="results"><p>first</p><p style="display:none">hidden</p></div>
+<a id="next" href="/next">Next page</a>
+</body></html>'''
+NEXT = '<html><head><title>Next</title></head><body><h1>Second</h1></body></html>'
+CAPABILITIES = {'browserName': 'fake'}
+
+
+def run(scenario, **server_args):
+    async def main():
+        async with FakeWebDriverServer(**server_args) as server:
+            server.add_page('http://site.test/', HOME)
+            server.add_page('http://site.test/next', NEXT)
+            driver = await AsyncWebdriver(command_executor=server.url,
+                                          desired_capabilities=CAPABILITIES)
+            try:
+                return await scenario(driver, server)
+            finally:
+                await driver.quit()
+    return asyncio.run(main())
+
+
+def test_navigation_and_element_reads():
+    async def scenario(driver, server):
+        await driver.get('http://site.test/')
+        assert await driver.title == 'Home'
+        assert await driver.current_url == 'http://site.test/'
+        button = await driver.find_element_by_xpath('//*[@id="su"]')
+        assert await button.tag_name == 'input'
+        assert await button.get_attribute('class') == 'btn primary'
+        assert await button.is_displayed()
+        paragraphs = await driver.find_elements_by_css_selector('div.results > p')
+        assert [await p.text for p in paragraphs] == ['first', '']
+        search = await driver.find_element_by_name('q')
+        await search.send_keys('python')
+        assert await search.get_property('value') == 'python'
+        form = await driver.find_element_by_id('search')
+        assert len(await form.find_elements(By.TAG_NAME, 'input')) == 2
+        with pytest.raises(NoSuchElementException):
+            await driver.find_element_by_id('missing')
+
+        await (await driver.find_element_by_link_text('Next page')).click()
+        assert await driver.title == 'Next'
+        await driver.back()
+        assert await driver.title == 'Home'
+        assert (await driver.get_screenshot_as_png()).startswith(b'\x89PNG')
+    run(scenario)
+
+
+def test_cookies_windows_and_scripts():
+    async def scenario(driver, server):
+        await driver.get('http://site.test/')
+        await driver.add_cookie({'name': 'sid', 'value': '1'})
+        assert (await driver.get_cookie('sid'))['domain'] == 'site.test'
+        assert await driver.get_cookie('other') is None
+        await driver.delete_all_cookies()
+        assert await driver.get_cookies() == []
+
+        server.add_script('return 6 * 7', lambda session, args: 42)
+        assert await driver.execute_script('return 6 * 7') == 42
+        link = await driver.execute_script('return arguments[0]', await driver.find_element_by_id('next'))
+        assert await link.text == 'Next page'
+
+        original = await driver.current_window_handle
+        session = server.sessions[driver.session_id]
+        other = session.open_window(name='popup').handle
+        assert set(await driver.window_handles) == {original, other}
+        await driver.switch_to.window('popup')
+        assert await driver.current_window_handle == other
+    run(scenario)
+
+
+def test_wait_and_latency():
+    async def scenario(driver, server):
+        await driver.get('http://site.test/')
+        wait = AsyncWebDriverWait(driver, 0.2, poll_frequency=0.05)
+        assert await wait.until(ec.title_is('Home'))
+        with pytest.raises(TimeoutException):
+            await wait.until(ec.presence_of_element_located((By.ID, 'never')))
+        started = time.perf_counter()
+        await driver.title
+        return time.perf_counter() - started, server.command_counts
+
+    elapsed, counts = run(scenario, latency=0.001, command_latency={Command.GET_TITLE: 0.05})
+    assert elapsed >= 0.05
+    assert counts[Command.FIND_ELEMENT] >= 2
+    assert counts[Command.NEW_SESSION] == 1
+
+
+def test_reading_a_log_keeps_the_other_types():
+    async def scenario(driver, server):
+        session = server.sessions[driver.session_id]
+        session.logs.extend([{'type': 'browser', 'message': 'page'}, {'type': 'driver', 'message': 'chromedriver'}])
+        driver_log = await driver.get_log('driver')
+        return driver_log, await driver.get_log('browser'), await driver.get_log('browser')
+
+    driver_log, browser_log, again = run(scenario)
+    assert [entry['message'] for entry in driver_log] == ['chromedriver']
+    assert [entry['message'] for entry in browser_log] == ['page']
+    assert again == []
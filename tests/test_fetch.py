@@ -0,0 +1,71 @@
+import asyncio
+
+from aiohttp import web
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.remote.fetch import cookie_header
+
+PDF = b'%PDF-1.4 ' + b'x' * 300000
+
+
+def test_fetch_uses_the_session_cookies(tmp_path):
+    seen = []
+
+    async def report(request):
+        seen.append((request.headers.get('Cookie'), request.headers.get('User-Agent')))
+        if request.cookies.get('sid') != 'secret':
+            raise web.HTTPForbidden()
+        return web.Response(body=PDF, content_type='application/pdf')
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/files/report.pdf', report)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        origin = 'http://127.0.0.1:%d' % site._server.sockets[0].getsockname()[1]
+        try:
+            async with FakeWebDriverServer() as server:
+                server.add_page(origin + '/', '<html><head><title>files</title></head><body></body></html>')
+                driver = await AsyncWebdriver(command_executor=server.url,
+                                              desired_capabilities={'browserName': 'fake'})
+                try:
+                    await driver.get(origin + '/')
+                    await driver.add_cookie({'name': 'sid', 'value': 'secret'})
+                    await driver.add_cookie({'name': 'other', 'value': '1', 'path': '/admin'})
+                    streamed = await driver.fetch(origin + '/files/report.pdf', path=tmp_path / 'report.pdf')
+                    in_memory = await driver.fetch(origin + '/files/report.pdf')
+                    timeout = driver._http.timeout
+                finally:
+                    await driver.quit()
+        finally:
+            await runner.cleanup()
+        return streamed, in_memory, timeout
+
+    streamed, in_memory, timeout = asyncio.run(main())
+    # a pooled client only gives up on stalled downloads
+    assert timeout.total is None and timeout.sock_read
+    assert streamed.size == len(PDF) and streamed.body is None
+    assert (tmp_path / 'report.pdf').read_bytes() == PDF
+    assert not (tmp_path / 'report.pdf.part').exists()
+    assert in_memory.body == PDF
+    assert seen[0] == ('sid=secret', 'Mozilla/5.0 (FakeWebDriver) asyncselenium')
+
+
+def test_cookie_header_filtering():
+    cookies = [{'name': 'a', 'value': '1', 'domain': '.example.com', 'path': '/'},
+               {'name': 'b', 'value': '2', 'domain': 'example.com', 'path': '/docs', 'secure': True},
+               {'name': 'c', 'value': '3', 'domain': 'other.com', 'path': '/'},
+               {'name': 'd', 'value': '4', 'domain': 'example.com', 'path': '/', 'expiry': 1}]
+    assert cookie_header(cookies, 'https://www.example.com/docsets') == 'a=1'
+    assert cookie_header(cookies, 'https://example.com/docs/x.pdf') == 'b=2; a=1'
+    assert cookie_header(cookies, 'http://example.com/docs/x.pdf') == 'a=1'
+
+
+def test_host_only_cookies_are_not_sent_to_subdomains():
+    cookies = [{'name': 'host', 'value': '1', 'domain': 'example.com', 'path': '/'},
+               {'name': 'domain', 'value': '2', 'domain': '.example.com', 'path': '/'}]
+    assert cookie_header(cookies, 'https://example.com/') == 'host=1; domain=2'
+    assert cookie_header(cookies, 'https://www.example.com/') == 'domain=2'
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+
+import pytest
+from selenium.common.exceptions import JavascriptException, NoSuchElementException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.command import Command
+
+from asyncselenium.testing.fake_server import FakeDriverError, FakeWebDriverServer
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.support import async_expected_conditions as ec
+from asyncselenium.webdriver.support.async_wait import AsyncWebDriverWait
+from asyncselenium.webdriver.support.flight_recorder import FlightRecorder
+
+CAPABILITIES = {'browserName': 'fake'}
+
+
+def _fail(session, args):
+    raise FakeDriverError('javascript error', 'boom')
+
+
+def run(scenario, **recorder_args):
+    dumps = []
+    recorder = FlightRecorder(sink=lambda session_id, reason, text: dumps.append((session_id, reason, text)),
+                              **recorder_args)
+
+    async def main():
+        async with FakeWebDriverServer() as server:
+            server.add_page('http://site.test/', '<html><head><title>Home</title></head><body></body></html>')
+            server.add_script('fail()', _fail)
+            driver = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+            driver.command_executor.add_listener(recorder)
+            try:
+                return await scenario(driver, recorder, dumps)
+            finally:
+                await driver.quit()
+    return asyncio.run(main())
+
+
+def test_ring_buffer_keeps_the_last_commands():
+    async def scenario(driver, recorder, dumps):
+        await driver.get('http://site.test/')
+        for _ in range(10):
+            await driver.title
+        return recorder.records(driver.session_id), dumps
+
+    records, dumps = run(scenario, size=5)
+    assert len(records) == 5
+    assert [record[1] for record in records] == [Command.GET_TITLE] * 5
+    assert all(record[3] == 200 and record[4] is None for record in records)
+    assert dumps == []
+
+
+def test_payloads_are_truncated():
+    async def scenario(driver, recorder, dumps):
+        await driver.execute_script('return arguments[0]', 'x' * 1000)
+        return recorder.records(driver.session_id)[-1], recorder.format(driver.session_id)
+
+    record, text = run(scenario, payload_limit=20)
+    started, command, duration, status, exception, size, body = record
+    assert command == Command.W3C_EXECUTE_SCRIPT
+    assert len(body) == 20
+    assert size > 1000
+    assert 'body=%s...' % body in text
+
+
+def test_wait_timeout_dumps_once_and_ignored_misses_do_not():
+    async def scenario(driver, recorder, dumps):
+        await driver.get('http://site.test/')
+        with pytest.raises(NoSuchElementException):
+            await driver.find_element_by_id('missing')
+        assert dumps == []
+        with pytest.raises(TimeoutException):
+            await AsyncWebDriverWait(driver, 0.2, poll_frequency=0.05).until(
+                ec.presence_of_element_located((By.ID, 'missing')))
+        return driver.session_id, dumps
+
+    session_id, dumps = run(scenario)
+    assert len(dumps) == 1
+    dumped_session, reason, text = dumps[0]
+    assert dumped_session == session_id
+    assert isinstance(reason, TimeoutException)
+    assert text.startswith('flight recorder for session %s: TimeoutException' % session_id)
+    assert text.count(Command.FIND_ELEMENT) >= 2
+
+
+def test_webdriver_exception_dumps():
+    async def scenario(driver, recorder, dumps):
+        await driver.get('http://site.test/')
+        with pytest.raises(JavascriptException):
+            await driver.execute_script('fail()')
+        return dumps, recorder.records(driver.session_id)[-1]
+
+    dumps, last = run(scenario)
+    assert len(dumps) == 1
+    _, reason, text = dumps[0]
+    assert isinstance(reason, JavascriptException)
+    assert text.splitlines()[0].endswith(': JavascriptException(boom)')
+    assert (last[1], last[3]) == (Command.W3C_EXECUTE_SCRIPT, 500)
+    assert 'status=500' in text.splitlines()[-1]
+    assert Command.GET in text
+
+
+def test_nothing_is_formatted_or_logged_without_a_failure(monkeypatch, caplog):
+    formatted = []
+    original = FlightRecorder.format
+
+    def format(self, session_id, reason=None):
+        formatted.append(session_id)
+        return original(self, session_id, reason)
+    monkeypatch.setattr(FlightRecorder, 'format', format)
+
+    async def main():
+        recorder = FlightRecorder()
+        async with FakeWebDriverServer() as server:
+            server.add_page('http://site.test/', '<html><head><title>Home</title></head><body></body></html>')
+            server.add_script('fail()', _fail)
+            driver = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+            driver.command_executor.add_listener(recorder)
+            try:
+                await driver.get('http://site.test/')
+                await driver.title
+                assert formatted == []
+                with pytest.raises(JavascriptException):
+                    await driver.execute_script('fail()')
+            finally:
+                await driver.quit()
+            return driver.session_id
+
+    with caplog.at_level(logging.WARNING, logger='asyncselenium.webdriver.support.flight_recorder'):
+        session_id = asyncio.run(main())
+    assert formatted == [session_id]
+    assert len(caplog.records) == 1
+    assert caplog.records[0].getMessage().startswith('flight recorder for session %s' % session_id)
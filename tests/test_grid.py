@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.remote.async_grid import AsyncGridScheduler, GridEndpoint
+
+CAPABILITIES = {'browserName': 'fake'}
+
+
+def test_status_parsing():
+    endpoint = GridEndpoint('http://hub:4444/wd/hub/', capacity=4)
+    assert endpoint.url == 'http://hub:4444/wd/hub'
+    endpoint.update_status({'ready': True, 'nodes': [
+        {'availability': 'UP', 'slots': [{'session': None}, {'session': {'id': 'x'}}]},
+        {'availability': 'DOWN', 'slots': [{'session': None}]}]})
+    assert (endpoint.total_slots, endpoint.free_slots, endpoint.available) == (2, 1, 1)
+    endpoint.update_status({'ready': True, 'message': 'ChromeDriver ready'})
+    assert endpoint.free_slots is None
+    assert endpoint.available == 4
+
+
+def test_sessions_spread_over_endpoints():
+    async def main():
+        async with FakeWebDriverServer(max_sessions=2, latency=0.01) as small, \
+                FakeWebDriverServer(max_sessions=3, latency=0.01) as large:
+            async with AsyncGridScheduler([small.url, large.url], max_pending=1,
+                                          probe_interval=None, acquire_timeout=5) as scheduler:
+                drivers = await asyncio.gather(*[
+                    scheduler.create_driver(desired_capabilities=CAPABILITIES) for _ in range(5)])
+                placed = (len(small.sessions), len(large.sessions))
+
+                waiting = asyncio.ensure_future(scheduler.create_driver(desired_capabilities=CAPABILITIES))
+                await asyncio.sleep(0.05)
+                assert not waiting.done()
+                await scheduler.quit(drivers[0])
+                drivers[0] = await waiting
+
+                await asyncio.gather(*[scheduler.quit(driver) for driver in drivers])
+                return placed, len(small.sessions) + len(large.sessions)
+
+    placed, remaining = asyncio.run(main())
+    assert placed == (2, 3)
+    assert remaining == 0
+
+
+def test_caller_errors_keep_the_endpoint_ready():
+    async def main():
+        async with FakeWebDriverServer() as server:
+            async with AsyncGridScheduler([server.url], probe_interval=None) as scheduler:
+                with pytest.raises(TypeError):
+                    await scheduler.create_driver(desired_capabilities=CAPABILITIES, no_such_argument=1)
+                endpoint, = scheduler.endpoints
+                ready = endpoint.ready
+                driver = await scheduler.create_driver(desired_capabilities=CAPABILITIES)
+                await scheduler.quit(driver)
+                return ready, endpoint.pending
+
+    assert asyncio.run(main()) == (True, 0)
@@ -0,0 +1,104 @@
+import asyncio
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.chrome.async_log_stream import CDPLogStream
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.remote.log_stream import LogStream
+
+CAPABILITIES = {'browserName': 'fake'}
+
+
+def _entry(message):
+    return {'level': 'INFO', 'message': message, 'source': 'console-api', 'timestamp': 0}
+
+
+def test_polling_stream_bounds_its_buffer():
+    async def main():
+        async with FakeWebDriverServer() as server:
+            driver = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+            try:
+                session = server.sessions[driver.session_id]
+                session.logs.extend(_entry(str(i)) for i in range(5))
+                async with driver.log_stream('browser', max_size=3) as stream:
+                    while stream.received < 5:
+                        await asyncio.sleep(0.01)
+                    first = [(await stream.__anext__())['message'] for _ in range(3)]
+                    session.logs.append(_entry('late'))
+                    late = await asyncio.wait_for(stream.__anext__(), 5)
+                return first, late['message'], stream.dropped, [entry async for entry in stream]
+            finally:
+                await driver.quit()
+
+    first, late, dropped, rest = asyncio.run(main())
+    assert first == ['2', '3', '4']
+    assert late == 'late'
+    assert dropped == 2
+    assert rest == []
+
+
+class FakePage(object):
+
+    def __init__(self):
+        self.sent = []
+        self.listeners = {}
+
+    async def send(self, method, params=None, timeout=None):
+        self.sent.append(method)
+        return {}
+
+    def on(self, event, callback):
+        self.listeners.setdefault(event, []).append(callback)
+
+    def off(self, event, callback):
+        self.listeners.get(event, []).remove(callback)
+
+    async def detach(self):
+        self.sent.append('detach')
+
+    def emit(self, event, params):
+        for callback in list(self.listeners.get(event, ())):
+            callback(params)
+
+
+class FakeDriver(object):
+
+    def __init__(self, page):
+        self.page = page
+
+    async def current_target(self):
+        return self.page
+
+
+def test_cdp_stream_converts_events():
+    async def main():
+        page = FakePage()
+        stream = CDPLogStream(FakeDriver(page))
+        await stream.start()
+        page.emit('Runtime.consoleAPICalled', {
+            'type': 'error', 'timestamp': 1500.5,
+            'args': [{'type': 'string', 'value': 'failed'}, {'type': 'number', 'value': 3}],
+            'stackTrace': {'callFrames': [{'url': 'http://site.test/app.js'}]}})
+        page.emit('Log.entryAdded', {'entry': {
+            'source': 'network', 'level': 'warning', 'text': 'slow', 'timestamp': 2000}})
+        entries = [await stream.__anext__(), await stream.__anext__()]
+        await stream.close()
+        return entries, page.sent, page.listeners
+
+    entries, sent, listeners = asyncio.run(main())
+    assert entries == [
+        {'level': 'SEVERE', 'message': 'failed 3', 'source': 'console-api', 'timestamp': 1500,
+         'url': 'http://site.test/app.js'},
+        {'level': 'WARNING', 'message': 'slow', 'source': 'network', 'timestamp': 2000}]
+    assert sent == ['Runtime.enable', 'Log.enable', 'detach']
+    assert not any(listeners.values())
+
+
+def test_base_stream_is_fed_by_push():
+    async def main():
+        async with LogStream(max_size=2) as stream:
+            for message in ('a', 'b', 'c'):
+                stream.push(_entry(message))
+            first = await stream.__anext__()
+        return first['message'], [entry['message'] async for entry in stream], stream.dropped
+
+    assert asyncio.run(main()) == ('b', ['c'], 1)
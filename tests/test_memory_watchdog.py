@@ -0,0 +1,129 @@
+import asyncio
+
+from selenium.webdriver.remote.command import Command
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.chrome.memory_watchdog import RecyclingDriver
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+
+CAPABILITIES = {'browserName': 'fake'}
+
+
+def _export(session, args):
+    return {'origin': 'http://site.test',
+            'localStorage': dict(session.local_storage),
+            'sessionStorage': dict(session.session_storage)}
+
+
+def _import(session, args):
+    session.local_storage.update(args[0])
+    session.session_storage.update(args[1])
+
+
+class LeakyDriver(AsyncWebdriver):
+    heap = {}
+
+    async def memory_usage(self):
+        return {'js_heap': self.heap.get(self.session_id, 0), 'rss': None}
+
+
+def test_driver_is_recycled_past_its_heap_limit_and_keeps_its_state():
+    async def main():
+        async with FakeWebDriverServer() as server:
+            server.add_script('dump(window.localStorage)', _export)
+            server.add_script('load(window.localStorage', _import)
+            server.add_page('http://site.test/', '<html><body></body></html>')
+            server.add_page('http://site.test/page', '<html><head><title>page</title></head><body></body></html>')
+
+            def factory():
+                return LeakyDriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+
+            recycled = []
+
+            async def on_recycle(driver):
+                recycled.append(driver.session_id)
+
+            async with RecyclingDriver(factory, max_js_heap=100, interval=0.02, on_recycle=on_recycle) as driver:
+                first = driver.driver.session_id
+                await driver.get('http://site.test/page')
+                await driver.add_cookie({'name': 'sid', 'value': 'secret'})
+                server.sessions[first].local_storage['token'] = 't'
+                await asyncio.sleep(0.1)
+                assert driver.recycles == 0
+
+                LeakyDriver.heap[first] = 150
+                while not driver.recycles:
+                    await driver.title
+                second = driver.driver.session_id
+                return (first, second, recycled, await driver.title, await driver.get_cookie('sid'),
+                        dict(server.sessions[second].local_storage), set(server.sessions))
+
+    first, second, recycled, title, cookie, storage, sessions = asyncio.run(main())
+    assert second != first
+    assert recycled == [second]
+    assert title == 'page'
+    assert cookie['value'] == 'secret'
+    assert storage == {'token': 't'}
+    assert first not in sessions
+
+
+def test_driver_is_recycled_at_its_age_limit():
+    async def main():
+        async with FakeWebDriverServer() as server:
+            def factory():
+                return AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+
+            async with RecyclingDriver(factory, max_age=0.05, interval=0.02, keep_state=False) as driver:
+                # the old session is quit right after the swap
+                while driver.recycles < 2 or len(server.sessions) > 1:
+                    await asyncio.sleep(0.02)
+                return driver.recycles, len(server.sessions)
+
+    recycles, sessions = asyncio.run(asyncio.wait_for(main(), 10))
+    assert recycles >= 2
+    assert sessions == 1
+
+
+def test_execute_and_switch_to_follow_the_recycled_driver():
+    async def main():
+        async with FakeWebDriverServer() as server:
+            server.add_page('http://site.test/page', '<html><head><title>page</title></head><body></body></html>')
+
+            def factory():
+                return AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+
+            async with RecyclingDriver(factory, interval=60, keep_state=False) as driver:
+                first = driver.driver.session_id
+                switch_to = driver.switch_to
+                await driver.get('http://site.test/page')
+                recycling = asyncio.ensure_future(driver.recycle())
+                await asyncio.sleep(0)
+                # held back until the fresh driver is in place
+                title = (await driver.execute(Command.GET_TITLE))['value']
+                await recycling
+                await switch_to.window(await driver.current_window_handle)
+                return first, driver.driver.session_id, title, set(server.sessions)
+
+    first, second, title, sessions = asyncio.run(main())
+    assert second != first
+    assert title != 'page'
+    assert sessions == {second}
+
+
+def test_crashed_driver_is_recycled_without_its_state():
+    async def main():
+        async with FakeWebDriverServer() as server:
+            def factory():
+                return AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+
+            async with RecyclingDriver(factory, interval=60) as driver:
+                first = driver.driver.session_id
+                # the browser is gone, every command of its session fails
+                del server.sessions[first]
+                await driver.recycle('crashed')
+                return first, driver.driver.session_id, driver.recycles, await driver.current_url
+
+    first, second, recycles, url = asyncio.run(main())
+    assert second != first
+    assert recycles == 1
+    assert url == 'about:blank'
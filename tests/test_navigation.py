@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from selenium.common.exceptions import InvalidArgumentException, TimeoutException
+from selenium.webdriver.common.by import By
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.chrome.async_navigation import navigate
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+
+CAPABILITIES = {'browserName': 'fake'}
+
+
+def test_get_returns_once_the_locator_matches():
+    async def main():
+        async with FakeWebDriverServer() as server:
+            server.add_page('http://site.test/', '<html><body><p>loading</p></body></html>')
+            driver = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+            try:
+                session = server.sessions[driver.session_id]
+                asyncio.get_running_loop().call_later(0.2, session.append_html, '<div id="data">42</div>')
+                await driver.get('http://site.test/', until=(By.ID, 'data'), timeout=5)
+                text = await (await driver.find_element_by_id('data')).text
+                await driver.get('http://site.test/', until='domcontentloaded')
+                with pytest.raises(TimeoutException):
+                    await driver.get('http://site.test/', until=(By.ID, 'missing'), timeout=0.2)
+                with pytest.raises(InvalidArgumentException):
+                    await driver.get('http://site.test/', until='load')
+                return text
+            finally:
+                await driver.quit()
+
+    assert asyncio.run(main()) == '42'
+
+
+class FakePage(object):
+    """A page loading a document and one slow request, driven by timers."""
+
+    def __init__(self):
+        self.sent = []
+        self.listeners = {}
+        self.has_data = False
+
+    async def send(self, method, params=None, timeout=None):
+        self.sent.append(method)
+        loop = asyncio.get_running_loop()
+        if method == 'Page.navigate':
+            loop.call_later(0.01, self.emit, 'Network.requestWillBeSent', {'requestId': 'img'})
+            loop.call_later(0.05, self.emit, 'Page.domContentEventFired', {})
+            loop.call_later(0.1, setattr, self, 'has_data', True)
+            loop.call_later(0.3, self.emit, 'Network.loadingFinished', {'requestId': 'img'})
+            return {'frameId': 'F'}
+        if method == 'Runtime.evaluate':
+            return {'result': {'type': 'boolean', 'value': self.has_data}}
+        return {}
+
+    def on(self, event, callback):
+        self.listeners.setdefault(event, []).append(callback)
+
+    def off(self, event, callback):
+        self.listeners[event] = [entry for entry in self.listeners.get(event, []) if entry != callback]
+
+    async def wait_for(self, event, predicate=None, timeout=None):
+        future = asyncio.get_running_loop().create_future()
+
+        def accept(params):
+            if not future.done():
+                future.set_result(params)
+        self.on(event, accept)
+        try:
+            return await future
+        finally:
+            self.off(event, accept)
+
+    async def detach(self):
+        self.sent.append('detach')
+
+    def emit(self, event, params):
+        for callback in list(self.listeners.get(event, ())):
+            callback(params)
+
+
+def test_devtools_navigation_ends_on_its_condition():
+    async def run(until, cancel_after=None):
+        page = FakePage()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        task = asyncio.ensure_future(navigate(page, 'http://site.test/', until, timeout=5, idle_time=0.1))
+        if cancel_after is not None:
+            await asyncio.sleep(cancel_after)
+            task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0)
+        return loop.time() - started, page.sent, page.listeners
+
+    async def main():
+        return {until: await run(until) for until in ('domcontentloaded', 'networkidle', (By.ID, 'data'))}, \
+            await run('networkidle', cancel_after=0.02)
+
+    results, cancelled = asyncio.run(main())
+    assert results['domcontentloaded'][0] < 0.3
+    assert 0.3 <= results['networkidle'][0] < 1
+    assert 0.1 <= results[(By.ID, 'data')][0] < 0.3
+    for elapsed, sent, listeners in list(results.values()) + [cancelled]:
+        assert sent[-2:] == ['Page.stopLoading', 'detach']
+        assert not any(listeners.values())
@@ -0,0 +1,45 @@
+import asyncio
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+
+CAPABILITIES = {'browserName': 'fake'}
+
+
+def _timing(session, args):
+    return {'url': session.window.url,
+            'navigation': {'type': 'navigate', 'ttfb': 12.5, 'load': 80},
+            'resources': {'count': 2, 'transferSize': 300, 'byType': {}, 'slowest': []}}
+
+
+def test_navigations_report_their_loads():
+    async def main():
+        loads = []
+
+        async def report(load):
+            loads.append(load)
+
+        async with FakeWebDriverServer() as server:
+            server.add_script("getEntriesByType('navigation')", _timing)
+            for name in 'ab':
+                server.add_page('http://site.test/%s' % name, '<html><body></body></html>')
+            driver = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+            try:
+                await driver.get('http://site.test/a')
+                driver.enable_telemetry(report)
+                await driver.get('http://site.test/b')
+                await driver.refresh()
+                await driver.back()
+                driver.disable_telemetry()
+                await driver.get('http://site.test/b')
+            finally:
+                await driver.quit()
+        return loads
+
+    loads = asyncio.run(main())
+    assert [(load.command, load.url) for load in loads] == [
+        ('get', 'http://site.test/b'), ('refresh', 'http://site.test/b'), ('back', 'http://site.test/a')]
+    assert loads[0].navigation['ttfb'] == 12.5
+    assert loads[0].resources['count'] == 2
+    assert loads[0].metrics == {}
+    assert all(load.elapsed >= 0 for load in loads)
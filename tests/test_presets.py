@@ -0,0 +1,48 @@
+import pytest
+from selenium.common.exceptions import InvalidArgumentException
+
+from asyncselenium import bench
+from asyncselenium.webdriver.chrome.async_webdriver import AsyncChromeDriver
+from asyncselenium.webdriver.chrome.presets import PRESETS
+
+
+def test_create_options_bundles_a_preset():
+    assert AsyncChromeDriver.create_options().arguments == []
+
+    capabilities = AsyncChromeDriver.create_options('scrape-fast').to_capabilities()
+    chrome = capabilities['goog:chromeOptions']
+    assert capabilities['pageLoadStrategy'] == 'eager'
+    assert {'--headless', '--disable-gpu', '--disable-extensions', '--disable-dev-shm-usage',
+            '--disable-background-timer-throttling'} <= set(chrome['args'])
+    assert chrome['prefs']['profile.managed_default_content_settings.images'] == 2
+
+    render = AsyncChromeDriver.create_options('deterministic-render').to_capabilities()
+    assert render['pageLoadStrategy'] == 'normal'
+    assert '--force-device-scale-factor=1' in render['goog:chromeOptions']['args']
+
+    for name in PRESETS:
+        args = AsyncChromeDriver.create_options(name).arguments
+        assert len(args) == len(set(args))
+
+    with pytest.raises(InvalidArgumentException):
+        AsyncChromeDriver.create_options('fastest')
+
+
+def test_preset_is_added_to_given_options_and_capabilities():
+    options = AsyncChromeDriver.create_options()
+    options.add_argument('--proxy-server=http://127.0.0.1:8080')
+    capabilities = AsyncChromeDriver._capabilities(options, None, 'scrape-fast')
+    assert capabilities['pageLoadStrategy'] == 'eager'
+    assert {'--headless', '--proxy-server=http://127.0.0.1:8080'} <= set(capabilities['goog:chromeOptions']['args'])
+
+    capabilities = AsyncChromeDriver._capabilities(None, {'acceptInsecureCerts': True}, 'low-memory')
+    assert capabilities['acceptInsecureCerts'] is True
+    assert set(PRESETS['low-memory']['arguments']) <= set(capabilities['goog:chromeOptions']['args'])
+
+    assert AsyncChromeDriver._capabilities(None, {'browserName': 'chrome'}, None) == {'browserName': 'chrome'}
+
+
+def test_presets_benchmark_needs_a_chromedriver(capsys):
+    with pytest.raises(SystemExit):
+        bench.main(['presets'])
+    assert '--chromedriver' in capsys.readouterr().err
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import pickle
+import zlib
+
+import pytest
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.support.process_runner import ProcessRunner
+
+PAGE = '<html><head><title>page %d</title></head><body></body></html>'
+
+
+async def scrape(number):
+    async with FakeWebDriverServer() as server:
+        server.add_page('http://site.test/%d' % number, PAGE % number)
+        driver = await AsyncWebdriver(command_executor=server.url,
+                                      desired_capabilities={'browserName': 'fake'})
+        try:
+            await driver.get('http://site.test/%d' % number)
+            return os.getpid(), await driver.title
+        finally:
+            await driver.quit()
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def _refuse():
+    raise TypeError('cannot be rebuilt here')
+
+
+class Unloadable(object):
+    """Pickles in a worker, fails to unpickle in the parent."""
+
+    def __reduce__(self):
+        return _refuse, ()
+
+
+def unloadable():
+    return Unloadable()
+
+
+async def crash(delay):
+    await asyncio.sleep(delay)
+    os._exit(3)
+
+
+async def tick():
+    return os.getpid()
+
+
+def _shard_of(index, workers):
+    # a shard key the runner sends to the worker ``index``
+    return next(key for key in map(str, range(100)) if zlib.crc32(key.encode('utf-8')) % workers == index)
+
+
+def test_scenarios_run_in_workers():
+    async def main():
+        async with ProcessRunner(workers=2, max_concurrency=4) as runner:
+            results = await runner.map(scrape, range(6))
+            sharded = await asyncio.gather(*[runner.submit(scrape, n, shard_key='account-1') for n in range(3)])
+            with pytest.raises(ValueError, match='boom'):
+                await runner.submit(fail, 'boom')
+        return results, sharded
+
+    results, sharded = asyncio.run(main())
+    assert [title for _, title in results] == ['page %d' % n for n in range(6)]
+    assert os.getpid() not in {pid for pid, _ in results}
+    assert len({pid for pid, _ in sharded}) == 1
+
+
+def test_results_failing_to_unpickle_fail_their_future():
+    async def main():
+        async with ProcessRunner(workers=1) as runner:
+            with pytest.raises(RuntimeError, match='cannot be rebuilt here'):
+                await asyncio.wait_for(runner.submit(unloadable), 30)
+            # the runner keeps serving
+            return await runner.submit(os.getpid)
+
+    assert asyncio.run(main()) != os.getpid()
+
+
+def test_unpicklable_scenarios_are_refused_at_submit():
+    async def main():
+        async with ProcessRunner(workers=1) as runner:
+            with pytest.raises(pickle.PicklingError):
+                runner.submit(lambda: 1)
+            return await asyncio.wait_for(runner.submit(os.getpid), 30)
+
+    assert asyncio.run(main()) != os.getpid()
+
+
+def test_dead_worker_is_noticed_while_others_keep_answering():
+    async def main():
+        async with ProcessRunner(workers=2) as runner:
+            crashed = runner.submit(crash, 0.3, shard_key=_shard_of(0, 2))
+            busy = _shard_of(1, 2)
+            # results keep arriving well within the reader's idle timeout
+            while not crashed.done():
+                await runner.submit(tick, shard_key=busy)
+                await asyncio.sleep(0.05)
+            return crashed.exception()
+
+    error = asyncio.run(asyncio.wait_for(main(), 30))
+    assert 'exit code 3' in str(error)
@@ -0,0 +1,113 @@
+import asyncio
+import os
+
+from selenium.webdriver.chrome.options import Options
+
+from asyncselenium.webdriver.chrome.profile_template import ProfileTemplate
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+CACHE_ENTRY = os.path.join('Default', 'Cache', 'Cache_Data', 'f_000001')
+
+
+def _template(tmp_path):
+    template_path = str(tmp_path / 'template')
+    _write(os.path.join(template_path, 'Default', 'Preferences'), '{"first_run": false}')
+    _write(os.path.join(template_path, CACHE_ENTRY), 'cached')
+    _write(os.path.join(template_path, 'Local State'), '{}')
+    os.symlink('host-1234', os.path.join(template_path, 'SingletonLock'))
+    os.symlink('Preferences', os.path.join(template_path, 'Default', 'Prefs link'))
+    return template_path
+
+
+def test_clones_are_independent_copies_next_to_the_template(tmp_path):
+    template_path = _template(tmp_path)
+
+    async def main():
+        template = ProfileTemplate(template_path)
+        first, second = await asyncio.gather(template.clone(), template.clone())
+        return template, first, second
+
+    template, first, second = asyncio.run(main())
+    assert first.path != second.path
+    assert os.path.dirname(first.path) == str(tmp_path)
+    for profile in (first, second):
+        assert sum(profile.counts.values()) == 3
+        assert not os.path.lexists(os.path.join(profile.path, 'SingletonLock'))
+        assert os.readlink(os.path.join(profile.path, 'Default', 'Prefs link')) == 'Preferences'
+        with open(os.path.join(profile.path, 'Default', 'Cache', 'Cache_Data', 'f_000001')) as f:
+            assert f.read() == 'cached'
+
+    preferences = os.path.join(first.path, 'Default', 'Preferences')
+    if not first.counts['reflink']:
+        assert first.counts == {'reflink': 0, 'hardlink': 0, 'copy': 3}
+    # the template is left as it was
+    assert os.stat(os.path.join(template_path, CACHE_ENTRY)).st_mode & 0o200
+    with open(preferences, 'w') as f:
+        f.write('{"changed": true}')
+    with open(os.path.join(template_path, 'Default', 'Preferences')) as f:
+        assert f.read() == '{"first_run": false}'
+
+    options = first.apply(Options())
+    assert options.arguments == ['--user-data-dir=%s' % first.path]
+    asyncio.run(first.remove())
+    assert not os.path.exists(first.path)
+    assert os.path.exists(second.path)
+
+
+def test_cache_entries_are_hardlinked_on_request(tmp_path):
+    template_path = _template(tmp_path)
+    template = ProfileTemplate(template_path, use_reflinks=False, hardlink_cache=True)
+    profile = template.clone_sync()
+    assert profile.counts == {'reflink': 0, 'hardlink': 1, 'copy': 2}
+    cache = os.path.join(profile.path, CACHE_ENTRY)
+    assert os.stat(cache).st_ino == os.stat(os.path.join(template_path, CACHE_ENTRY)).st_ino
+    assert not os.stat(cache).st_mode & 0o222
+
+
+class FakeDriver(object):
+    """Writes the pages it gets into its --user-data-dir like a browser would."""
+
+    def __init__(self, options):
+        self.profile = options.arguments[-1].split('=', 1)[1]
+        self.visited = []
+        self.quit_called = False
+
+    async def get(self, url):
+        self.visited.append(url)
+        _write(os.path.join(self.profile, 'Default', 'Cache', 'Cache_Data', 'f_%06d' % len(self.visited)), url)
+
+    async def quit(self):
+        self.quit_called = True
+
+
+def test_prepare_runs_a_browser_on_the_template(tmp_path):
+    template_path = str(tmp_path / 'template')
+    drivers = []
+
+    async def driver_factory(options):
+        drivers.append(FakeDriver(options))
+        return drivers[-1]
+
+    async def warm(driver):
+        _write(os.path.join(driver.profile, 'Default', 'Preferences'), '{"logged_in": true}')
+
+    async def main():
+        template = await ProfileTemplate.prepare(template_path, urls=['http://a.test/', 'http://b.test/'],
+                                                 warm=warm, driver_factory=driver_factory, use_reflinks=False)
+        return template, await template.clone()
+
+    template, profile = asyncio.run(main())
+    driver, = drivers
+    assert driver.profile == template.path == os.path.abspath(template_path)
+    assert driver.visited == ['http://a.test/', 'http://b.test/']
+    assert driver.quit_called
+    assert not template.use_reflinks
+    assert profile.counts == {'reflink': 0, 'hardlink': 0, 'copy': 3}
+    with open(os.path.join(profile.path, 'Default', 'Cache', 'Cache_Data', 'f_000002')) as f:
+        assert f.read() == 'http://b.test/'
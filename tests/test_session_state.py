@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+from selenium.webdriver.remote.command import Command
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.remote.session_state import (SessionStateCache, cdp_to_webdriver, cookie_diff,
+                                                          same_origin, webdriver_to_cdp)
+
+CAPABILITIES = {'browserName': 'fake'}
+
+
+def _export(session, args):
+    return {'origin': 'http://site.test',
+            'localStorage': dict(session.local_storage),
+            'sessionStorage': dict(session.session_storage)}
+
+
+def _import(session, args):
+    session.local_storage.update(args[0])
+    session.session_storage.update(args[1])
+
+
+def test_state_roundtrip_and_cache(tmp_path):
+    logins = []
+
+    async def main():
+        async with FakeWebDriverServer() as server:
+            server.add_script('dump(window.localStorage)', _export)
+            server.add_script('load(window.localStorage', _import)
+
+            async def login(driver):
+                logins.append(driver.session_id)
+                await asyncio.sleep(0.05)
+                await driver.get('http://site.test/')
+                await driver.add_cookie({'name': 'sid', 'value': 'secret'})
+                await driver.add_cookie({'name': 'old', 'value': '1', 'expiry': int(time.time()) - 10})
+                server.sessions[driver.session_id].local_storage['token'] = 't'
+
+            cache = SessionStateCache(ttl=60, path=str(tmp_path))
+            drivers = await asyncio.gather(*[
+                AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES) for _ in range(3)])
+            try:
+                restored = await asyncio.gather(*[cache.restore(driver, 'alice', login) for driver in drivers])
+                last = drivers[-1]
+                cookies = {cookie['name'] for cookie in await last.get_cookies()}
+                storage = dict(server.sessions[last.session_id].local_storage)
+                url = await last.current_url
+            finally:
+                await asyncio.gather(*[driver.quit() for driver in drivers])
+            return restored, cookies, storage, url, SessionStateCache(ttl=60, path=str(tmp_path)).get('alice')
+
+    restored, cookies, storage, url, reloaded = asyncio.run(main())
+    assert len(logins) == 1
+    assert sorted(restored) == [False, True, True]
+    assert cookies == {'sid'}
+    assert storage == {'token': 't'}
+    assert url == 'http://site.test/'
+    assert reloaded['localStorage'] == {'token': 't'}
+
+
+def test_cdp_cookie_conversion():
+    cookie = cdp_to_webdriver({'name': 'a', 'value': 'b', 'domain': '.site.test', 'path': '/',
+                               'expires': 1700000000.5, 'session': False, 'sameSite': 'Lax'})
+    assert cookie['expiry'] == 1700000000 and cookie['sameSite'] == 'Lax'
+    assert 'expiry' not in cdp_to_webdriver({'name': 'a', 'value': 'b', 'expires': -1, 'session': True})
+
+
+def test_host_only_cookies_stay_host_only_over_cdp():
+    host_only = webdriver_to_cdp({'name': 'a', 'value': '1', 'domain': 'site.test', 'path': '/app', 'secure': True})
+    assert 'domain' not in host_only and host_only['url'] == 'https://site.test/app'
+    domain = webdriver_to_cdp({'name': 'a', 'value': '1', 'domain': '.site.test', 'path': '/'})
+    assert domain['domain'] == '.site.test' and 'url' not in domain
+
+
+def test_same_origin_compares_scheme_host_and_port():
+    assert same_origin('https://a.com/path?q', 'https://a.com')
+    assert same_origin('https://a.com:443/', 'https://a.com')
+    assert not same_origin('https://a.com.evil.net/', 'https://a.com')
+    assert not same_origin('http://a.com/', 'https://a.com')
+    assert not same_origin('https://a.com:8443/', 'https://a.com')
+    assert not same_origin('about:blank', 'null')
+
+
+def test_import_state_leaves_a_lookalike_host():
+    async def main():
+        async with FakeWebDriverServer() as server:
+            server.add_script('load(window.localStorage', _import)
+            server.add_page('http://site.test/', '<html><head><title>site</title></head><body></body></html>')
+            server.add_page('http://site.test.evil.net/', '<html><head><title>evil</title></head><body></body></html>')
+            driver = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+            try:
+                await driver.get('http://site.test.evil.net/')
+                await driver.import_state({'origin': 'http://site.test', 'localStorage': {'token': 't'},
+                                           'cookies': [{'name': 'sid', 'value': 's'}]})
+                return await driver.current_url, (await driver.get_cookie('sid'))['value']
+            finally:
+                await driver.quit()
+
+    assert asyncio.run(main()) == ('http://site.test/', 's')
+
+
+def test_bulk_cookies_send_only_changes():
+    async def main():
+        async with FakeWebDriverServer() as server:
+            driver = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+            try:
+                await driver.get('http://site.test/')
+                await driver.add_cookies([{'name': name, 'value': '1'} for name in ('a', 'b', 'c')])
+                before = server.command_counts.get(Command.ADD_COOKIE, 0)
+                counts = await driver.update_cookies(
+                    [{'name': 'a', 'value': '1'}, {'name': 'b', 'value': '2'}, {'name': 'd', 'value': '1'}],
+                    delete_missing=True)
+                added = server.command_counts[Command.ADD_COOKIE] - before
+                await driver.delete_cookies(['a', 'd'])
+                names = sorted(cookie['name'] for cookie in await driver.get_cookies())
+            finally:
+                await driver.quit()
+            return counts, added, names
+
+    counts, added, names = asyncio.run(main())
+    assert counts == (2, 1)
+    assert added == 2
+    assert names == ['b']
+
+    changed, stale = cookie_diff([{'name': 'a', 'value': '1', 'domain': '.site.test', 'path': '/'}],
+                                 [{'name': 'a', 'value': '1', 'domain': 'site.test'}])
+    assert (changed, stale) == ([], [])
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from selenium.common.exceptions import NoSuchWindowException
+from selenium.webdriver.remote.command import Command
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+
+CAPABILITIES = {'browserName': 'fake'}
+
+
+def run(scenario):
+    async def main():
+        async with FakeWebDriverServer() as server:
+            driver = await AsyncWebdriver(command_executor=server.url, desired_capabilities=CAPABILITIES)
+            try:
+                return await scenario(driver, server)
+            finally:
+                await driver.quit()
+    return asyncio.run(main())
+
+
+def _commands_since(server, before):
+    return {command: count - before.get(command, 0) for command, count in server.command_counts.items()
+            if count != before.get(command, 0)}
+
+
+def test_named_window_switches_use_the_index():
+    async def scenario(driver, server):
+        session = server.sessions[driver.session_id]
+        main = await driver.current_window_handle
+        for number in range(5):
+            session.open_window(name='popup%d' % number)
+        await driver.switch_to.window('popup3')
+        first = dict(server.command_counts)
+        await driver.switch_to.window('popup1')
+        await driver.switch_to.window(main)
+        assert await driver.current_window_handle == main
+        second = _commands_since(server, first)
+        await driver.switch_to.window('popup2')
+        await driver.close()
+        await driver.switch_to.window(main)
+        with pytest.raises(NoSuchWindowException):
+            await driver.switch_to.window('popup2')
+        return first, second
+
+    first, second = run(scenario)
+    assert first[Command.W3C_GET_CURRENT_WINDOW_HANDLE] == 1
+    # one round trip per switch once the names are indexed
+    assert second == {Command.SWITCH_TO_WINDOW: 2}
+
+
+def test_windows_renamed_after_indexing_are_found():
+    async def scenario(driver, server):
+        session = server.sessions[driver.session_id]
+        main = await driver.current_window_handle
+        popup = session.open_window(name='popup')
+        await driver.switch_to.window('popup')
+        await driver.switch_to.window(main)
+        popup.name = 'renamed'
+        await driver.switch_to.window('renamed')
+        found = await driver.current_window_handle
+        await driver.switch_to.window(main)
+        before = dict(server.command_counts)
+        await driver.switch_to.window('renamed')
+        cached = _commands_since(server, before)
+        await driver.switch_to.window(main)
+        popup.name = 'gone'
+        with pytest.raises(NoSuchWindowException):
+            await driver.switch_to.window('missing')
+        return found == popup.handle, cached, await driver.current_window_handle == main
+
+    found, cached, back = run(scenario)
+    assert found
+    assert cached == {Command.SWITCH_TO_WINDOW: 1}
+    assert back
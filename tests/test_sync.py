@@ -0,0 +1,49 @@
+import threading
+
+from selenium.webdriver.common.by import By
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.support import async_expected_conditions as ec
+from asyncselenium.webdriver.support.sync import BackgroundLoop, SyncWebElement, SyncWebdriver
+
+PAGE = '''<html><head><title>Home</title></head><body>
+<ul id="list"><li class="item">one</li><li class="item">two</li></ul><input id="kw" value="">
+</body></html>'''
+
+
+def test_threads_share_the_background_loop():
+    background = BackgroundLoop()
+    server = FakeWebDriverServer()
+    background.run(server.start())
+    server.add_page('http://site.test/', PAGE)
+    results, errors = [], []
+
+    def job():
+        try:
+            with SyncWebdriver(command_executor=server.url, desired_capabilities={'browserName': 'fake'},
+                               loop=background) as driver:
+                driver.get('http://site.test/')
+                assert driver.title == 'Home'
+                items = driver.find_element_by_id('list').find_elements(By.CSS_SELECTOR, 'li.item')
+                assert all(isinstance(item, SyncWebElement) for item in items)
+                search = driver.find_element(By.ID, 'kw')
+                search.send_keys('python')
+                assert driver.execute_script('return arguments[0]', search) == search
+                assert driver.wait(1, 0.05).until(ec.title_is('Home'))
+                results.append(([item.text for item in items], search.get_property('value')))
+        except Exception as e:
+            errors.append(e)
+
+    try:
+        threads = [threading.Thread(target=job) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        sessions = len(server.sessions)
+    finally:
+        background.run(server.stop())
+        background.stop()
+    assert not errors
+    assert results == [(['one', 'two'], 'python')] * 4
+    assert sessions == 0
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+from selenium.common.exceptions import InvalidArgumentException, TimeoutException
+from selenium.webdriver.remote.command import Command
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.chrome.async_cdp import CDPConnection, CDPError
+from asyncselenium.webdriver.chrome.async_tab_pool import AsyncTabPool, CDPTab, WindowTab
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+
+PAGE = '<html><head><title>page %s</title></head><body></body></html>'
+
+
+async def scrape(tab, number):
+    await tab.get('http://site.test/%d' % number)
+    return await tab.title
+
+
+def test_window_tab_runs_tasks_on_the_current_window():
+    async def main():
+        async with FakeWebDriverServer() as server:
+            for number in range(10):
+                server.add_page('http://site.test/%d' % number, PAGE % number)
+            driver = await AsyncWebdriver(command_executor=server.url, desired_capabilities={'browserName': 'fake'})
+            try:
+                with pytest.raises(InvalidArgumentException):
+                    AsyncTabPool(driver, size=3, use_cdp=False)
+                async with AsyncTabPool(driver, size=1, use_cdp=False) as pool:
+                    titles = await pool.map(scrape, range(10))
+                    windows = len(server.sessions[driver.session_id].windows)
+                remaining = len(await driver.window_handles)
+            finally:
+                await driver.quit()
+            return titles, windows, server.command_counts, remaining
+
+    titles, windows, counts, remaining = asyncio.run(main())
+    assert titles == ['page %d' % number for number in range(10)]
+    assert windows == remaining == 1
+    assert counts.get(Command.SWITCH_TO_WINDOW, 0) == 0
+    # the navigation command already waited for the load under the 'normal' strategy
+    assert counts.get(Command.W3C_EXECUTE_SCRIPT, 0) == 0
+
+
+def test_window_tab_waits_until_the_ready_state():
+    states = []
+
+    def ready_state(session, args):
+        return states.pop(0) if states else 'complete'
+
+    async def main():
+        async with FakeWebDriverServer() as server:
+            server.add_page('http://site.test/0', PAGE % 0)
+            server.add_script('document.readyState', ready_state)
+            driver = await AsyncWebdriver(command_executor=server.url,
+                                          desired_capabilities={'browserName': 'fake', 'pageLoadStrategy': 'eager'})
+            checks = {}
+            try:
+                tab = WindowTab(driver, await driver.current_window_handle, load_timeout=0.2)
+                for wait_until in ('load', 'domcontentloaded', None):
+                    states[:] = ['loading', 'interactive', 'interactive']
+                    before = server.command_counts.get(Command.W3C_EXECUTE_SCRIPT, 0)
+                    await tab.get('http://site.test/0', wait_until)
+                    checks[wait_until] = server.command_counts.get(Command.W3C_EXECUTE_SCRIPT, 0) - before
+                states[:] = ['interactive'] * 100
+                with pytest.raises(TimeoutException):
+                    await tab.get('http://site.test/0')
+            finally:
+                await driver.quit()
+            return checks
+
+    assert asyncio.run(main()) == {'load': 4, 'domcontentloaded': 2, None: 0}
+
+
+async def _devtools(request, urls):
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+
+    async def answer(data):
+        method, params, session = data['method'], data['params'], data.get('sessionId')
+        result = {}
+        if method == 'Target.createTarget':
+            result = {'targetId': 'target-%d' % data['id']}
+        elif method == 'Target.attachToTarget':
+            result = {'sessionId': 'session-' + params['targetId']}
+        elif method == 'Page.navigate':
+            await asyncio.sleep(0.05)
+            urls[session] = params['url']
+            await ws.send_str(json.dumps({'method': 'Page.loadEventFired', 'params': {}, 'sessionId': session}))
+        elif method == 'Runtime.evaluate':
+            result = {'result': {'value': 'title of ' + urls.get(session, '')}}
+        elif method == 'Bad.method':
+            await ws.send_str(json.dumps({'id': data['id'], 'error': {'code': -32601, 'message': 'not found'}}))
+            return
+        await ws.send_str(json.dumps({'id': data['id'], 'result': result, 'sessionId': session}))
+
+    tasks = [asyncio.ensure_future(answer(json.loads(message.data))) async for message in ws]
+    await asyncio.gather(*tasks)
+    return ws
+
+
+def test_cdp_tabs_work_concurrently():
+    async def main():
+        app = web.Application()
+        urls = {}
+
+        async def devtools(request):
+            return await _devtools(request, urls)
+        app.router.add_get('/devtools/browser', devtools)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        url = 'ws://127.0.0.1:%d/devtools/browser' % site._server.sockets[0].getsockname()[1]
+        try:
+            async with CDPConnection(url) as cdp:
+                async def open_tab():
+                    target = await cdp.send('Target.createTarget', {'url': 'about:blank'})
+                    return await CDPTab(await cdp.attach(target['targetId'])).setup()
+                tabs = await asyncio.gather(*[open_tab() for _ in range(4)])
+                started = asyncio.get_running_loop().time()
+                titles = await asyncio.gather(*[scrape(tab, number) for number, tab in enumerate(tabs)])
+                elapsed = asyncio.get_running_loop().time() - started
+                with pytest.raises(CDPError, match='not found'):
+                    await cdp.send('Bad.method')
+            return titles, elapsed
+        finally:
+            await runner.cleanup()
+
+    titles, elapsed = asyncio.run(main())
+    assert titles == ['title of http://site.test/%d' % number for number in range(4)]
+    assert elapsed < 0.15
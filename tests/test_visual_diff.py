@@ -0,0 +1,118 @@
+import asyncio
+import base64
+import io
+
+import pytest
+
+np = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+
+from asyncselenium.testing.fake_server import FakeWebDriverServer
+from asyncselenium.webdriver.remote.async_webdriver import AsyncWebdriver
+from asyncselenium.webdriver.support import visual_diff
+
+
+def _png(pixels):
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def _gradient():
+    x = np.linspace(0, 255, 64, dtype=np.uint8)
+    return np.stack([np.tile(x, (48, 1))] * 3, axis=2)
+
+
+def test_identical_images_match():
+    png = _png(_gradient())
+    result = visual_diff.compare_images(png, png)
+    assert result.match
+    assert result.diff_pixels == 0
+    # only hashed for the prefilter
+    assert result.hash_distance is None
+    assert visual_diff.compare_images(png, png, max_hash_distance=0).hash_distance == 0
+    assert result.size == (64, 48)
+
+
+def test_tolerance_and_ignored_regions():
+    base = _gradient()
+    actual = base.copy()
+    actual[:, :, 0] = np.clip(actual[:, :, 0].astype(int) + 3, 0, 255)
+    actual[10:20, 10:20] = 0
+
+    assert not visual_diff.compare_images(actual, base).match
+    result = visual_diff.compare_images(actual, base, tolerance=3)
+    assert result.diff_pixels == 100
+    result = visual_diff.compare_images(actual, base, tolerance=3,
+                                        ignore_regions=[{'x': 10, 'y': 10, 'width': 10, 'height': 10}],
+                                        return_mask=True)
+    assert result.match
+    assert result.mask.shape == (48, 64)
+
+
+def test_hash_prefilter_and_size_mismatch():
+    base = _gradient()
+    result = visual_diff.compare_images(base[:, ::-1], base, max_hash_distance=4)
+    assert not result.match
+    assert result.diff_pixels is None
+    assert result.hash_distance > 4
+    assert not visual_diff.compare_images(base[:40], base).match
+
+
+def test_compare_batch(tmp_path):
+    base = _gradient()
+    path = tmp_path / 'base.png'
+    path.write_bytes(_png(base))
+    changed = base.copy()
+    changed[0, 0] = 255 - changed[0, 0]
+    pairs = [(str(path), str(path)), (_png(changed), str(path))] * 4
+    results = visual_diff.compare_batch(pairs, max_workers=2, chunksize=2)
+    assert [r.match for r in results] == [True, False] * 4
+    assert results[1].diff_pixels == 1
+
+
+def test_dhash_of_tiny_and_empty_images():
+    tiny = np.zeros((3, 2, 3), dtype=np.uint8)
+    tiny[:, 1] = 255
+    # one dark to bright step in every row of the grid
+    assert bin(visual_diff.dhash(tiny)).count('1') == 8
+    assert visual_diff.dhash(tiny[:, ::-1]) == 0
+    assert visual_diff.dhash(np.zeros((1, 1, 3), dtype=np.uint8)) == 0
+    assert visual_diff.compare_images(tiny, tiny).match
+    with pytest.raises(ValueError):
+        visual_diff.dhash(np.zeros((0, 10, 3), dtype=np.uint8))
+
+
+def test_regions_partly_off_the_image_only_cover_their_visible_part():
+    base = _gradient()
+    actual = base.copy()
+    actual[0:5, 10:15] = 0
+    actual[5:10, 10:15] = 0
+    # 10 rows tall from y=-5, it covers rows 0 to 4 only
+    result = visual_diff.compare_images(actual, base, ignore_regions=[(10, -5, 5, 10)])
+    assert result.diff_pixels == 25
+    assert visual_diff.compare_images(actual, base, ignore_regions=[(-70, 0, 5, 48)]).diff_pixels == 50
+
+
+def test_visual_diff_of_a_driver_and_an_element():
+    async def main():
+        async with FakeWebDriverServer() as server:
+            server.add_page('http://site.test/', '<html><body><p id="ad">ad</p></body></html>')
+            server.add_page('http://site.test/other', '<html><body></body></html>')
+            driver = await AsyncWebdriver(command_executor=server.url, desired_capabilities={'browserName': 'fake'})
+            try:
+                await driver.get('http://site.test/')
+                baseline = await driver.get_screenshot_as_png()
+                same = await visual_diff.visual_diff(driver, baseline)
+                white = base64.b64decode(server.screenshot(size=(200, 20)))
+                element = await visual_diff.visual_diff(await driver.find_element_by_id('ad'), white)
+                await driver.get('http://site.test/other')
+                other = await visual_diff.visual_diff(driver, baseline)
+            finally:
+                await driver.quit()
+            return same, other, element
+
+    same, other, element = asyncio.run(main())
+    assert same.match and same.size == (800, 600)
+    assert not other.match
+    assert element.match and element.size == (200, 20)